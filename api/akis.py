@@ -0,0 +1,96 @@
+"""
+Liste endpoint'leri için ortak yanıtlar
+- limit verilmezse tüm liste akış (streaming) olarak yazılır: DB'den parti parti okunur, belleğe toplanmaz.
+- limit verilirse keyset sayfalama ile tek sayfa döner (app/sayfalama.py); sonraki sayfa için
+  yanıttaki `sonraki_cursor` değeri `?cursor=` ile gönderilir.
+- fields: liste görünümü kolonları (varsayılan özet; detay için /{id} endpoint'i)
+Yanıt şekli: {"success": true, "data": [...], "count": N} (+ sayfalı: "sonraki_cursor", istenirse "toplam")
+"""
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.satir import satirlari_json
+from app.sayfalama import MAX_LIMIT, SayfalamaHatasi
+
+
+class SayfaParametreleri:
+    """Ortak liste parametreleri: `sayfa: SayfaParametreleri = Depends()`"""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Sayfa boyutu; verilmezse tüm liste"),
+        cursor: Optional[str] = Query(None, description="Önceki yanıttaki sonraki_cursor"),
+        sirala: Optional[str] = Query(None, description="Sıralama anahtarı; azalan için başına '-' (örn. -olusturma_tarihi)"),
+        toplam: bool = Query(False, description="Filtreye uyan toplam kayıt sayısını da döndür"),
+        fields: Optional[str] = Query(None, description="ozet (varsayılan), tumu veya virgüllü kolon listesi"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sirala = sirala
+        self.toplam = toplam
+        self.fields = fields
+
+    @property
+    def sayfali(self) -> bool:
+        return self.limit is not None or bool(self.cursor)
+
+    def sayfa_argumanlari(self) -> dict:
+        """DB katmanındaki *_sayfa metodlarına verilecek argümanlar"""
+        arguman = {"sirala": self.sirala, "cursor": self.cursor, "toplam": self.toplam, "fields": self.fields}
+        if self.limit is not None:
+            arguman["limit"] = self.limit
+        return arguman
+
+
+def sayfa_yaniti(sonuc: dict) -> dict:
+    """*_sayfa sonucunu liste yanıtına çevir"""
+    yanit = {
+        "success": True,
+        "data": sonuc["data"],
+        "count": len(sonuc["data"]),
+        "sonraki_cursor": sonuc["sonraki_cursor"],
+    }
+    if "toplam" in sonuc:
+        yanit["toplam"] = sonuc["toplam"]
+    return yanit
+
+
+def sayfalama_hatasi(e: SayfalamaHatasi) -> HTTPException:
+    """Geçersiz sıralama / cursor -> 400"""
+    return HTTPException(status_code=400, detail=str(e))
+
+
+async def json_akis_yaniti(partiler) -> StreamingResponse:
+    """
+    partiler: satır listeleri (SatirListesi / sözlük listesi) üreten async generator (AsyncDatabase.akis).
+    Kompakt satırlar ara sözlük oluşturulmadan doğrudan JSON'a yazılır (app/satir.py).
+    İlk parti yanıt başlamadan okunur; böylece sorgu hatası / 503 normal HTTP hatası olarak döner.
+    Yanıt yazılırken istemci koparsa generator kapatılır ve DB bağlantısı serbest kalır.
+    """
+    try:
+        ilk = await partiler.__anext__()
+    except StopAsyncIteration:
+        ilk = None
+    except BaseException:
+        await partiler.aclose()
+        raise
+
+    async def govde():
+        try:
+            yield '{"success": true, "data": ['
+            sayi = 0
+            if ilk is not None:
+                yield satirlari_json(ilk)
+                sayi = len(ilk)
+                async for satirlar in partiler:
+                    if not satirlar:
+                        continue
+                    yield (", " if sayi else "") + satirlari_json(satirlar)
+                    sayi += len(satirlar)
+            yield f'], "count": {sayi}}}'
+        finally:
+            await partiler.aclose()
+
+    return StreamingResponse(govde(), media_type="application/json")
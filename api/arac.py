@@ -6,7 +6,9 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 
 from models import AracCreate, AracUpdate, AracBelgeCreate, AracBakimCreate
-from db_instance import db
+from db_instance import async_db as db
+from api.akis import SayfaParametreleri, json_akis_yaniti, sayfa_yaniti, sayfalama_hatasi
+from app.sayfalama import SayfalamaHatasi
 from api.auth import get_current_user, require_can_read_arac, require_can_write_arac, require_admin
 
 router = APIRouter(
@@ -20,11 +22,19 @@ router = APIRouter(
 async def arac_listele(
     arama: Optional[str] = "",
     durum: Optional[str] = None,
+    sayfa: SayfaParametreleri = Depends(),
 ):
-    """Araç listesi. arama: plaka/marka/model/şasi; durum: aktif, bakımda, pasif."""
+    """Araç listesi. arama: plaka/marka/model/şasi; durum: aktif, bakımda, pasif. limit/cursor ile sayfalı."""
     try:
-        liste = db.arac_listele(arama=arama or "", durum=durum)
-        return {"success": True, "data": liste, "count": len(liste)}
+        if sayfa.sayfali:
+            return sayfa_yaniti(await db.arac_sayfa(arama=arama or "", durum=durum, **sayfa.sayfa_argumanlari()))
+        return await json_akis_yaniti(
+            db.akis(db.sync.arac_akis, arama=arama or "", durum=durum, sirala=sayfa.sirala, fields=sayfa.fields)
+        )
+    except SayfalamaHatasi as e:
+        raise sayfalama_hatasi(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -35,8 +45,10 @@ async def belgeler_suresi_dolacak(
 ):
     """Belirtilen gün sayısı içinde süresi dolacak belgeleri listeler."""
     try:
-        liste = db.belge_suresi_dolacak_listele(gun=gun)
+        liste = await db.belge_suresi_dolacak_listele(gun=gun)
         return {"success": True, "data": liste, "count": len(liste)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -48,8 +60,10 @@ async def belgeler_takip(
 ):
     """Belge ve son tarih takibi: tüm belgeler bitiş tarihine göre (en yakın önce)."""
     try:
-        liste = db.belge_takip_listele(arac_plakasi=arac_plakasi, belge_turu=belge_turu)
+        liste = await db.belge_takip_listele(arac_plakasi=arac_plakasi, belge_turu=belge_turu)
         return {"success": True, "data": liste, "count": len(liste)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -58,7 +72,7 @@ async def belgeler_takip(
 async def arac_getir(arac_id: int):
     """Tek araç detayı."""
     try:
-        arac = db.arac_getir(arac_id)
+        arac = await db.arac_getir(arac_id)
         if not arac:
             raise HTTPException(status_code=404, detail="Araç bulunamadı")
         return {"success": True, "data": arac}
@@ -71,12 +85,14 @@ async def arac_getir(arac_id: int):
 @router.get("/{arac_id}/belgeler")
 async def arac_belgeleri_listele(arac_id: int):
     """Aracın belgelerini listeler."""
-    arac = db.arac_getir(arac_id)
+    arac = await db.arac_getir(arac_id)
     if not arac:
         raise HTTPException(status_code=404, detail="Araç bulunamadı")
     try:
-        liste = db.belge_listele(arac_id)
+        liste = await db.belge_listele(arac_id)
         return {"success": True, "data": liste, "count": len(liste)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -84,12 +100,14 @@ async def arac_belgeleri_listele(arac_id: int):
 @router.get("/{arac_id}/bakim")
 async def arac_bakim_listele(arac_id: int):
     """Aracın bakım geçmişini listeler."""
-    arac = db.arac_getir(arac_id)
+    arac = await db.arac_getir(arac_id)
     if not arac:
         raise HTTPException(status_code=404, detail="Araç bulunamadı")
     try:
-        liste = db.bakim_listele(arac_id)
+        liste = await db.bakim_listele(arac_id)
         return {"success": True, "data": liste, "count": len(liste)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -97,12 +115,14 @@ async def arac_bakim_listele(arac_id: int):
 @router.get("/{arac_id}/bakim-uyarilari")
 async def arac_bakim_uyarilari(arac_id: int):
     """Aracın bakım uyarılarını döndürür (yağ 15k km/6 ay, fren 25k km, lastik 80k km/3 yıl)."""
-    arac = db.arac_getir(arac_id)
+    arac = await db.arac_getir(arac_id)
     if not arac:
         raise HTTPException(status_code=404, detail="Araç bulunamadı")
     try:
-        uyarilar = db.bakim_uyarilari_hesapla(arac_id)
+        uyarilar = await db.bakim_uyarilari_hesapla(arac_id)
         return {"success": True, "data": uyarilar}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -113,7 +133,7 @@ async def arac_bakim_uyarilari(arac_id: int):
 async def arac_ekle(body: AracCreate):
     """Yeni araç ekler."""
     try:
-        ok, msg = db.arac_ekle(
+        ok, msg = await db.arac_ekle(
             arac_plakasi=body.arac_plakasi,
             arac_tipi=body.arac_tipi or "diğer",
             marka=body.marka or "",
@@ -138,11 +158,11 @@ async def arac_ekle(body: AracCreate):
 @router.put("/{arac_id}", dependencies=[Depends(require_can_write_arac)])
 async def arac_guncelle(arac_id: int, body: AracUpdate):
     """Araç bilgilerini günceller."""
-    mevcut = db.arac_getir(arac_id)
+    mevcut = await db.arac_getir(arac_id)
     if not mevcut:
         raise HTTPException(status_code=404, detail="Araç bulunamadı")
     try:
-        ok, msg = db.arac_guncelle(
+        ok, msg = await db.arac_guncelle(
             arac_id=arac_id,
             arac_plakasi=body.arac_plakasi,
             arac_tipi=body.arac_tipi or "diğer",
@@ -168,11 +188,11 @@ async def arac_guncelle(arac_id: int, body: AracUpdate):
 @router.delete("/{arac_id}", dependencies=[Depends(require_can_write_arac)])
 async def arac_sil(arac_id: int):
     """Aracı siler (belge ve bakım kayıtları cascade silinir)."""
-    mevcut = db.arac_getir(arac_id)
+    mevcut = await db.arac_getir(arac_id)
     if not mevcut:
         raise HTTPException(status_code=404, detail="Araç bulunamadı")
     try:
-        ok = db.arac_sil(arac_id)
+        ok = await db.arac_sil(arac_id)
         if ok:
             return {"success": True, "message": "Araç silindi"}
         raise HTTPException(status_code=500, detail="Silme işlemi başarısız")
@@ -185,13 +205,13 @@ async def arac_sil(arac_id: int):
 @router.post("/{arac_id}/belgeler", dependencies=[Depends(require_can_write_arac)])
 async def arac_belge_ekle(arac_id: int, body: AracBelgeCreate):
     """Araca belge ekler."""
-    arac = db.arac_getir(arac_id)
+    arac = await db.arac_getir(arac_id)
     if not arac:
         raise HTTPException(status_code=404, detail="Araç bulunamadı")
     if not body.bitis_tarihi:
         raise HTTPException(status_code=400, detail="Bitiş tarihi zorunludur")
     try:
-        ok, msg = db.belge_ekle(
+        ok, msg = await db.belge_ekle(
             arac_id=arac_id,
             belge_turu=body.belge_turu,
             duzenlenme_tarihi=body.duzenlenme_tarihi,
@@ -210,13 +230,13 @@ async def arac_belge_ekle(arac_id: int, body: AracBelgeCreate):
 @router.put("/{arac_id}/belgeler/{belge_id}", dependencies=[Depends(require_admin)])
 async def arac_belge_guncelle(arac_id: int, belge_id: int, body: AracBelgeCreate):
     """Belge günceller (sadece admin)."""
-    belge = db.belge_getir(belge_id)
+    belge = await db.belge_getir(belge_id)
     if not belge or belge.get("arac_id") != arac_id:
         raise HTTPException(status_code=404, detail="Belge bulunamadı")
     if not body.bitis_tarihi:
         raise HTTPException(status_code=400, detail="Bitiş tarihi zorunludur")
     try:
-        ok, msg = db.belge_guncelle(
+        ok, msg = await db.belge_guncelle(
             belge_id=belge_id,
             belge_turu=body.belge_turu,
             duzenlenme_tarihi=body.duzenlenme_tarihi,
@@ -235,11 +255,11 @@ async def arac_belge_guncelle(arac_id: int, belge_id: int, body: AracBelgeCreate
 @router.delete("/{arac_id}/belgeler/{belge_id}", dependencies=[Depends(require_admin)])
 async def arac_belge_sil(arac_id: int, belge_id: int):
     """Belge siler (sadece admin)."""
-    belge = db.belge_getir(belge_id)
+    belge = await db.belge_getir(belge_id)
     if not belge or belge.get("arac_id") != arac_id:
         raise HTTPException(status_code=404, detail="Belge bulunamadı")
     try:
-        ok, msg = db.belge_sil(belge_id)
+        ok, msg = await db.belge_sil(belge_id)
         if ok:
             return {"success": True, "message": msg}
         raise HTTPException(status_code=400, detail=msg)
@@ -252,11 +272,11 @@ async def arac_belge_sil(arac_id: int, belge_id: int):
 @router.post("/{arac_id}/bakim", dependencies=[Depends(require_can_write_arac)])
 async def arac_bakim_ekle(arac_id: int, body: AracBakimCreate):
     """Araca bakım kaydı ekler."""
-    arac = db.arac_getir(arac_id)
+    arac = await db.arac_getir(arac_id)
     if not arac:
         raise HTTPException(status_code=404, detail="Araç bulunamadı")
     try:
-        ok, msg = db.bakim_ekle(
+        ok, msg = await db.bakim_ekle(
             arac_id=arac_id,
             bakim_turu=body.bakim_turu,
             aciklama=body.aciklama or "",
@@ -11,7 +11,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from jose import JWTError, jwt
 
-from db_instance import db
+from db_instance import async_db as db
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 security = HTTPBearer(auto_error=False)
@@ -128,7 +128,7 @@ def require_not_sofor(current_user: dict = Depends(get_current_user)) -> dict:
 @router.post("/login")
 async def login(body: LoginRequest):
     """Kullanıcı adı ve şifre ile giriş. Token ve kullanıcı bilgisi döner."""
-    user = db.auth.authenticate(body.username.strip(), body.password)
+    user = await db.auth.authenticate(body.username.strip(), body.password)
     if not user:
         raise HTTPException(status_code=401, detail="Kullanıcı adı veya şifre hatalı.")
     token = create_access_token(
@@ -156,7 +156,7 @@ async def list_users(
     current_user: dict = Depends(require_admin),
 ):
     """Tüm kullanıcıları listeler (sadece admin)."""
-    users = db.auth.list_users()
+    users = await db.auth.list_users()
     return {"success": True, "data": users}
 
 
@@ -170,7 +170,7 @@ async def create_user(
     allowed_roles = ("admin", "user", "operasyon_yoneticisi", "sofor", "servis_teknisyeni")
     if role not in allowed_roles:
         raise HTTPException(status_code=400, detail=f"Rol şunlardan biri olmalıdır: {', '.join(allowed_roles)}.")
-    ok, msg = db.auth.create_user(body.username.strip(), body.password, role)
+    ok, msg = await db.auth.create_user(body.username.strip(), body.password, role)
     if not ok:
         raise HTTPException(status_code=400, detail=msg)
     return {"success": True, "message": msg}
@@ -182,7 +182,7 @@ async def delete_user(
     current_user: dict = Depends(require_admin),
 ):
     """Kullanıcı siler (sadece admin). Son kalan admin silinemez."""
-    ok, msg = db.auth.delete_user(user_id)
+    ok, msg = await db.auth.delete_user(user_id)
     if not ok:
         raise HTTPException(status_code=400, detail=msg)
     return {"success": True, "message": msg}
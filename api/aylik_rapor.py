@@ -10,7 +10,7 @@ from typing import Tuple
 
 from fastapi import APIRouter, HTTPException, Header, Query, Depends
 
-from db_instance import db
+from db_instance import async_db as db
 from api.pdf_email import aylik_rapor_pdf_olustur, rapor_email_gonder
 from api.auth import get_current_user, require_can_write_module, require_not_sofor
 
@@ -60,7 +60,7 @@ async def run_aylik_rapor(ay: int, yil: int) -> dict:
     Aylık raporu oluşturup EMAIL_TO adresine gönderir.
     Endpoint ve otomatik cron job tarafından kullanılır. Hata durumunda exception fırlatır.
     """
-    evraklar = db.is_evraki_aylik_getir(ay, yil)
+    evraklar = await db.is_evraki_aylik_getir(ay, yil)
     musteri_sayisi = len(set((e.get("musteri_unvan") or "").strip() for e in evraklar if (e.get("musteri_unvan") or "").strip()))
     ciro = sum(float(e.get("toplam_tutar") or 0) for e in evraklar)
     urun_detay = _urun_ozetleri(evraklar)
@@ -128,5 +128,7 @@ async def aylik_rapor_gonder(
 
     try:
         return await run_aylik_rapor(a, y)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
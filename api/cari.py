@@ -4,18 +4,25 @@ Cari (Customer Account) API endpoints
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from models import CariCreate, CariUpdate
-from db_instance import db
+from db_instance import async_db as db
+from api.akis import SayfaParametreleri, json_akis_yaniti, sayfa_yaniti, sayfalama_hatasi
+from app.sayfalama import SayfalamaHatasi
 from api.auth import get_current_user, require_can_write_module, require_not_sofor
 
 router = APIRouter(prefix="/api/cari", tags=["cari"], dependencies=[Depends(get_current_user), Depends(require_not_sofor)])
 
 
 @router.get("")
-async def cari_listele(arama: Optional[str] = "", tip: Optional[str] = ""):
-    """List all customer accounts with optional search and filter"""
+async def cari_listele(arama: Optional[str] = "", tip: Optional[str] = "", sayfa: SayfaParametreleri = Depends()):
+    """List all customer accounts with optional search and filter (limit/cursor ile sayfalı)"""
     try:
-        cariler = db.cari_listele(arama, tip)
-        return {"success": True, "data": cariler, "count": len(cariler)}
+        if sayfa.sayfali:
+            return sayfa_yaniti(await db.cari_sayfa(arama, tip, **sayfa.sayfa_argumanlari()))
+        return await json_akis_yaniti(db.akis(db.sync.cari_akis, arama, tip, sirala=sayfa.sirala, fields=sayfa.fields))
+    except SayfalamaHatasi as e:
+        raise sayfalama_hatasi(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -24,7 +31,7 @@ async def cari_listele(arama: Optional[str] = "", tip: Optional[str] = ""):
 async def cari_getir(cari_id: int):
     """Get a specific customer account by ID"""
     try:
-        cari = db.cari_getir(cari_id)
+        cari = await db.cari_getir(cari_id)
         if not cari:
             raise HTTPException(status_code=404, detail="Cari hesap bulunamadı")
         return {"success": True, "data": cari}
@@ -41,7 +48,7 @@ async def cari_ekle(cari: CariCreate):
         if not cari.unvan:
             raise HTTPException(status_code=400, detail="Ünvan zorunludur")
         
-        result = db.cari_ekle(
+        result = await db.cari_ekle(
             cari.cari_kodu, cari.unvan, cari.tip, cari.telefon, cari.email,
             cari.adres, cari.tc_kimlik_no, cari.vergi_no, cari.vergi_dairesi,
             cari.bakiye, cari.aciklama, cari.firma_tipi
@@ -64,7 +71,7 @@ async def cari_guncelle(cari_id: int, cari: CariUpdate):
         if not cari.unvan:
             raise HTTPException(status_code=400, detail="Ünvan zorunludur")
         
-        result = db.cari_guncelle(
+        result = await db.cari_guncelle(
             cari_id, cari.cari_kodu, cari.unvan, cari.tip, cari.telefon,
             cari.email, cari.adres, cari.tc_kimlik_no or "", cari.vergi_no, cari.vergi_dairesi,
             cari.bakiye, cari.aciklama, cari.firma_tipi
@@ -84,7 +91,7 @@ async def cari_guncelle(cari_id: int, cari: CariUpdate):
 async def cari_sil(cari_id: int):
     """Delete a customer account"""
     try:
-        result = db.cari_sil(cari_id)
+        result = await db.cari_sil(cari_id)
         if result:
             return {"success": True, "message": "Cari hesap başarıyla silindi"}
         else:
@@ -99,7 +106,7 @@ async def cari_sil(cari_id: int):
 async def cari_tc_ile_ara(tc_kimlik_no: str):
     """Search customer account by TC identity number"""
     try:
-        cari = db.cari_tc_ile_ara(tc_kimlik_no)
+        cari = await db.cari_tc_ile_ara(tc_kimlik_no)
         if not cari:
             raise HTTPException(status_code=404, detail="Cari hesap bulunamadı")
         return {"success": True, "data": cari}
@@ -113,7 +120,7 @@ async def cari_tc_ile_ara(tc_kimlik_no: str):
 async def cari_unvan_ile_ara(unvan: str):
     """Search customer account by title"""
     try:
-        cari = db.cari_unvan_ile_ara(unvan)
+        cari = await db.cari_unvan_ile_ara(unvan)
         if not cari:
             raise HTTPException(status_code=404, detail="Cari hesap bulunamadı")
         return {"success": True, "data": cari}
@@ -127,8 +134,10 @@ async def cari_unvan_ile_ara(unvan: str):
 async def cari_sonraki_kod():
     """Get next available customer code"""
     try:
-        kod = db.cari_sonraki_kod_olustur()
+        kod = await db.cari_sonraki_kod_olustur()
         return {"success": True, "data": {"cari_kodu": kod}}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -140,7 +149,7 @@ async def cari_ekle_tc_kontrolu_ile(cari: CariCreate):
         if not cari.unvan:
             raise HTTPException(status_code=400, detail="Ünvan zorunludur")
         
-        basarili, mesaj = db.cari_ekle_tc_kontrolu_ile(
+        basarili, mesaj = await db.cari_ekle_tc_kontrolu_ile(
             cari.cari_kodu, cari.unvan, cari.tip, cari.telefon, cari.email,
             cari.adres, cari.tc_kimlik_no, cari.vergi_no, cari.vergi_dairesi,
             cari.bakiye, cari.aciklama, cari.firma_tipi
@@ -6,7 +6,7 @@ from fastapi.responses import FileResponse
 import os
 import tempfile
 from datetime import datetime
-from db_instance import db
+from db_instance import async_db as db
 from api.auth import get_current_user, require_can_write_module, require_not_sofor
 
 router = APIRouter(prefix="/api/stok", tags=["excel"], dependencies=[Depends(get_current_user), Depends(require_not_sofor)])
@@ -18,24 +18,27 @@ async def stok_excel_export():
     try:
         import pandas as pd
         
-        urunler = db.stok_listele("")
+        # Akış partileri kompakt tuple satırlar; ara sözlük üretmeden DataFrame'e aktarılır
+        kolonlar = None
+        satirlar = []
+        async for parti in db.akis(db.sync.stok_akis, "", fields="tumu"):
+            kolonlar = parti.sema.kolonlar
+            satirlar.extend(parti.degerler)
         
-        if not urunler:
+        if not satirlar:
             raise HTTPException(status_code=404, detail="Dışa aktarılacak stok kaydı bulunamadı")
         
-        data = []
-        for urun in urunler:
-            data.append({
-                "Ürün Kodu": urun.get("urun_kodu") or "",
-                "Ürün Adı": urun.get("urun_adi", ""),
-                "Marka": urun.get("marka", ""),
-                "Birim": urun.get("birim", ""),
-                "Stok Miktarı": urun.get("stok_miktari", 0),
-                "Birim Fiyat": urun.get("birim_fiyat", 0),
-                "Açıklama": urun.get("aciklama", "")
-            })
-        
-        df = pd.DataFrame(data)
+        basliklar = {
+            "urun_kodu": "Ürün Kodu",
+            "urun_adi": "Ürün Adı",
+            "marka": "Marka",
+            "birim": "Birim",
+            "stok_miktari": "Stok Miktarı",
+            "birim_fiyat": "Birim Fiyat",
+            "aciklama": "Açıklama",
+        }
+        df = pd.DataFrame.from_records(satirlar, columns=kolonlar)[list(basliklar)].rename(columns=basliklar)
+        df["Ürün Kodu"] = df["Ürün Kodu"].fillna("")
         
         # Geçici dosya oluştur
         temp_dir = tempfile.gettempdir()
@@ -131,6 +134,7 @@ async def stok_excel_import(file: UploadFile = File(...)):
             basarili = 0
             hatali = 0
             hata_mesajlari = []
+            eklenecekler = []
             
             for index, row in df.iterrows():
                 try:
@@ -209,24 +213,34 @@ async def stok_excel_import(file: UploadFile = File(...)):
                             if aciklama.lower() in ["nan", "none", "null"]:
                                 aciklama = ""
                     
-                    sonuc = db.stok_ekle(urun_kodu, urun_adi, marka, birim, miktar, fiyat, aciklama)
-                    if sonuc:
-                        basarili += 1
-                    else:
-                        hatali += 1
-                        if urun_kodu:
-                            hata_mesajlari.append(f"Satır {index + 2}: {urun_adi} (Kod: {urun_kodu}) - Ürün kodu zaten mevcut")
-                        else:
-                            mevcut_urun = db.stok_urun_adi_ile_ara(urun_adi)
-                            if mevcut_urun:
-                                hata_mesajlari.append(f"Satır {index + 2}: {urun_adi} - Aynı isimde ürün zaten mevcut")
-                            else:
-                                hata_mesajlari.append(f"Satır {index + 2}: {urun_adi} - Eklenemedi")
+                    eklenecekler.append((index, {
+                        "urun_kodu": urun_kodu,
+                        "urun_adi": urun_adi,
+                        "marka": marka,
+                        "birim": birim,
+                        "stok_miktari": miktar,
+                        "birim_fiyat": fiyat,
+                        "aciklama": aciklama,
+                    }))
                 
                 except Exception as e:
                     hatali += 1
                     hata_mesajlari.append(f"Satır {index + 2}: {str(e)}")
             
+            # Tüm satırlar tek transaction'da, çok satırlı INSERT'lerle eklenir; sonuç satır bazında döner
+            sonuclar = await db.stok_ekle_bulk(
+                [urun for _, urun in eklenecekler], kaynak="excel_import", kaynak_no=(file.filename or "")[:64] or None
+            ) if eklenecekler else []
+            for (index, urun), (ok, mesaj) in zip(eklenecekler, sonuclar):
+                if ok:
+                    basarili += 1
+                    continue
+                hatali += 1
+                if urun["urun_kodu"]:
+                    hata_mesajlari.append(f"Satır {index + 2}: {urun['urun_adi']} (Kod: {urun['urun_kodu']}) - {mesaj}")
+                else:
+                    hata_mesajlari.append(f"Satır {index + 2}: {urun['urun_adi']} - {mesaj}")
+            
             return {
                 "success": True,
                 "basarili": basarili,
@@ -5,11 +5,14 @@ from fastapi import APIRouter, HTTPException, Depends
 import json
 from decimal import Decimal
 from datetime import date, datetime
+from typing import Optional
 
 from models import IsEvrakiCreate, IsEvrakiCreateWithEmail, IsEvrakiUpdate, IsEvrakiUpdateWithEmail
 from api.pdf_email import pdf_olustur_api, email_gonder_api
 from api.auth import get_current_user, require_can_write_module, require_not_sofor
-from db_instance import db
+from db_instance import async_db as db
+from api.akis import SayfaParametreleri, json_akis_yaniti, sayfa_yaniti, sayfalama_hatasi
+from app.sayfalama import SayfalamaHatasi
 
 router = APIRouter(prefix="/api/is-evraki", tags=["is-evraki"], dependencies=[Depends(get_current_user), Depends(require_not_sofor)])
 
@@ -51,7 +54,7 @@ def _normalize_kullanilan_urunler(kullanilan_urunler: str) -> str:
     return json.dumps(urunler, ensure_ascii=False)
 
 
-def _sync_cari_is_evrakindan(
+async def _sync_cari_is_evrakindan(
     musteri_unvan: str,
     telefon: str = "",
     musteri_email: str = "",
@@ -68,7 +71,7 @@ def _sync_cari_is_evrakindan(
     vergi_no_deger = (tc_kimlik_no or "").strip()
     odendi = (odeme_durumu or "").strip().lower() == "odendi"
     cari_bakiye = 0.0 if odendi else float(toplam_tutar or 0)
-    _ok, mesaj = db.cari_ekle_tc_kontrolu_ile(
+    _ok, mesaj = await db.cari_ekle_tc_kontrolu_ile(
         cari_kodu="",
         unvan=musteri_unvan.strip(),
         tip="Müşteri",
@@ -104,19 +107,33 @@ def _evrak_json_serialize(obj):
 async def is_emri_no_sonraki():
     """Get next available work order number"""
     try:
-        no = db.is_emri_no_sonraki()
+        no = await db.is_emri_no_sonraki()
         return {"success": True, "data": {"is_emri_no": no}}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("")
-async def is_evraki_listele():
-    """List all work orders"""
+async def is_evraki_listele(
+    arama: Optional[str] = "",
+    donem: Optional[str] = "",
+    odeme_durumu: Optional[str] = "",
+    sayfa: SayfaParametreleri = Depends(),
+):
+    """List all work orders (arama: müşteri/plaka; donem: YYYY-MM; limit/cursor ile sayfalı)"""
     try:
-        evraklar = db.is_evraki_listele()
-        evraklar = _evrak_json_serialize(evraklar)
-        return {"success": True, "data": evraklar, "count": len(evraklar)}
+        filtre = {"arama": arama or "", "donem": donem or "", "odeme_durumu": odeme_durumu or ""}
+        if sayfa.sayfali:
+            sonuc = await db.is_evraki_sayfa(**filtre, **sayfa.sayfa_argumanlari())
+            sonuc["data"] = _evrak_json_serialize(sonuc["data"])
+            return sayfa_yaniti(sonuc)
+        return await json_akis_yaniti(db.akis(db.sync.is_evraki_akis, **filtre, sirala=sayfa.sirala, fields=sayfa.fields))
+    except SayfalamaHatasi as e:
+        raise sayfalama_hatasi(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -125,7 +142,7 @@ async def is_evraki_listele():
 async def is_evraki_getir(evrak_id: int):
     """Get a specific work order by ID"""
     try:
-        evrak = db.is_evraki_getir(evrak_id)
+        evrak = await db.is_evraki_getir(evrak_id)
         if not evrak:
             raise HTTPException(status_code=404, detail="İş evrakı bulunamadı")
         evrak = _evrak_json_serialize(evrak)
@@ -143,7 +160,7 @@ async def is_evraki_ekle(evrak: IsEvrakiCreate):
         if not evrak.musteri_unvan:
             raise HTTPException(status_code=400, detail="Müşteri ünvanı zorunludur")
         kullanilan_urunler_norm = _normalize_kullanilan_urunler(evrak.kullanilan_urunler or "")
-        basarili, mesaj = db.is_evraki_ekle(
+        basarili, mesaj = await db.is_evraki_ekle(
             evrak.is_emri_no, evrak.tarih, evrak.musteri_unvan, evrak.telefon,
             evrak.arac_plakasi, evrak.cekici_dorse, evrak.marka_model,
             evrak.talep_edilen_isler, evrak.musteri_sikayeti, evrak.yapilan_is,
@@ -152,7 +169,7 @@ async def is_evraki_ekle(evrak: IsEvrakiCreate):
         )
         
         if basarili:
-            cari_mesaji = _sync_cari_is_evrakindan(
+            cari_mesaji = await _sync_cari_is_evrakindan(
                 evrak.musteri_unvan,
                 evrak.telefon or "",
                 evrak.musteri_email or "",
@@ -199,35 +216,43 @@ async def is_evraki_kaydet_ve_gonder(evrak: IsEvrakiCreateWithEmail):
                     "urun_adi": urun.get("urun_adi", "")
                 })
         
-        stok_mesajlari = {"basarili": [], "hatali": []}
-        if stok_urunler_listesi:
-            basarili_mesajlar, hata_mesajlari = db.stok_miktar_azalt_batch(stok_urunler_listesi)
-            stok_mesajlari["basarili"] = basarili_mesajlar
-            stok_mesajlari["hatali"] = hata_mesajlari
+        # Stok düşümü, cari ve evrak kaydı tek transaction: evrak kaydedilemezse stok/cari değişiklikleri geri alınır
+        async with db.unit_of_work():
+            stok_mesajlari = {"basarili": [], "hatali": []}
+            # Bu taslağın (yalnızca kendi anahtarıyla) rezervasyonları aynı transaction'da bırakılır;
+            # ayrılan miktar aşağıdaki düşüme dönüşür. Aynı iş emri no'lu başka taslakların rezervasyonuna dokunulmaz.
+            if evrak.rezervasyon_taslak:
+                await db.stok_rezervasyon_birak(evrak.rezervasyon_taslak)
+            if stok_urunler_listesi:
+                basarili_mesajlar, hata_mesajlari = await db.stok_miktar_azalt_batch(
+                    stok_urunler_listesi, kaynak="is_evraki", kaynak_no=str(evrak.is_emri_no)
+                )
+                stok_mesajlari["basarili"] = basarili_mesajlar
+                stok_mesajlari["hatali"] = hata_mesajlari
         
-        cari_mesaji = _sync_cari_is_evrakindan(
-            evrak.musteri_unvan,
-            evrak.telefon or "",
-            evrak.musteri_email or "",
-            evrak.musteri_adres or "",
-            evrak.tc_kimlik_no or "",
-            evrak.vergi_dairesi or "",
-            evrak.firma_tipi or "Şahıs",
-            evrak.toplam_tutar or 0,
-            evrak.odeme_durumu or "odenmedi",
-        )
+            cari_mesaji = await _sync_cari_is_evrakindan(
+                evrak.musteri_unvan,
+                evrak.telefon or "",
+                evrak.musteri_email or "",
+                evrak.musteri_adres or "",
+                evrak.tc_kimlik_no or "",
+                evrak.vergi_dairesi or "",
+                evrak.firma_tipi or "Şahıs",
+                evrak.toplam_tutar or 0,
+                evrak.odeme_durumu or "odenmedi",
+            )
         
-        # İş evrakını veritabanına kaydet (ürün adı/kodu normalize edilmiş)
-        basarili, hata_mesaji = db.is_evraki_ekle(
-            evrak.is_emri_no, evrak.tarih, evrak.musteri_unvan, evrak.telefon,
-            evrak.arac_plakasi, evrak.cekici_dorse, evrak.marka_model,
-            evrak.talep_edilen_isler, evrak.musteri_sikayeti, evrak.yapilan_is,
-            evrak.baslama_saati, evrak.bitis_saati, kullanilan_urunler_norm,
-            evrak.toplam_tutar, evrak.tc_kimlik_no, evrak.odeme_durumu or "odenmedi"
-        )
+            # İş evrakını veritabanına kaydet (ürün adı/kodu normalize edilmiş)
+            basarili, hata_mesaji = await db.is_evraki_ekle(
+                evrak.is_emri_no, evrak.tarih, evrak.musteri_unvan, evrak.telefon,
+                evrak.arac_plakasi, evrak.cekici_dorse, evrak.marka_model,
+                evrak.talep_edilen_isler, evrak.musteri_sikayeti, evrak.yapilan_is,
+                evrak.baslama_saati, evrak.bitis_saati, kullanilan_urunler_norm,
+                evrak.toplam_tutar, evrak.tc_kimlik_no, evrak.odeme_durumu or "odenmedi"
+            )
         
-        if not basarili:
-            raise HTTPException(status_code=400, detail=f"İş evrakı kaydedilemedi: {hata_mesaji}")
+            if not basarili:
+                raise HTTPException(status_code=400, detail=f"İş evrakı kaydedilemedi: {hata_mesaji}")
         
         # PDF oluştur ve e-posta gönder
         pdf_path = None
@@ -275,7 +300,7 @@ async def is_evraki_guncelle(evrak_id: int, evrak: IsEvrakiUpdate):
         if not evrak.musteri_unvan:
             raise HTTPException(status_code=400, detail="Müşteri ünvanı zorunludur")
         kullanilan_urunler_norm = _normalize_kullanilan_urunler(evrak.kullanilan_urunler or "")
-        basarili, mesaj = db.is_evraki_guncelle(
+        basarili, mesaj = await db.is_evraki_guncelle(
             evrak_id, evrak.is_emri_no, evrak.tarih, evrak.musteri_unvan, evrak.telefon,
             evrak.arac_plakasi, evrak.cekici_dorse, evrak.marka_model,
             evrak.talep_edilen_isler, evrak.musteri_sikayeti, evrak.yapilan_is,
@@ -284,7 +309,7 @@ async def is_evraki_guncelle(evrak_id: int, evrak: IsEvrakiUpdate):
         )
         
         if basarili:
-            cari_mesaji = _sync_cari_is_evrakindan(
+            cari_mesaji = await _sync_cari_is_evrakindan(
                 evrak.musteri_unvan,
                 evrak.telefon or "",
                 evrak.musteri_email or "",
@@ -320,29 +345,31 @@ async def is_evraki_guncelle_ve_gonder(evrak_id: int, evrak: IsEvrakiUpdateWithE
                 urunler = json.loads(kullanilan_urunler_norm)
             except Exception:
                 pass
-        # İş evrakını veritabanında güncelle (ürün adı/kodu normalize edilmiş)
-        basarili, hata_mesaji = db.is_evraki_guncelle(
-            evrak_id, evrak.is_emri_no, evrak.tarih, evrak.musteri_unvan, evrak.telefon,
-            evrak.arac_plakasi, evrak.cekici_dorse, evrak.marka_model,
-            evrak.talep_edilen_isler, evrak.musteri_sikayeti, evrak.yapilan_is,
-            evrak.baslama_saati, evrak.bitis_saati, kullanilan_urunler_norm,
-            evrak.toplam_tutar, evrak.tc_kimlik_no, evrak.odeme_durumu or "odenmedi"
-        )
+        # Evrak güncelleme ve cari senkronizasyonu tek transaction
+        async with db.unit_of_work():
+            # İş evrakını veritabanında güncelle (ürün adı/kodu normalize edilmiş)
+            basarili, hata_mesaji = await db.is_evraki_guncelle(
+                evrak_id, evrak.is_emri_no, evrak.tarih, evrak.musteri_unvan, evrak.telefon,
+                evrak.arac_plakasi, evrak.cekici_dorse, evrak.marka_model,
+                evrak.talep_edilen_isler, evrak.musteri_sikayeti, evrak.yapilan_is,
+                evrak.baslama_saati, evrak.bitis_saati, kullanilan_urunler_norm,
+                evrak.toplam_tutar, evrak.tc_kimlik_no, evrak.odeme_durumu or "odenmedi"
+            )
         
-        if not basarili:
-            raise HTTPException(status_code=400, detail=f"İş evrakı güncellenemedi: {hata_mesaji}")
+            if not basarili:
+                raise HTTPException(status_code=400, detail=f"İş evrakı güncellenemedi: {hata_mesaji}")
         
-        cari_mesaji = _sync_cari_is_evrakindan(
-            evrak.musteri_unvan,
-            evrak.telefon or "",
-            evrak.musteri_email or "",
-            evrak.musteri_adres or "",
-            evrak.tc_kimlik_no or "",
-            evrak.vergi_dairesi or "",
-            evrak.firma_tipi or "Şahıs",
-            evrak.toplam_tutar or 0,
-            evrak.odeme_durumu or "odenmedi",
-        )
+            cari_mesaji = await _sync_cari_is_evrakindan(
+                evrak.musteri_unvan,
+                evrak.telefon or "",
+                evrak.musteri_email or "",
+                evrak.musteri_adres or "",
+                evrak.tc_kimlik_no or "",
+                evrak.vergi_dairesi or "",
+                evrak.firma_tipi or "Şahıs",
+                evrak.toplam_tutar or 0,
+                evrak.odeme_durumu or "odenmedi",
+            )
         
         # PDF oluştur ve e-posta gönder
         pdf_path = None
@@ -413,7 +440,7 @@ async def is_evraki_gonder(evrak_id: int):
     
     try:
         # İş evrakını veritabanından getir
-        evrak = db.is_evraki_getir(evrak_id)
+        evrak = await db.is_evraki_getir(evrak_id)
         if not evrak:
             raise HTTPException(status_code=404, detail="İş evrakı bulunamadı")
         
@@ -432,7 +459,7 @@ async def is_evraki_gonder(evrak_id: int):
         firma_tipi = "Şahıs"
         
         if evrak.get('musteri_unvan'):
-            cari = db.cari_unvan_ile_ara(evrak['musteri_unvan'])
+            cari = await db.cari_unvan_ile_ara(evrak['musteri_unvan'])
             if cari:
                 musteri_email = cari.get('email', '')
                 musteri_adres = cari.get('adres', '')
@@ -477,6 +504,8 @@ async def is_evraki_gonder(evrak_id: int):
                         os.remove(pdf_path)
                 except:
                     pass
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"PDF/e-posta gönderiminde hata: {str(e)}")
         
@@ -499,11 +528,18 @@ async def is_evraki_gonder(evrak_id: int):
 async def is_evraki_sil(evrak_id: int):
     """Delete a work order"""
     try:
-        basarili, mesaj = db.is_evraki_sil(evrak_id)
-        if basarili:
-            return {"success": True, "message": mesaj}
-        else:
-            raise HTTPException(status_code=404, detail=mesaj)
+        evrak = await db.is_evraki_getir(evrak_id)
+        if not evrak:
+            raise HTTPException(status_code=404, detail="İş evrakı bulunamadı")
+        # Evrak silinirken düştüğü stok ters hareketle geri eklenir (tek transaction)
+        async with db.unit_of_work():
+            basarili, mesaj = await db.is_evraki_sil(evrak_id)
+            if not basarili:
+                raise HTTPException(status_code=404, detail=mesaj)
+            await db.stok_hareket_geri_al(
+                "is_evraki", str(evrak["is_emri_no"]), "is_evraki_iptal", f"İş evrakı silindi (#{evrak_id})"
+            )
+        return {"success": True, "message": mesaj}
     except HTTPException:
         raise
     except Exception as e:
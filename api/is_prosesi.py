@@ -2,23 +2,41 @@
 İş Prosesi API endpoints
 """
 from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
 from models import IsProsesiCreate, IsProsesiUpdate, IsProsesiMaddeCreate, IsProsesiMaddeUpdate
-from db_instance import db
+from db_instance import async_db as db
+from api.akis import SayfaParametreleri, sayfa_yaniti, sayfalama_hatasi
+from app.sayfalama import SayfalamaHatasi
 from api.auth import get_current_user, require_can_write_module, require_not_sofor
 
 router = APIRouter(prefix="/api/is-prosesi", tags=["is-prosesi"], dependencies=[Depends(get_current_user), Depends(require_not_sofor)])
 
 
 @router.get("")
-async def is_prosesi_listele():
-    """List all work processes"""
+async def is_prosesi_listele(
+    arama: Optional[str] = "",
+    proses_tipi: Optional[str] = "",
+    sayfa: SayfaParametreleri = Depends(),
+):
+    """List all work processes (arama: proses adı; limit/cursor ile sayfalı)"""
     try:
-        prosesler = db.is_prosesi_listele()
+        if sayfa.sayfali:
+            sonuc = await db.is_prosesi_sayfa(arama or "", proses_tipi or "", **sayfa.sayfa_argumanlari())
+            prosesler = sonuc["data"]
+        else:
+            sonuc = None
+            prosesler = await db.is_prosesi_listele(arama or "", proses_tipi or "", sirala=sayfa.sirala, fields=sayfa.fields)
         # Her proses için maddeleri de getir
         for proses in prosesler:
-            maddeler = db.is_prosesi_maddeleri_getir(proses['id'])
+            maddeler = await db.is_prosesi_maddeleri_getir(proses['id'])
             proses['maddeler'] = maddeler
+        if sonuc is not None:
+            return sayfa_yaniti(sonuc)
         return {"success": True, "data": prosesler, "count": len(prosesler)}
+    except SayfalamaHatasi as e:
+        raise sayfalama_hatasi(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -27,12 +45,12 @@ async def is_prosesi_listele():
 async def is_prosesi_getir(proses_id: int):
     """Get a specific work process by ID"""
     try:
-        proses = db.is_prosesi_getir(proses_id)
+        proses = await db.is_prosesi_getir(proses_id)
         if not proses:
             raise HTTPException(status_code=404, detail="İş prosesi bulunamadı")
         
         # Maddeleri de getir
-        maddeler = db.is_prosesi_maddeleri_getir(proses_id)
+        maddeler = await db.is_prosesi_maddeleri_getir(proses_id)
         proses['maddeler'] = maddeler
         
         return {"success": True, "data": proses}
@@ -46,7 +64,7 @@ async def is_prosesi_getir(proses_id: int):
 async def is_prosesi_ekle(proses: IsProsesiCreate):
     """Create a new work process"""
     try:
-        success, message, proses_id = db.is_prosesi_ekle(
+        success, message, proses_id = await db.is_prosesi_ekle(
             proses_adi=proses.proses_adi,
             aciklama=proses.aciklama or "",
             proses_tipi=proses.proses_tipi or None
@@ -57,19 +75,20 @@ async def is_prosesi_ekle(proses: IsProsesiCreate):
         
         # Maddeleri ekle
         if proses.maddeler and proses_id:
-            for madde in proses.maddeler:
-                db.is_prosesi_madde_ekle(
-                    proses_id=proses_id,
-                    sira_no=madde.sira_no,
-                    madde_adi=madde.madde_adi,
-                    aciklama=madde.aciklama or "",
-                    kullanilan_malzemeler=madde.kullanilan_malzemeler or ""
-                )
+            await db.is_prosesi_madde_ekle_bulk(proses_id, [
+                {
+                    "sira_no": madde.sira_no,
+                    "madde_adi": madde.madde_adi,
+                    "aciklama": madde.aciklama or "",
+                    "kullanilan_malzemeler": madde.kullanilan_malzemeler or "",
+                }
+                for madde in proses.maddeler
+            ])
         
         # Oluşturulan prosesi getir
-        yeni_proses = db.is_prosesi_getir(proses_id)
+        yeni_proses = await db.is_prosesi_getir(proses_id)
         if yeni_proses:
-            maddeler = db.is_prosesi_maddeleri_getir(proses_id)
+            maddeler = await db.is_prosesi_maddeleri_getir(proses_id)
             yeni_proses['maddeler'] = maddeler
         
         return {"success": True, "message": message, "data": yeni_proses}
@@ -83,7 +102,7 @@ async def is_prosesi_ekle(proses: IsProsesiCreate):
 async def is_prosesi_guncelle(proses_id: int, proses: IsProsesiUpdate):
     """Update a work process"""
     try:
-        success, message = db.is_prosesi_guncelle(
+        success, message = await db.is_prosesi_guncelle(
             proses_id=proses_id,
             proses_adi=proses.proses_adi,
             aciklama=proses.aciklama or "",
@@ -94,9 +113,9 @@ async def is_prosesi_guncelle(proses_id: int, proses: IsProsesiUpdate):
             raise HTTPException(status_code=400, detail=message)
         
         # Güncellenmiş prosesi getir
-        guncellenmis_proses = db.is_prosesi_getir(proses_id)
+        guncellenmis_proses = await db.is_prosesi_getir(proses_id)
         if guncellenmis_proses:
-            maddeler = db.is_prosesi_maddeleri_getir(proses_id)
+            maddeler = await db.is_prosesi_maddeleri_getir(proses_id)
             guncellenmis_proses['maddeler'] = maddeler
         
         return {"success": True, "message": message, "data": guncellenmis_proses}
@@ -110,7 +129,7 @@ async def is_prosesi_guncelle(proses_id: int, proses: IsProsesiUpdate):
 async def is_prosesi_sil(proses_id: int):
     """Delete a work process"""
     try:
-        success, message = db.is_prosesi_sil(proses_id)
+        success, message = await db.is_prosesi_sil(proses_id)
         
         if not success:
             raise HTTPException(status_code=400, detail=message)
@@ -129,8 +148,10 @@ async def is_prosesi_sil(proses_id: int):
 async def is_prosesi_maddeleri_getir(proses_id: int):
     """Get all items for a work process"""
     try:
-        maddeler = db.is_prosesi_maddeleri_getir(proses_id)
+        maddeler = await db.is_prosesi_maddeleri_getir(proses_id)
         return {"success": True, "data": maddeler, "count": len(maddeler)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -139,7 +160,7 @@ async def is_prosesi_maddeleri_getir(proses_id: int):
 async def is_prosesi_madde_ekle(proses_id: int, madde: IsProsesiMaddeCreate):
     """Add a new item to a work process"""
     try:
-        success, message, madde_id = db.is_prosesi_madde_ekle(
+        success, message, madde_id = await db.is_prosesi_madde_ekle(
             proses_id=proses_id,
             sira_no=madde.sira_no,
             madde_adi=madde.madde_adi,
@@ -161,7 +182,7 @@ async def is_prosesi_madde_ekle(proses_id: int, madde: IsProsesiMaddeCreate):
 async def is_prosesi_madde_guncelle(madde_id: int, madde: IsProsesiMaddeUpdate):
     """Update a work process item"""
     try:
-        success, message = db.is_prosesi_madde_guncelle(
+        success, message = await db.is_prosesi_madde_guncelle(
             madde_id=madde_id,
             sira_no=madde.sira_no,
             madde_adi=madde.madde_adi,
@@ -184,7 +205,7 @@ async def is_prosesi_madde_guncelle(madde_id: int, madde: IsProsesiMaddeUpdate):
 async def is_prosesi_madde_sil(madde_id: int):
     """Delete a work process item"""
     try:
-        success, message = db.is_prosesi_madde_sil(madde_id)
+        success, message = await db.is_prosesi_madde_sil(madde_id)
         
         if not success:
             raise HTTPException(status_code=400, detail=message)
@@ -200,7 +221,7 @@ async def is_prosesi_madde_sil(madde_id: int):
 async def is_prosesi_madde_tamamla(madde_id: int, tamamlandi: bool = True):
     """Mark a work process item as completed or not"""
     try:
-        success, message = db.is_prosesi_tamamla_madde(madde_id, tamamlandi)
+        success, message = await db.is_prosesi_tamamla_madde(madde_id, tamamlandi)
         
         if not success:
             raise HTTPException(status_code=400, detail=message)
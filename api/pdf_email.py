@@ -13,6 +13,7 @@ from email.mime.text import MIMEText
 from email import encoders
 from email.policy import SMTP as SMTPPolicy
 from models import IsEvrakiCreateWithEmail
+from app.executor import SinirliExecutor, ExecutorDolu
 
 # Environment variable'ları yükle
 from dotenv import load_dotenv
@@ -32,6 +33,25 @@ except ImportError:
         from datetime import timedelta, timezone
         TURKIYE_TIMEZONE = timezone(timedelta(hours=3))
 
+# html2pdf.app ve Gmail çağrıları olay döngüsünü bloklamasın; DB havuzundan ayrı, sınırlı havuzda çalışır
+harici_executor = SinirliExecutor(
+    "harici",
+    max_workers=int(os.getenv("HARICI_WORKERS", "4")),
+    max_kuyruk=int(os.getenv("HARICI_MAX_KUYRUK", "20")),
+)
+
+
+def _html2pdf_indir(html_content: str, api_key: str, dosya_yolu: str, timeout: int) -> None:
+    """html2pdf.app ile PDF üretip dosyaya yazar (bloklayan çağrı - harici_executor içinde çalışır)."""
+    import requests
+
+    api_url = "https://api.html2pdf.app/v1/generate"
+    payload = {"html": html_content, "apiKey": api_key, "format": "A4", "landscape": False}
+    response = requests.post(api_url, json=payload, timeout=timeout)
+    response.raise_for_status()
+    with open(dosya_yolu, 'wb') as f:
+        f.write(response.content)
+
 
 def _send_email_gmail(
     to_addrs: Union[str, List[str]],
@@ -101,8 +121,6 @@ def _send_email_gmail(
 async def pdf_olustur_api(evrak: IsEvrakiCreateWithEmail, urunler: List[Dict]) -> Optional[str]:
     """HTML'den PDF oluştur - html2pdf.app API kullanarak"""
     try:
-        import requests
-        
         is_emri_no = str(evrak.is_emri_no)
         plaka = (evrak.arac_plakasi or "").strip().replace(" ", "_")
         musteri_unvan = evrak.musteri_unvan.strip()
@@ -352,17 +370,12 @@ h2 {{
 </body>
 </html>'''
         
-        api_url = "https://api.html2pdf.app/v1/generate"
-        payload = {"html": html_content, "apiKey": api_key, "format": "A4", "landscape": False}
-        
-        response = requests.post(api_url, json=payload, timeout=30)
-        response.raise_for_status()
-        
-        with open(dosya_yolu, 'wb') as f:
-            f.write(response.content)
+        await harici_executor.run("html2pdf.is_evraki", _html2pdf_indir, html_content, api_key, dosya_yolu, 30)
         
         return dosya_yolu
         
+    except ExecutorDolu:
+        raise
     except Exception as e:
         raise Exception(f"PDF oluşturma hatası: {str(e)}")
 
@@ -376,7 +389,6 @@ async def aylik_rapor_pdf_olustur(ay: int, yil: int, musteri_sayisi: int, ciro:
                                    urun_detaylari: list) -> Optional[str]:
     """Aylık iş evrakları özet raporu PDF oluştur (html2pdf.app). urun_detaylari: [{'urun_adi','urun_kodu','toplam_adet','toplam_tutar'}]"""
     try:
-        import requests
         ay_adi = _AYLAR[ay - 1] if 1 <= ay <= 12 else str(ay)
         baslik = f"İş Evrakları Aylık Rapor - {ay_adi} {yil}"
         # E-posta eki için ASCII dosya adı (Türkçe karakter "noname" hatası önlenir)
@@ -424,13 +436,10 @@ h1 {{ color: #1f538d; text-align: center; font-size: 18px; margin-bottom: 16px;
         api_key = os.getenv("PDF_API_KEY", "")
         if not api_key:
             raise Exception("PDF_API_KEY environment variable tanımlı değil")
-        api_url = "https://api.html2pdf.app/v1/generate"
-        payload = {"html": html_content, "apiKey": api_key, "format": "A4", "landscape": False}
-        response = requests.post(api_url, json=payload, timeout=60)
-        response.raise_for_status()
-        with open(dosya_yolu, 'wb') as f:
-            f.write(response.content)
+        await harici_executor.run("html2pdf.aylik_rapor", _html2pdf_indir, html_content, api_key, dosya_yolu, 60)
         return dosya_yolu
+    except ExecutorDolu:
+        raise
     except Exception as e:
         raise Exception(f"Aylık rapor PDF oluşturma hatası: {str(e)}")
 
@@ -444,7 +453,9 @@ async def rapor_email_gonder(pdf_dosyasi: str, ay: int, yil: int) -> bool:
         ay_adi = _AYLAR[ay - 1] if 1 <= ay <= 12 else str(ay)
         subject = f"Aylık İş Evrakları Raporu - {ay_adi} {yil}"
         body_text = f"{ay_adi} {yil} dönemine ait iş evrakları özet raporu ekteki PDF dosyasında yer almaktadır."
-        _send_email_gmail(
+        await harici_executor.run(
+            "gmail.aylik_rapor",
+            _send_email_gmail,
             email_to,
             subject,
             body_text,
@@ -452,6 +463,8 @@ async def rapor_email_gonder(pdf_dosyasi: str, ay: int, yil: int) -> bool:
             attachment_filename=f"Aylik_Rapor_{yil}-{ay:02d}.pdf",
         )
         return True
+    except ExecutorDolu:
+        raise
     except Exception as e:
         raise Exception(f"Aylık rapor e-posta gönderme hatası: {str(e)}")
 
@@ -465,7 +478,9 @@ async def email_gonder_api(evrak: IsEvrakiCreateWithEmail, pdf_dosyasi: str) ->
         subject = f"Servis İş Emri - {evrak.arac_plakasi or 'N/A'} - {evrak.musteri_unvan}"
         turkiye_now = datetime.now(TURKIYE_TIMEZONE)
         body_text = f"{turkiye_now.strftime('%d.%m.%Y')} tarihine ait iş emri PDF olarak ekte gönderilmiştir."
-        _send_email_gmail(email_to, subject, body_text, attachment_path=pdf_dosyasi)
+        await harici_executor.run("gmail.is_evraki", _send_email_gmail, email_to, subject, body_text, attachment_path=pdf_dosyasi)
         return True
+    except ExecutorDolu:
+        raise
     except Exception as e:
         raise Exception(f"E-posta gönderme hatası (Gmail API): {str(e)}")
@@ -0,0 +1,66 @@
+"""
+Sistem izleme API (sadece admin)
+Veritabanı bağlantı havuzu, thread havuzu (executor) durumu ve sorgu metrikleri
+"""
+from fastapi import APIRouter, HTTPException, Depends
+
+# İzleme çağrıları executor'dan geçmez (havuz doluyken de yanıt verebilmeli); hepsi bellek içi okuma
+from db_instance import db
+from app.db_metrik import db_metrikleri, db_metriklerini_sifirla
+from app.executor import executor_istatistikleri
+from app.sorgu_butcesi import butce_ihlalleri, butce_ihlallerini_sifirla
+from api.auth import get_current_user, require_admin
+
+router = APIRouter(
+    prefix="/api/sistem",
+    tags=["sistem"],
+    dependencies=[Depends(get_current_user), Depends(require_admin)],
+)
+
+
+@router.get("/db-havuz")
+async def db_havuz_durumu():
+    """Bağlantı havuzu istatistikleri: açık/boşta/kullanımda bağlantı, bekleme süresi, zaman aşımı sayısı."""
+    try:
+        return {"success": True, "data": db.pool_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/executor")
+async def executor_durumu():
+    """Thread havuzları: çalışan/kuyruktaki iş, reddedilen (503) sayısı, çağrı yeri bazında bekleme ve çalışma süreleri."""
+    try:
+        return {"success": True, "data": executor_istatistikleri()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/db-metrik")
+async def db_metrik_durumu():
+    """
+    Metod bazında (örn. CariDB.cari_ekle_tc_kontrolu_ile) histogramlar: süre, bağlantı alma süresi,
+    sorgu sayısı, dönen satır, okunan bayt; eşiği (DB_YAVAS_SORGU_MS) aşan sorgu sayısı.
+    butce_ihlalleri: istek başına sorgu bütçesini aşan / N+1 görülen rotalar (app/sorgu_butcesi.py).
+    katalog: ürün kataloğu önbelleği isabet / ıska / boşaltma sayıları (app/katalog.py).
+    oneri: ürün önerisi index'i boyutu, tam / artımlı yükleme sayıları (app/oneri.py).
+    """
+    try:
+        data = db_metrikleri()
+        data["butce_ihlalleri"] = butce_ihlalleri()
+        data["katalog"] = db.stok.katalog.istatistik()
+        data["oneri"] = db.stok.oneri.istatistik()
+        return {"success": True, "data": data}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/db-metrik")
+async def db_metrik_sifirla():
+    """Sorgu metriklerini ve bütçe ihlal sayaçlarını sıfırla (örn. bir yük testinden önce)"""
+    try:
+        db_metriklerini_sifirla()
+        butce_ihlallerini_sifirla()
+        return {"success": True, "message": "Sorgu metrikleri sıfırlandı"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -5,18 +5,30 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 
 from models import SoforCreate, SoforUpdate
-from db_instance import db
+from db_instance import async_db as db
+from api.akis import SayfaParametreleri, sayfa_yaniti, sayfalama_hatasi
+from app.sayfalama import SayfalamaHatasi
 from api.auth import get_current_user, require_can_write_module, require_not_sofor
 
 router = APIRouter(prefix="/api/sofor", tags=["sofor"], dependencies=[Depends(get_current_user), Depends(require_not_sofor)])
 
 
 @router.get("")
-async def sofor_listele(arama: Optional[str] = "", durum: Optional[str] = None):
-    """Şoför listesi (arama: ad, TC, telefon, SRC no; durum filtresi)."""
+async def sofor_listele(
+    arama: Optional[str] = "",
+    durum: Optional[str] = None,
+    sayfa: SayfaParametreleri = Depends(),
+):
+    """Şoför listesi (arama: ad, TC, telefon, SRC no; durum filtresi). limit/cursor ile sayfalı."""
     try:
-        liste = db.sofor_listele(arama=arama or "", durum=durum)
+        if sayfa.sayfali:
+            return sayfa_yaniti(await db.sofor_sayfa(arama=arama or "", durum=durum, **sayfa.sayfa_argumanlari()))
+        liste = await db.sofor_listele(arama=arama or "", durum=durum, sirala=sayfa.sirala, fields=sayfa.fields)
         return {"success": True, "data": liste, "count": len(liste)}
+    except SayfalamaHatasi as e:
+        raise sayfalama_hatasi(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -25,7 +37,7 @@ async def sofor_listele(arama: Optional[str] = "", durum: Optional[str] = None):
 async def sofor_getir(sofor_id: int):
     """Tek şoför detayı."""
     try:
-        row = db.sofor_getir(sofor_id)
+        row = await db.sofor_getir(sofor_id)
         if not row:
             raise HTTPException(status_code=404, detail="Şoför bulunamadı")
         return {"success": True, "data": row}
@@ -39,7 +51,7 @@ async def sofor_getir(sofor_id: int):
 async def sofor_ekle(body: SoforCreate):
     """Yeni şoför ekler (yalnızca admin)."""
     try:
-        ok, msg = db.sofor_ekle(
+        ok, msg = await db.sofor_ekle(
             ad_soyad=body.ad_soyad,
             tc_kimlik_no=body.tc_kimlik_no,
             telefon=body.telefon,
@@ -67,11 +79,11 @@ async def sofor_ekle(body: SoforCreate):
 @router.put("/{sofor_id}", dependencies=[Depends(require_can_write_module("sofor"))])
 async def sofor_guncelle(sofor_id: int, body: SoforUpdate):
     """Şoför günceller (yalnızca admin)."""
-    mevcut = db.sofor_getir(sofor_id)
+    mevcut = await db.sofor_getir(sofor_id)
     if not mevcut:
         raise HTTPException(status_code=404, detail="Şoför bulunamadı")
     try:
-        ok, msg = db.sofor_guncelle(
+        ok, msg = await db.sofor_guncelle(
             sofor_id=sofor_id,
             ad_soyad=body.ad_soyad,
             tc_kimlik_no=body.tc_kimlik_no,
@@ -100,11 +112,11 @@ async def sofor_guncelle(sofor_id: int, body: SoforUpdate):
 @router.delete("/{sofor_id}", dependencies=[Depends(require_can_write_module("sofor"))])
 async def sofor_sil(sofor_id: int):
     """Şoför siler (yalnızca admin)."""
-    mevcut = db.sofor_getir(sofor_id)
+    mevcut = await db.sofor_getir(sofor_id)
     if not mevcut:
         raise HTTPException(status_code=404, detail="Şoför bulunamadı")
     try:
-        ok = db.sofor_sil(sofor_id)
+        ok = await db.sofor_sil(sofor_id)
         if ok:
             return {"success": True, "message": "Şoför silindi"}
         raise HTTPException(status_code=500, detail="Silme işlemi başarısız")
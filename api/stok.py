@@ -1,23 +1,197 @@
 """
 Stok (Stock) API endpoints
 """
+import re
+
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from models import (
-    StokCreate, StokUpdate, StokMiktarAzalt, StokMiktarAzaltBatch
+    StokCreate, StokUpdate, StokMiktarAzalt, StokMiktarAzaltBatch, StokBulkUpsert, StokRezervasyon
 )
-from db_instance import db
-from api.auth import get_current_user, require_can_write_module, require_not_sofor
+from db_instance import async_db as db
+from api.akis import SayfaParametreleri, json_akis_yaniti, sayfa_yaniti, sayfalama_hatasi
+from app.sayfalama import SayfalamaHatasi
+from api.auth import get_current_user, require_admin, require_can_write_module, require_not_sofor
+
+# StokDB.stok_rezerve_et'in ürettiği taslak anahtarı (secrets.token_hex(16))
+_TASLAK_ANAHTARI = re.compile(r"[0-9a-f]{32}")
 
 router = APIRouter(prefix="/api/stok", tags=["stok"], dependencies=[Depends(get_current_user), Depends(require_not_sofor)])
 
 
 @router.get("")
-async def stok_listele(arama: Optional[str] = ""):
-    """List all stock items with optional search"""
+async def stok_listele(arama: Optional[str] = "", sayfa: SayfaParametreleri = Depends()):
+    """List all stock items with optional search (limit/cursor ile sayfalı)"""
+    try:
+        if sayfa.sayfali:
+            return sayfa_yaniti(await db.stok_sayfa(arama, **sayfa.sayfa_argumanlari()))
+        return await json_akis_yaniti(db.akis(db.sync.stok_akis, arama, sirala=sayfa.sirala, fields=sayfa.fields))
+    except SayfalamaHatasi as e:
+        raise sayfalama_hatasi(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ara")
+async def stok_ara(q: str = "", limit: int = 20):
+    """Ürün kodu / adı / markasında sıralı arama (Türkçe harf ve aksan duyarsız)"""
     try:
-        urunler = db.stok_listele(arama)
+        urunler = await db.stok_ara(q, limit)
         return {"success": True, "data": urunler, "count": len(urunler)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/suggest")
+async def stok_oner(q: str = "", limit: int = 10):
+    """Yazarken ürün önerisi: kodu / adı / markası q ile başlayan ürünler (id, kod, ad, marka, birim)"""
+    try:
+        oneriler = await db.stok_oner(q, limit)
+        return {"success": True, "data": oneriler, "count": len(oneriler)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analiz")
+async def stok_analiz(kritik_limit: int = 100):
+    """Toplam stok değeri, marka / birim kırılımı ve kritik stok eşiğindeki ürünler (SQL toplamları, önbellekli)"""
+    try:
+        return {"success": True, "data": await db.stok_analiz(kritik_limit)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/bakiye-kontrol", dependencies=[Depends(require_admin)])
+async def stok_bakiye_kontrol():
+    """Stok miktarı hareket defteri toplamından farklı olan ürünler (admin)"""
+    try:
+        farklar = await db.stok_bakiye_dogrula()
+        return {"success": True, "data": farklar, "count": len(farklar)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bakiye-kontrol/duzelt", dependencies=[Depends(require_admin)])
+async def stok_bakiye_duzelt():
+    """Farklı ürünlerin stok miktarını hareket defterinden yeniden hesapla (admin)"""
+    try:
+        farklar = await db.stok_bakiye_dogrula(duzelt=True)
+        return {"success": True, "message": f"{len(farklar)} ürünün stok miktarı düzeltildi", "data": farklar}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/siparis-onerileri")
+async def stok_siparis_onerileri(urun_kodu: Optional[str] = None, hepsi: bool = False, limit: int = 100):
+    """
+    İş evrakı tüketiminden talep tahmini ve önerilen sipariş miktarı (gece hesaplanır).
+    hepsi=false: yalnızca sipariş önerilen ürünler.
+    """
+    try:
+        oneriler = await db.stok_siparis_onerileri(urun_kodu, hepsi, limit)
+        return {"success": True, "data": oneriler, "count": len(oneriler)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/siparis-onerileri/yenile", dependencies=[Depends(require_admin)])
+async def stok_tahmin_yenile():
+    """Talep tahminini hemen yeniden hesapla (admin; normalde her gece)"""
+    try:
+        urun_sayisi = await db.stok_tahmin_yenile(zorla=True)
+        return {"success": True, "message": f"{urun_sayisi} ürün için tahmin hesaplandı"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _taslak_dogrula(taslak: str) -> None:
+    """Taslak anahtarı sunucunun ürettiği biçimde olmalı (istemcinin seçtiği anahtar başka taslakla çakışabilir)"""
+    if not _TASLAK_ANAHTARI.fullmatch(taslak):
+        raise HTTPException(status_code=400, detail="Geçersiz taslak anahtarı")
+
+
+def _rezervasyon_yaniti(taslak: str, basarili_mesajlar: list, hata_mesajlari: list) -> dict:
+    return {
+        "success": len(hata_mesajlari) == 0,
+        "taslak": taslak,
+        "basarili_mesajlar": basarili_mesajlar,
+        "hata_mesajlari": hata_mesajlari
+    }
+
+
+@router.post("/rezervasyon", dependencies=[Depends(require_can_write_module("is_evraki"))])
+async def stok_rezervasyon_olustur(request: StokRezervasyon):
+    """Yeni taslak için rezervasyon; yanıttaki taslak anahtarı sonraki güncelleme / bırakma / kayıtta gönderilir"""
+    try:
+        return _rezervasyon_yaniti(*await db.stok_rezerve_et(None, request.urunler, request.evrak_no, request.sure_dakika))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/rezervasyon/{taslak}")
+async def stok_rezervasyon_listele(taslak: str):
+    """Taslağın stok rezervasyonları (ürünün kullanılabilir miktarıyla)"""
+    try:
+        _taslak_dogrula(taslak)
+        rezervasyonlar = await db.stok_rezervasyon_listele(taslak)
+        return {"success": True, "data": rezervasyonlar, "count": len(rezervasyonlar)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/rezervasyon/{taslak}", dependencies=[Depends(require_can_write_module("is_evraki"))])
+async def stok_rezerve_et(taslak: str, request: StokRezervasyon):
+    """Taslağın ürünlerini rezerve et (taslağın önceki rezervasyonlarının yerine geçer)"""
+    try:
+        _taslak_dogrula(taslak)
+        return _rezervasyon_yaniti(*await db.stok_rezerve_et(taslak, request.urunler, request.evrak_no, request.sure_dakika))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/rezervasyon/{taslak}", dependencies=[Depends(require_can_write_module("is_evraki"))])
+async def stok_rezervasyon_birak(taslak: str):
+    """Taslağın rezervasyonlarını bırak"""
+    try:
+        _taslak_dogrula(taslak)
+        birakilan = await db.stok_rezervasyon_birak(taslak)
+        return {"success": True, "message": f"{birakilan} rezervasyon bırakıldı"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/rezervasyon/temizle", dependencies=[Depends(require_admin)])
+async def stok_rezervasyon_temizle():
+    """Süresi dolan rezervasyonları hemen bırak (admin; normalde zamanlanmış görev yapar)"""
+    try:
+        silinen = await db.stok_rezervasyon_temizle()
+        return {"success": True, "message": f"{silinen} rezervasyon bırakıldı"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -26,7 +200,7 @@ async def stok_listele(arama: Optional[str] = ""):
 async def stok_getir(stok_id: int):
     """Get a specific stock item by ID"""
     try:
-        urun = db.stok_getir(stok_id)
+        urun = await db.stok_getir(stok_id)
         if not urun:
             raise HTTPException(status_code=404, detail="Ürün bulunamadı")
         return {"success": True, "data": urun}
@@ -42,9 +216,9 @@ async def stok_ekle(stok: StokCreate):
     try:
         if not stok.urun_adi:
             raise HTTPException(status_code=400, detail="Ürün adı zorunludur")
-        result = db.stok_ekle(
+        result = await db.stok_ekle(
             stok.urun_kodu, stok.urun_adi, stok.marka, stok.birim,
-            stok.stok_miktari, stok.birim_fiyat, stok.aciklama
+            stok.stok_miktari, stok.birim_fiyat, stok.aciklama, stok.kritik_stok
         )
         
         if result:
@@ -63,15 +237,31 @@ async def stok_guncelle(stok_id: int, stok: StokUpdate):
     try:
         if not stok.urun_adi:
             raise HTTPException(status_code=400, detail="Ürün adı zorunludur")
-        result = db.stok_guncelle(
+        result = await db.stok_guncelle(
             stok_id, stok.urun_kodu, stok.urun_adi, stok.marka, stok.birim,
-            stok.stok_miktari, stok.birim_fiyat, stok.aciklama
+            stok.stok_miktari, stok.birim_fiyat, stok.aciklama, stok.kritik_stok
         )
         
         if result:
             return {"success": True, "message": "Ürün başarıyla güncellendi"}
         else:
-            raise HTTPException(status_code=400, detail="Güncelleme başarısız")
+            raise HTTPException(status_code=400, detail="Ürün kodu zaten kullanılıyor")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{stok_id}/hareketler")
+async def stok_hareketleri(stok_id: int, baslangic: Optional[str] = None, bitis: Optional[str] = None, limit: int = 100):
+    """Ürünün stok hareketleri (yeniden eskiye). baslangic / bitis: YYYY-MM-DD"""
+    try:
+        hareketler = await db.stok_hareket_listele(stok_id, baslangic, bitis, limit)
+        if not hareketler and not await db.stok_getir(stok_id):
+            raise HTTPException(status_code=404, detail="Ürün bulunamadı")
+        return {"success": True, "data": hareketler, "count": len(hareketler)}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Tarih formatı YYYY-MM-DD olmalı")
     except HTTPException:
         raise
     except Exception as e:
@@ -82,7 +272,7 @@ async def stok_guncelle(stok_id: int, stok: StokUpdate):
 async def stok_sil(stok_id: int):
     """Delete a stock item"""
     try:
-        result = db.stok_sil(stok_id)
+        result = await db.stok_sil(stok_id)
         if result:
             return {"success": True, "message": "Ürün başarıyla silindi"}
         else:
@@ -97,7 +287,7 @@ async def stok_sil(stok_id: int):
 async def stok_urun_adi_ile_ara(urun_adi: str):
     """Search stock by product name"""
     try:
-        urun = db.stok_urun_adi_ile_ara(urun_adi)
+        urun = await db.stok_urun_adi_ile_ara(urun_adi)
         if not urun:
             raise HTTPException(status_code=404, detail="Ürün bulunamadı")
         return {"success": True, "data": urun}
@@ -111,7 +301,7 @@ async def stok_urun_adi_ile_ara(urun_adi: str):
 async def stok_urun_kodu_ile_ara(urun_kodu: str):
     """Search stock by product code"""
     try:
-        urun = db.stok_urun_kodu_ile_ara(urun_kodu)
+        urun = await db.stok_urun_kodu_ile_ara(urun_kodu)
         if not urun:
             raise HTTPException(status_code=404, detail="Ürün bulunamadı")
         return {"success": True, "data": urun}
@@ -125,7 +315,7 @@ async def stok_urun_kodu_ile_ara(urun_kodu: str):
 async def stok_miktar_azalt(request: StokMiktarAzalt):
     """Reduce stock quantity by product code"""
     try:
-        basarili, mesaj = db.stok_miktar_azalt(request.urun_kodu, request.miktar)
+        basarili, mesaj = await db.stok_miktar_azalt(request.urun_kodu, request.miktar)
         if basarili:
             return {"success": True, "message": mesaj}
         else:
@@ -140,11 +330,36 @@ async def stok_miktar_azalt(request: StokMiktarAzalt):
 async def stok_miktar_azalt_batch(request: StokMiktarAzaltBatch):
     """Reduce stock quantities for multiple products"""
     try:
-        basarili_mesajlar, hata_mesajlari = db.stok_miktar_azalt_batch(request.urunler)
+        basarili_mesajlar, hata_mesajlari = await db.stok_miktar_azalt_batch(request.urunler)
         return {
             "success": len(hata_mesajlari) == 0,
             "basarili_mesajlar": basarili_mesajlar,
             "hata_mesajlari": hata_mesajlari
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bulk-upsert", dependencies=[Depends(require_can_write_module("stok"))])
+async def stok_bulk_upsert(request: StokBulkUpsert):
+    """
+    Ürün koduna göre toplu ekle / güncelle (tedarikçi teslimatı, fiyat listesi).
+    mod: miktar_ayarla | miktar_ekle | fiyat. sonuclar girdiyle aynı sırada [durum, değer]:
+    ["eklendi" | "guncellendi", yeni miktar / fiyat] veya ["hata", mesaj].
+    """
+    try:
+        sonuclar = await db.stok_upsert_bulk(
+            [dict(urun) for urun in request.urunler], request.mod, request.kaynak_no
+        )
+        ozet = {"eklendi": 0, "guncellendi": 0, "hata": 0}
+        for durum, _ in sonuclar:
+            ozet[durum] += 1
+        return {"success": ozet["hata"] == 0, "ozet": ozet, "sonuclar": sonuclar}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
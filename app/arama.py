@@ -0,0 +1,109 @@
+"""
+Stok arama index'i - Türkçe katlamalı trigram
+`LIKE '%x%'` index kullanamaz; bunun yerine her ürünün katlanmış arama metni (stok.arama_metni) ve
+bu metnin 3 karakterlik parçaları (stok_arama tablosu, PK: trigram + stok_id) tutulur.
+
+Katlama: küçük harf, İ/I/ı -> i, ş -> s, ğ -> g, ü -> u, ö -> o, ç -> c (diğer aksanlar da atılır),
+boşluklar tek boşluğa indirilir. Böylece "KAPI", "kapı" ve "Kapi" aynı metne katlanır.
+arama_metni = katla(urun_kodu) TAB katla(urun_adi) TAB katla(marka); trigramlar alan içinden üretilir.
+
+Arama (app/db_stok.py): katlanmış sorgunun tüm trigramlarını içeren ürünler index'ten bulunur,
+sonra `arama_metni LIKE '%sorgu%'` ile yalnızca bu adaylar üzerinde alt dize eşleşmesi doğrulanır.
+3 karakterden kısa sorgularda trigram yoktur; yalnızca katlanmış metin taranır.
+"""
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .db_dialect import cursor_dialect
+
+AYRAC = "\t"
+LIKE_KACIS = "!"
+
+_BOSLUK = re.compile(r"\s+")
+
+
+def katla(metin: Optional[str]) -> str:
+    """Türkçe büyük/küçük harf ve aksan katlama"""
+    if not metin:
+        return ""
+    # "İ".lower() -> "i" + birleşik nokta; NFKD sonrası birleşik işaretler atılır
+    metin = unicodedata.normalize("NFKD", str(metin).lower().replace("ı", "i"))
+    metin = "".join(c for c in metin if not unicodedata.combining(c))
+    return _BOSLUK.sub(" ", metin).strip()
+
+
+def arama_metni(urun_kodu: Optional[str], urun_adi: Optional[str], marka: Optional[str]) -> str:
+    """stok.arama_metni kolonunun değeri"""
+    return AYRAC.join((katla(urun_kodu), katla(urun_adi), katla(marka)))
+
+
+def trigramlar(katli: str) -> Set[str]:
+    """Katlanmış metnin trigramları (alanlar arası parça üretilmez)"""
+    parcalar = set()
+    for alan in katli.split(AYRAC):
+        for i in range(len(alan) - 2):
+            parcalar.add(alan[i:i + 3])
+    return parcalar
+
+
+def like_deseni(katli: str, once: str = "%", sonra: str = "%") -> str:
+    """Katlanmış sorguyu LIKE deseni yap (%, _ ve kaçış karakteri kaçırılır; ESCAPE '!' ile kullanılır)"""
+    for karakter in (LIKE_KACIS, "%", "_"):
+        katli = katli.replace(karakter, LIKE_KACIS + karakter)
+    return once + katli + sonra
+
+
+def trigram_yaz(cursor, urunler: Iterable[Tuple[int, str]], sil: bool = True) -> int:
+    """
+    (stok_id, arama_metni) çiftlerinin trigramlarını stok_arama'ya yaz; eklenen satır sayısını döndür.
+    sil: önce ürünlerin eski trigramları silinir (güncelleme). Yeni ürünlerde False verilebilir.
+    cursor: pymysql / SQLite cursor'ı (%s yer tutucu); transaction çağırana aittir.
+    """
+    urunler = list(urunler)
+    if not urunler:
+        return 0
+    parti = max(1, cursor_dialect(cursor).en_fazla_parametre // 2)
+    if sil:
+        idler = [stok_id for stok_id, _ in urunler]
+        for i in range(0, len(idler), parti):
+            dilim = idler[i:i + parti]
+            cursor.execute(
+                f"DELETE FROM stok_arama WHERE stok_id IN ({', '.join(['%s'] * len(dilim))})", dilim
+            )
+    satirlar: List[Tuple[str, int]] = [
+        (trigram, stok_id) for stok_id, metin in urunler for trigram in trigramlar(metin or "")
+    ]
+    for i in range(0, len(satirlar), parti):
+        dilim = satirlar[i:i + parti]
+        cursor.execute(
+            f"INSERT INTO stok_arama (trigram, stok_id) VALUES {', '.join(['(%s, %s)'] * len(dilim))}",
+            [deger for satir in dilim for deger in satir],
+        )
+    return len(satirlar)
+
+
+def index_yenile(cursor, parti: int = 1000) -> int:
+    """
+    Tüm stok için arama_metni ve stok_arama'yı baştan üret (migration, toplu SQL ile eklenen veri,
+    katlama kuralı değişikliği). cursor: tuple satır döndüren ham cursor (conn.cursor()).
+    İşlenen ürün sayısını döndürür; commit çağırana aittir.
+    """
+    cursor.execute("DELETE FROM stok_arama")
+    son_id, toplam = 0, 0
+    while True:
+        cursor.execute(
+            "SELECT id, urun_kodu, urun_adi, marka FROM stok WHERE id > %s ORDER BY id LIMIT %s",
+            (son_id, parti),
+        )
+        satirlar = cursor.fetchall()
+        if not satirlar:
+            return toplam
+        urunler = [(stok_id, arama_metni(kod, ad, marka)) for stok_id, kod, ad, marka in satirlar]
+        cursor.executemany(
+            "UPDATE stok SET arama_metni = %s, guncelleme_tarihi = guncelleme_tarihi WHERE id = %s",
+            [(metin, stok_id) for stok_id, metin in urunler],
+        )
+        trigram_yaz(cursor, urunler, sil=False)
+        son_id = urunler[-1][0]
+        toplam += len(urunler)
@@ -13,24 +13,15 @@ from .db_auth import AuthDB
 
 
 class Database:
-    """Veritabanı yönetim sınıfı - MySQL - Tüm modülleri birleştirir"""
+    """Veritabanı yönetim sınıfı - MySQL / SQLite - Tüm modülleri birleştirir"""
 
     def __init__(self, database_url: str):
         """
-        MySQL bağlantısı. database_url zorunludur.
+        database_url zorunludur (mysql://... veya sqlite://..., bkz. app/db_dialect.py).
+        Şema oluşturma/güncelleme burada yapılmaz; uygulama başlarken init_database() (migration) çağrılır.
         """
         self.db_conn = DatabaseConnection(database_url=database_url)
 
-        try:
-            print("🔄 Veritabanı başlatılıyor (MySQL)...")
-            self.db_conn.init_database()
-        except Exception as e:
-            print(f"❌ Veritabanı hatası: {e}")
-            import traceback
-            traceback.print_exc()
-            # Hata olsa bile devam et, belki tablolar zaten var
-            # Ama uygulama başlarken tekrar kontrol edilecek
-        
         # Alt modülleri başlat
         self.stok = StokDB(self.db_conn)
         self.cari = CariDB(self.db_conn)
@@ -45,6 +36,12 @@ class Database:
     def stok_ekle(self, *args, **kwargs):
         return self.stok.stok_ekle(*args, **kwargs)
     
+    def stok_ekle_bulk(self, *args, **kwargs):
+        return self.stok.stok_ekle_bulk(*args, **kwargs)
+    
+    def stok_upsert_bulk(self, *args, **kwargs):
+        return self.stok.stok_upsert_bulk(*args, **kwargs)
+    
     def stok_guncelle(self, *args, **kwargs):
         return self.stok.stok_guncelle(*args, **kwargs)
     
@@ -54,6 +51,21 @@ class Database:
     def stok_listele(self, *args, **kwargs):
         return self.stok.stok_listele(*args, **kwargs)
     
+    def stok_akis(self, *args, **kwargs):
+        return self.stok.stok_akis(*args, **kwargs)
+    
+    def stok_sayfa(self, *args, **kwargs):
+        return self.stok.stok_sayfa(*args, **kwargs)
+    
+    def stok_ara(self, *args, **kwargs):
+        return self.stok.stok_ara(*args, **kwargs)
+    
+    def stok_oner(self, *args, **kwargs):
+        return self.stok.stok_oner(*args, **kwargs)
+    
+    def stok_analiz(self, *args, **kwargs):
+        return self.stok.stok_analiz(*args, **kwargs)
+    
     def stok_getir(self, *args, **kwargs):
         return self.stok.stok_getir(*args, **kwargs)
     
@@ -69,6 +81,33 @@ class Database:
     def stok_miktar_azalt_batch(self, *args, **kwargs):
         return self.stok.stok_miktar_azalt_batch(*args, **kwargs)
     
+    def stok_hareket_geri_al(self, *args, **kwargs):
+        return self.stok.stok_hareket_geri_al(*args, **kwargs)
+    
+    def stok_rezerve_et(self, *args, **kwargs):
+        return self.stok.stok_rezerve_et(*args, **kwargs)
+    
+    def stok_rezervasyon_birak(self, *args, **kwargs):
+        return self.stok.stok_rezervasyon_birak(*args, **kwargs)
+    
+    def stok_rezervasyon_listele(self, *args, **kwargs):
+        return self.stok.stok_rezervasyon_listele(*args, **kwargs)
+    
+    def stok_rezervasyon_temizle(self, *args, **kwargs):
+        return self.stok.stok_rezervasyon_temizle(*args, **kwargs)
+    
+    def stok_tahmin_yenile(self, *args, **kwargs):
+        return self.stok.stok_tahmin_yenile(*args, **kwargs)
+    
+    def stok_siparis_onerileri(self, *args, **kwargs):
+        return self.stok.stok_siparis_onerileri(*args, **kwargs)
+    
+    def stok_hareket_listele(self, *args, **kwargs):
+        return self.stok.stok_hareket_listele(*args, **kwargs)
+    
+    def stok_bakiye_dogrula(self, *args, **kwargs):
+        return self.stok.stok_bakiye_dogrula(*args, **kwargs)
+    
     # ========== CARİ İŞLEMLERİ (Delegasyon) ==========
     
     def cari_ekle(self, *args, **kwargs):
@@ -83,6 +122,12 @@ class Database:
     def cari_listele(self, *args, **kwargs):
         return self.cari.cari_listele(*args, **kwargs)
     
+    def cari_akis(self, *args, **kwargs):
+        return self.cari.cari_akis(*args, **kwargs)
+    
+    def cari_sayfa(self, *args, **kwargs):
+        return self.cari.cari_sayfa(*args, **kwargs)
+    
     def cari_getir(self, *args, **kwargs):
         return self.cari.cari_getir(*args, **kwargs)
     
@@ -106,6 +151,12 @@ class Database:
     def is_evraki_listele(self, *args, **kwargs):
         return self.is_evraki.is_evraki_listele(*args, **kwargs)
     
+    def is_evraki_akis(self, *args, **kwargs):
+        return self.is_evraki.is_evraki_akis(*args, **kwargs)
+    
+    def is_evraki_sayfa(self, *args, **kwargs):
+        return self.is_evraki.is_evraki_sayfa(*args, **kwargs)
+    
     def is_evraki_getir(self, *args, **kwargs):
         return self.is_evraki.is_evraki_getir(*args, **kwargs)
     
@@ -129,6 +180,9 @@ class Database:
     def is_prosesi_listele(self, *args, **kwargs):
         return self.is_prosesi.is_prosesi_listele(*args, **kwargs)
     
+    def is_prosesi_sayfa(self, *args, **kwargs):
+        return self.is_prosesi.is_prosesi_sayfa(*args, **kwargs)
+    
     def is_prosesi_getir(self, *args, **kwargs):
         return self.is_prosesi.is_prosesi_getir(*args, **kwargs)
     
@@ -141,6 +195,9 @@ class Database:
     def is_prosesi_madde_ekle(self, *args, **kwargs):
         return self.is_prosesi.is_prosesi_madde_ekle(*args, **kwargs)
     
+    def is_prosesi_madde_ekle_bulk(self, *args, **kwargs):
+        return self.is_prosesi.is_prosesi_madde_ekle_bulk(*args, **kwargs)
+    
     def is_prosesi_maddeleri_getir(self, *args, **kwargs):
         return self.is_prosesi.is_prosesi_maddeleri_getir(*args, **kwargs)
     
@@ -167,12 +224,21 @@ class Database:
     def arac_listele(self, *args, **kwargs):
         return self.arac.arac_listele(*args, **kwargs)
 
+    def arac_akis(self, *args, **kwargs):
+        return self.arac.arac_akis(*args, **kwargs)
+
+    def arac_sayfa(self, *args, **kwargs):
+        return self.arac.arac_sayfa(*args, **kwargs)
+
     def arac_getir(self, *args, **kwargs):
         return self.arac.arac_getir(*args, **kwargs)
 
     def belge_ekle(self, *args, **kwargs):
         return self.arac.belge_ekle(*args, **kwargs)
 
+    def belge_ekle_bulk(self, *args, **kwargs):
+        return self.arac.belge_ekle_bulk(*args, **kwargs)
+
     def belge_listele(self, *args, **kwargs):
         return self.arac.belge_listele(*args, **kwargs)
 
@@ -194,6 +260,9 @@ class Database:
     def bakim_ekle(self, *args, **kwargs):
         return self.arac.bakim_ekle(*args, **kwargs)
 
+    def bakim_ekle_bulk(self, *args, **kwargs):
+        return self.arac.bakim_ekle_bulk(*args, **kwargs)
+
     def bakim_listele(self, *args, **kwargs):
         return self.arac.bakim_listele(*args, **kwargs)
 
@@ -214,6 +283,9 @@ class Database:
     def sofor_listele(self, *args, **kwargs):
         return self.sofor.sofor_listele(*args, **kwargs)
 
+    def sofor_sayfa(self, *args, **kwargs):
+        return self.sofor.sofor_sayfa(*args, **kwargs)
+
     def sofor_getir(self, *args, **kwargs):
         return self.sofor.sofor_getir(*args, **kwargs)
 
@@ -224,3 +296,9 @@ class Database:
     
     def close(self):
         return self.db_conn.close()
+
+    def pool_stats(self):
+        return self.db_conn.pool_stats()
+
+    def unit_of_work(self):
+        return self.db_conn.unit_of_work()
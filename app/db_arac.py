@@ -2,8 +2,11 @@
 Araç Yönetimi (Modül 2) veritabanı işlemleri
 Araç kartı, belge takibi, bakım geçmişi
 """
-from typing import Optional, List, Dict, Tuple, Any
+from datetime import date, timedelta
+from typing import Optional, List, Dict, Tuple, Any, Iterator
 from .db_connection import DatabaseConnection
+from .satir import SatirListesi
+from .sayfalama import VARSAYILAN_LIMIT, kolonlar_coz, sayfa_getir, siralama_coz, sorgu_olustur
 
 
 # Sabitler
@@ -28,9 +31,50 @@ BAKIM_UYARI_KURALLARI = [
 ]
 
 
+# Sık çalışan sorgular (explain_kontrol.py EXPLAIN ile index kullanımını doğrular)
+_SQL_PLAKA_ILE = "SELECT * FROM arac WHERE arac_plakasi = ?"
+_SQL_BELGE_LISTELE = "SELECT * FROM arac_belge WHERE arac_id = ? ORDER BY bitis_tarihi ASC"
+_SQL_BELGE_SURESI_DOLACAK = """
+    SELECT b.*, a.arac_plakasi, a.marka, a.model
+    FROM arac_belge b
+    JOIN arac a ON a.id = b.arac_id
+    WHERE b.bitis_tarihi BETWEEN ? AND ?
+    ORDER BY b.bitis_tarihi ASC
+"""
+_SQL_BAKIM_LISTELE = "SELECT * FROM arac_bakim WHERE arac_id = ? ORDER BY bakim_tarihi DESC, id DESC"
+
+
 class AracDB:
     """Araç yönetimi veritabanı işlemleri"""
 
+    # (ad, sorgu, örnek parametreler)
+    EXPLAIN_SORGULARI = [
+        ("arac_plaka_ile_getir", _SQL_PLAKA_ILE, ("34 ABC 001",)),
+        ("belge_listele", _SQL_BELGE_LISTELE, (1,)),
+        ("belge_suresi_dolacak_listele", _SQL_BELGE_SURESI_DOLACAK, ("2025-01-01", "2025-01-31")),
+        ("bakim_listele", _SQL_BAKIM_LISTELE, (1,)),
+    ]
+
+    # Liste sıralama anahtarları (?sirala=) -> kolon
+    SIRALAMA = {
+        "arac_plakasi": "arac_plakasi",
+        "marka": "marka",
+        "model_yili": "model_yili",
+        "guncel_km": "guncel_km",
+        "olusturma_tarihi": "olusturma_tarihi",
+        "id": "id",
+    }
+    VARSAYILAN_SIRALAMA = "arac_plakasi"
+
+    # ?fields= ile seçilebilecek kolonlar; varsayılan liste görünümü OZET_KOLONLAR (TEXT alanlar sadece detayda)
+    KOLONLAR = (
+        "id", "arac_plakasi", "arac_tipi", "marka", "model", "model_yili", "sasi_no", "motor_no",
+        "guncel_km", "alis_tarihi", "alis_fiyati", "durum", "olusturma_tarihi", "guncelleme_tarihi",
+    )
+    OZET_KOLONLAR = (
+        "id", "arac_plakasi", "arac_tipi", "marka", "model", "model_yili", "guncel_km", "durum",
+    )
+
     def __init__(self, db_conn: DatabaseConnection):
         self.db = db_conn
 
@@ -58,45 +102,38 @@ class AracDB:
             durum = "aktif"
         if sasi_no and len(sasi_no.strip()) != 17:
             return (False, "Şasi numarası (VIN) 17 karakter olmalıdır.")
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = """
-                INSERT INTO arac (arac_plakasi, arac_tipi, marka, model, model_yili,
-                    sasi_no, motor_no, guncel_km, alis_tarihi, alis_fiyati, durum)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            q = self.db._convert_placeholders(q)
-            cursor.execute(
-                q,
-                (
-                    arac_plakasi,
-                    arac_tipi,
-                    marka or None,
-                    model or None,
-                    model_yili,
-                    sasi_no.strip() or None,
-                    motor_no.strip() or None,
-                    float(guncel_km),
-                    alis_tarihi,
-                    float(alis_fiyati) if alis_fiyati is not None else None,
-                    durum,
-                ),
-            )
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = """
+                    INSERT INTO arac (arac_plakasi, arac_tipi, marka, model, model_yili,
+                        sasi_no, motor_no, guncel_km, alis_tarihi, alis_fiyati, durum)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                q = self.db._convert_placeholders(q)
+                cursor.execute(
+                    q,
+                    (
+                        arac_plakasi,
+                        arac_tipi,
+                        marka or None,
+                        model or None,
+                        model_yili,
+                        sasi_no.strip() or None,
+                        motor_no.strip() or None,
+                        float(guncel_km),
+                        alis_tarihi,
+                        float(alis_fiyati) if alis_fiyati is not None else None,
+                        durum,
+                    ),
+                )
             return (True, "Araç eklendi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             if self.db._is_integrity_error(e):
                 return (False, "Bu plaka zaten kayıtlı.")
             return (False, str(e))
-        finally:
-            self.db.close()
 
     def arac_guncelle(
         self,
@@ -123,114 +160,120 @@ class AracDB:
             durum = "aktif"
         if sasi_no and len(sasi_no.strip()) != 17:
             return (False, "Şasi numarası (VIN) 17 karakter olmalıdır.")
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = """
-                UPDATE arac SET arac_plakasi=?, arac_tipi=?, marka=?, model=?,
-                    model_yili=?, sasi_no=?, motor_no=?, guncel_km=?, alis_tarihi=?,
-                    alis_fiyati=?, durum=?, guncelleme_tarihi=CURRENT_TIMESTAMP
-                WHERE id=?
-            """
-            q = self.db._convert_placeholders(q)
-            cursor.execute(
-                q,
-                (
-                    arac_plakasi,
-                    arac_tipi,
-                    marka or None,
-                    model or None,
-                    model_yili,
-                    sasi_no.strip() or None,
-                    motor_no.strip() or None,
-                    float(guncel_km),
-                    alis_tarihi,
-                    float(alis_fiyati) if alis_fiyati is not None else None,
-                    durum,
-                    arac_id,
-                ),
-            )
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = """
+                    UPDATE arac SET arac_plakasi=?, arac_tipi=?, marka=?, model=?,
+                        model_yili=?, sasi_no=?, motor_no=?, guncel_km=?, alis_tarihi=?,
+                        alis_fiyati=?, durum=?, guncelleme_tarihi=CURRENT_TIMESTAMP
+                    WHERE id=?
+                """
+                q = self.db._convert_placeholders(q)
+                cursor.execute(
+                    q,
+                    (
+                        arac_plakasi,
+                        arac_tipi,
+                        marka or None,
+                        model or None,
+                        model_yili,
+                        sasi_no.strip() or None,
+                        motor_no.strip() or None,
+                        float(guncel_km),
+                        alis_tarihi,
+                        float(alis_fiyati) if alis_fiyati is not None else None,
+                        durum,
+                        arac_id,
+                    ),
+                )
             return (True, "Araç güncellendi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             if self.db._is_integrity_error(e):
                 return (False, "Bu plaka başka bir araçta kayıtlı.")
             return (False, str(e))
-        finally:
-            self.db.close()
 
     def arac_sil(self, arac_id: int) -> bool:
         """Aracı siler (cascade ile belge ve bakım kayıtları da silinir)."""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = "DELETE FROM arac WHERE id = ?"
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, (arac_id,))
-            conn.commit()
-            self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = "DELETE FROM arac WHERE id = ?"
+                q = self.db._convert_placeholders(q)
+                cursor.execute(q, (arac_id,))
             return True
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
-            self.db.close()
+            if self.db._is_transient_error(e):
+                raise
             return False
 
-    def arac_listele(self, arama: str = "", durum: Optional[str] = None) -> List[Dict]:
+    def _filtre(self, arama: str = "", durum: Optional[str] = None) -> Tuple[List[str], list]:
+        """Liste filtreleri: (koşullar, parametreler)"""
+        conditions = []
+        params = []
+        if arama:
+            conditions.append("(arac_plakasi LIKE ? OR marka LIKE ? OR model LIKE ? OR sasi_no LIKE ?)")
+            p = f"%{arama}%"
+            params.extend([p, p, p, p])
+        if durum:
+            conditions.append("durum = ?")
+            params.append(durum)
+        return conditions, params
+
+    def _listele_sorgusu(self, arama: str = "", durum: Optional[str] = None,
+                         sirala: Optional[str] = None, fields: Optional[str] = None) -> Tuple[str, tuple]:
+        """arac_listele / arac_akis için sorgu ve parametreler"""
+        conditions, params = self._filtre(arama, durum)
+        kolon, azalan = siralama_coz(sirala, self.SIRALAMA, self.VARSAYILAN_SIRALAMA)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        q, params = sorgu_olustur("arac", conditions, params, kolon, azalan, kolonlar=kolonlar)
+        return self.db._convert_placeholders(q), params
+
+    def arac_listele(self, arama: str = "", durum: Optional[str] = None, sirala: Optional[str] = None,
+                     fields: Optional[str] = None) -> List[Dict]:
         """Tüm araçları listeler."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        if arama or durum:
-            conditions = []
-            params = []
-            if arama:
-                conditions.append("(arac_plakasi LIKE ? OR marka LIKE ? OR model LIKE ? OR sasi_no LIKE ?)")
-                p = f"%{arama}%"
-                params.extend([p, p, p, p])
-            if durum:
-                conditions.append("durum = ?")
-                params.append(durum)
-            where = " AND ".join(conditions)
-            q = f"SELECT * FROM arac WHERE {where} ORDER BY arac_plakasi"
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, tuple(params))
-        else:
-            q = "SELECT * FROM arac ORDER BY arac_plakasi"
-            cursor.execute(q)
-        rows = cursor.fetchall()
-        self.db.close()
+        q, params = self._listele_sorgusu(arama, durum, sirala, fields)
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(q, params)
+            rows = cursor.fetchall()
         return [dict(r) for r in rows] if rows else []
 
+    def arac_akis(self, arama: str = "", durum: Optional[str] = None, parti: int = 500,
+                  sirala: Optional[str] = None, fields: Optional[str] = None) -> Iterator[SatirListesi]:
+        """arac_listele ile aynı sonuç; sunucu taraflı cursor ile parti parti üretilir."""
+        q, params = self._listele_sorgusu(arama, durum, sirala, fields)
+        return self.db.akis(q, params, parti)
+
+    def arac_sayfa(self, arama: str = "", durum: Optional[str] = None, sirala: Optional[str] = None,
+                   cursor: Optional[str] = None, limit: int = VARSAYILAN_LIMIT, toplam: bool = False,
+                   fields: Optional[str] = None) -> Dict:
+        """Keyset sayfalama ile tek sayfa (bkz. app/sayfalama.py)."""
+        conditions, params = self._filtre(arama, durum)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        return sayfa_getir(self.db, "arac", conditions, params, self.SIRALAMA, self.VARSAYILAN_SIRALAMA,
+                           sirala, cursor, limit, toplam, kolonlar)
+
     def arac_getir(self, arac_id: int) -> Optional[Dict]:
         """Tek araç getirir."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        q = "SELECT * FROM arac WHERE id = ?"
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, (arac_id,))
-        row = cursor.fetchone()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            q = "SELECT * FROM arac WHERE id = ?"
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, (arac_id,))
+            row = cursor.fetchone()
         return dict(row) if row else None
 
     def arac_plaka_ile_getir(self, plaka: str) -> Optional[Dict]:
         """Plakaya göre araç getirir."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        q = "SELECT * FROM arac WHERE arac_plakasi = ?"
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, (plaka.strip().upper(),))
-        row = cursor.fetchone()
-        self.db.close()
+        with self.db.connection() as conn:
+            cursor = self.db._get_cursor(conn)
+            q = _SQL_PLAKA_ILE
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, (plaka.strip().upper(),))
+            row = cursor.fetchone()
         return dict(row) if row else None
 
     # ---------- Belge ----------
@@ -243,48 +286,57 @@ class AracDB:
         belge_dosya_path: Optional[str] = None,
     ) -> Tuple[bool, str]:
         """Araca belge ekler."""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = """
-                INSERT INTO arac_belge (arac_id, belge_turu, duzenlenme_tarihi, bitis_tarihi, belge_dosya_path)
-                VALUES (?, ?, ?, ?, ?)
-            """
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, (arac_id, belge_turu, duzenlenme_tarihi, bitis_tarihi, belge_dosya_path))
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = """
+                    INSERT INTO arac_belge (arac_id, belge_turu, duzenlenme_tarihi, bitis_tarihi, belge_dosya_path)
+                    VALUES (?, ?, ?, ?, ?)
+                """
+                q = self.db._convert_placeholders(q)
+                cursor.execute(q, (arac_id, belge_turu, duzenlenme_tarihi, bitis_tarihi, belge_dosya_path))
             return (True, "Belge eklendi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             return (False, str(e))
-        finally:
-            self.db.close()
+
+    def belge_ekle_bulk(self, belgeler: List[Dict]) -> List[Tuple[bool, str]]:
+        """
+        Birden çok belgeyi tek transaction'da ekler (çok satırlı INSERT).
+        belgeler: arac_id, belge_turu, duzenlenme_tarihi, bitis_tarihi, belge_dosya_path anahtarlı sözlükler.
+        Dönüş: her belge için (başarılı, mesaj), aynı sırada.
+        """
+        satirlar = [
+            (b.get("arac_id"), b.get("belge_turu"), b.get("duzenlenme_tarihi"),
+             b.get("bitis_tarihi"), b.get("belge_dosya_path"))
+            for b in belgeler
+        ]
+        return self.db.toplu_ekle(
+            "arac_belge",
+            ("arac_id", "belge_turu", "duzenlenme_tarihi", "bitis_tarihi", "belge_dosya_path"),
+            satirlar,
+            butunluk_mesaji="Araç bulunamadı veya belge geçersiz.",
+        )
 
     def belge_listele(self, arac_id: int) -> List[Dict]:
         """Aracın belgelerini listeler."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        q = "SELECT * FROM arac_belge WHERE arac_id = ? ORDER BY bitis_tarihi ASC"
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, (arac_id,))
-        rows = cursor.fetchall()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            q = _SQL_BELGE_LISTELE
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, (arac_id,))
+            rows = cursor.fetchall()
         return [dict(r) for r in rows] if rows else []
 
     def belge_getir(self, belge_id: int) -> Optional[Dict]:
         """Tek belge getirir."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        q = "SELECT * FROM arac_belge WHERE id = ?"
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, (belge_id,))
-        row = cursor.fetchone()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            q = "SELECT * FROM arac_belge WHERE id = ?"
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, (belge_id,))
+            row = cursor.fetchone()
         return dict(row) if row else None
 
     def belge_guncelle(
@@ -296,64 +348,45 @@ class AracDB:
         belge_dosya_path: Optional[str] = None,
     ) -> Tuple[bool, str]:
         """Belge kaydını günceller."""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = """
-                UPDATE arac_belge SET belge_turu=?, duzenlenme_tarihi=?, bitis_tarihi=?, belge_dosya_path=?
-                WHERE id=?
-            """
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, (belge_turu, duzenlenme_tarihi, bitis_tarihi, belge_dosya_path, belge_id))
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = """
+                    UPDATE arac_belge SET belge_turu=?, duzenlenme_tarihi=?, bitis_tarihi=?, belge_dosya_path=?
+                    WHERE id=?
+                """
+                q = self.db._convert_placeholders(q)
+                cursor.execute(q, (belge_turu, duzenlenme_tarihi, bitis_tarihi, belge_dosya_path, belge_id))
             return (True, "Belge güncellendi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             return (False, str(e))
-        finally:
-            self.db.close()
 
     def belge_sil(self, belge_id: int) -> Tuple[bool, str]:
         """Belge kaydını siler."""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = "DELETE FROM arac_belge WHERE id = ?"
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, (belge_id,))
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = "DELETE FROM arac_belge WHERE id = ?"
+                q = self.db._convert_placeholders(q)
+                cursor.execute(q, (belge_id,))
             return (True, "Belge silindi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             return (False, str(e))
-        finally:
-            self.db.close()
 
     def belge_suresi_dolacak_listele(self, gun: int = 30) -> List[Dict]:
         """Belirtilen gün sayısı içinde süresi dolacak belgeleri listeler (tüm araçlar)."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        q = """
-            SELECT b.*, a.arac_plakasi, a.marka, a.model
-            FROM arac_belge b
-            JOIN arac a ON a.id = b.arac_id
-            WHERE b.bitis_tarihi BETWEEN CURDATE() AND DATE_ADD(CURDATE(), INTERVAL ? DAY)
-            ORDER BY b.bitis_tarihi ASC
-        """
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, (gun,))
-        rows = cursor.fetchall()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            # Tarih aralığı Python'da hesaplanır (CURDATE/DATE_ADD MySQL'e özgü)
+            bugun = date.today()
+            q = _SQL_BELGE_SURESI_DOLACAK
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, (bugun.isoformat(), (bugun + timedelta(days=gun)).isoformat()))
+            rows = cursor.fetchall()
         return [dict(r) for r in rows] if rows else []
 
     def belge_takip_listele(
@@ -362,29 +395,28 @@ class AracDB:
         belge_turu: Optional[str] = None,
     ) -> List[Dict]:
         """Tüm araç belgelerini bitiş tarihine göre listeler (en yakın önce). Takip sekmesi için."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        conditions = []
-        params = []
-        if arac_plakasi and arac_plakasi.strip():
-            conditions.append("a.arac_plakasi LIKE ?")
-            params.append("%" + arac_plakasi.strip() + "%")
-        if belge_turu and belge_turu.strip():
-            conditions.append("b.belge_turu = ?")
-            params.append(belge_turu.strip())
-        where = " AND ".join(conditions) if conditions else "1=1"
-        q = """
-            SELECT b.id, b.arac_id, b.belge_turu, b.duzenlenme_tarihi, b.bitis_tarihi,
-                   a.arac_plakasi
-            FROM arac_belge b
-            JOIN arac a ON a.id = b.arac_id
-            WHERE """ + where + """
-            ORDER BY b.bitis_tarihi ASC
-        """
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, tuple(params))
-        rows = cursor.fetchall()
-        self.db.close()
+        with self.db.connection() as conn:
+            cursor = self.db._get_cursor(conn)
+            conditions = []
+            params = []
+            if arac_plakasi and arac_plakasi.strip():
+                conditions.append("a.arac_plakasi LIKE ?")
+                params.append("%" + arac_plakasi.strip() + "%")
+            if belge_turu and belge_turu.strip():
+                conditions.append("b.belge_turu = ?")
+                params.append(belge_turu.strip())
+            where = " AND ".join(conditions) if conditions else "1=1"
+            q = """
+                SELECT b.id, b.arac_id, b.belge_turu, b.duzenlenme_tarihi, b.bitis_tarihi,
+                       a.arac_plakasi
+                FROM arac_belge b
+                JOIN arac a ON a.id = b.arac_id
+                WHERE """ + where + """
+                ORDER BY b.bitis_tarihi ASC
+            """
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, tuple(params))
+            rows = cursor.fetchall()
         return [dict(r) for r in rows] if rows else []
 
     # ---------- Bakım ----------
@@ -398,37 +430,47 @@ class AracDB:
         maliyet: Optional[float] = None,
     ) -> Tuple[bool, str]:
         """Araca bakım kaydı ekler. Bakım sonrası aracın güncel km güncellenebilir (opsiyonel)."""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = """
-                INSERT INTO arac_bakim (arac_id, bakim_turu, aciklama, bakim_tarihi, bakim_km, maliyet)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, (arac_id, bakim_turu, aciklama or None, bakim_tarihi, bakim_km, maliyet))
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = """
+                    INSERT INTO arac_bakim (arac_id, bakim_turu, aciklama, bakim_tarihi, bakim_km, maliyet)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """
+                q = self.db._convert_placeholders(q)
+                cursor.execute(q, (arac_id, bakim_turu, aciklama or None, bakim_tarihi, bakim_km, maliyet))
             return (True, "Bakım kaydı eklendi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             return (False, str(e))
-        finally:
-            self.db.close()
+
+    def bakim_ekle_bulk(self, bakimlar: List[Dict]) -> List[Tuple[bool, str]]:
+        """
+        Birden çok bakım kaydını tek transaction'da ekler (çok satırlı INSERT).
+        bakimlar: arac_id, bakim_turu, aciklama, bakim_tarihi, bakim_km, maliyet anahtarlı sözlükler.
+        Dönüş: her kayıt için (başarılı, mesaj), aynı sırada.
+        """
+        satirlar = [
+            (b.get("arac_id"), b.get("bakim_turu"), b.get("aciklama") or None,
+             b.get("bakim_tarihi", ""), b.get("bakim_km"), b.get("maliyet"))
+            for b in bakimlar
+        ]
+        return self.db.toplu_ekle(
+            "arac_bakim",
+            ("arac_id", "bakim_turu", "aciklama", "bakim_tarihi", "bakim_km", "maliyet"),
+            satirlar,
+            butunluk_mesaji="Araç bulunamadı veya bakım kaydı geçersiz.",
+        )
 
     def bakim_listele(self, arac_id: int) -> List[Dict]:
         """Aracın bakım geçmişini listeler."""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        q = "SELECT * FROM arac_bakim WHERE arac_id = ? ORDER BY bakim_tarihi DESC, id DESC"
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, (arac_id,))
-        rows = cursor.fetchall()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            q = _SQL_BAKIM_LISTELE
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, (arac_id,))
+            rows = cursor.fetchall()
         return [dict(r) for r in rows] if rows else []
 
     def bakim_uyarilari_hesapla(self, arac_id: int) -> List[Dict]:
@@ -0,0 +1,146 @@
+"""
+Asenkron veritabanı erişimi - FastAPI router'ları için
+Database cephesindeki (app/database.py) her metodu `await` edilebilir hale getirir.
+Sorgular olay döngüsünde değil, bağlantı havuzu boyutunda sınırlı bir thread havuzunda
+(app/executor.py) çalışır; böylece yavaş bir sorgu diğer istekleri bekletmez.
+"""
+import asyncio
+import functools
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from .database import Database
+from .db_connection import _aktif_oturum
+from .db_metrik import Olcum, olc
+from .executor import SinirliExecutor
+
+
+class _AsyncModul:
+    """Senkron bir DB nesnesinin (Database, StokDB, AuthDB...) metodlarını coroutine olarak sunar."""
+
+    def __init__(self, hedef: Any, calistir):
+        self._hedef = hedef
+        self._calistir = calistir
+
+    def __getattr__(self, ad: str):
+        nitelik = getattr(self._hedef, ad)
+        if not callable(nitelik):
+            return nitelik
+
+        @functools.wraps(nitelik)
+        async def sarmal(*args, **kwargs):
+            return await self._calistir(nitelik, *args, **kwargs)
+
+        # Bir sonraki erişimde __getattr__'a düşmemek için önbelleğe al
+        self.__dict__[ad] = sarmal
+        return sarmal
+
+
+class AsyncDatabase(_AsyncModul):
+    """
+    Database cephesinin asenkron karşılığı.
+    Örnek: `await db.stok_listele(arama)`, `await db.auth.list_users()`
+    """
+
+    def __init__(self, database: Database, max_workers: Optional[int] = None, max_kuyruk: Optional[int] = None):
+        if max_workers is None:
+            havuz = database.db_conn.pool
+            max_workers = int(os.getenv("DB_ASYNC_WORKERS", str(havuz.pool_size + havuz.max_overflow)))
+        if max_kuyruk is None:
+            max_kuyruk = int(os.getenv("DB_ASYNC_MAX_KUYRUK", "100"))
+        self.sync = database
+        self.executor = SinirliExecutor("db", max_workers, max_kuyruk)
+        super().__init__(database, self.run)
+
+        # Alt modüller
+        self.stok = _AsyncModul(database.stok, self.run)
+        self.cari = _AsyncModul(database.cari, self.run)
+        self.is_evraki = _AsyncModul(database.is_evraki, self.run)
+        self.is_prosesi = _AsyncModul(database.is_prosesi, self.run)
+        self.arac = _AsyncModul(database.arac, self.run)
+        self.sofor = _AsyncModul(database.sofor, self.run)
+        self.auth = _AsyncModul(database.auth, self.run)
+
+    async def run(self, fonksiyon, *args, **kwargs):
+        """
+        Senkron bir fonksiyonu DB thread havuzunda çalıştır. Metrikler metod adıyla tutulur (örn. StokDB.stok_listele):
+        executor kuyruk / çalışma süresi ve sorgu düzeyi ölçüm (app/db_metrik.py).
+        Geçici DB hatasında çağrı commit yapmamışsa yeniden denenir (DatabaseConnection.tekrarli_calistir).
+        """
+        cagri_yeri = getattr(fonksiyon, "__qualname__", None) or repr(fonksiyon)
+        return await self.executor.run(cagri_yeri, self._olcerek, cagri_yeri, fonksiyon, *args, **kwargs)
+
+    def _olcerek(self, cagri_yeri, fonksiyon, /, *args, **kwargs):
+        with olc(cagri_yeri):
+            return self.sync.db_conn.tekrarli_calistir(fonksiyon, *args, **kwargs)
+
+    async def akis(self, fonksiyon, *args, **kwargs):
+        """
+        Parti üreten senkron bir akış metodunu (örn. self.sync.stok_akis) async generator olarak sunar:
+            async for satirlar in db.akis(db.sync.stok_akis, arama):
+        Her parti DB thread havuzunda okunur; generator kapatılınca bağlantı da serbest bırakılır.
+        """
+        cagri_yeri = getattr(fonksiyon, "__qualname__", None) or repr(fonksiyon)
+        # Generator oluşturmak sorgu çalıştırmaz; ilk next() thread havuzunda bağlantı alır
+        uretec = fonksiyon(*args, **kwargs)
+        # next() ve close() aynı anda farklı thread'lerde çalışmasın
+        kilit = threading.Lock()
+        bitti = object()
+        # Tüm partiler tek ölçüm: süre yalnızca DB'de geçen zaman (istemciye yazma hariç)
+        olcum = Olcum(cagri_yeri)
+        hata = False
+
+        def _sonraki():
+            nonlocal hata
+            with kilit, olcum.etkin():
+                try:
+                    return next(uretec, bitti)
+                except BaseException:
+                    hata = True
+                    raise
+
+        def _kapat():
+            with kilit:
+                with olcum.etkin():
+                    uretec.close()
+                olcum.kaydet(hata)
+
+        try:
+            while True:
+                satirlar = await self.executor.run(cagri_yeri, _sonraki)
+                if satirlar is bitti:
+                    return
+                yield satirlar
+        finally:
+            # İstemci bağlantıyı kesse de sunucu cursor'ı ve bağlantı kapatılmalı
+            await asyncio.shield(asyncio.to_thread(_kapat))
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        """
+        Route içindeki birden fazla DB çağrısını tek bağlantı ve tek transaction'da toplar:
+            async with db.unit_of_work():
+                await db.stok_miktar_azalt_batch(...)
+                await db.is_evraki_ekle(...)
+        Blok hatasız biterse commit, exception (HTTPException dahil) olursa rollback.
+        """
+        if _aktif_oturum.get() is not None:
+            yield _aktif_oturum.get()
+            return
+        db_conn = self.sync.db_conn
+        oturum = await self.executor.run("unit_of_work", db_conn.oturum_ac)
+        token = _aktif_oturum.set(oturum)
+        onayla = False
+        try:
+            yield oturum
+            onayla = True
+        finally:
+            _aktif_oturum.reset(token)
+            # Kuyruk doluyken de, istek iptal edilse de bağlantı mutlaka iade edilmeli
+            await asyncio.shield(asyncio.to_thread(db_conn.oturum_kapat, oturum, onayla))
+
+    def shutdown(self) -> None:
+        """Thread havuzunu kapat (uygulama kapanırken)"""
+        self.executor.shutdown()
@@ -1,12 +1,47 @@
 """
 Cari hesap veritabanı işlemleri
 """
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Iterator
 from .db_connection import DatabaseConnection
+from .satir import SatirListesi
+from .sayfalama import VARSAYILAN_LIMIT, kolonlar_coz, sayfa_getir, siralama_coz, sorgu_olustur
+
+
+# Sık çalışan sorgular (explain_kontrol.py EXPLAIN ile index kullanımını doğrular)
+_SQL_TC_ILE = "SELECT * FROM cari WHERE tc_kimlik_no = ?"
+_SQL_UNVAN_ILE = "SELECT * FROM cari WHERE unvan = ?"
+_SQL_VERGI_NO_ILE = "SELECT * FROM cari WHERE vergi_no = ?"
+_SQL_KOD_VAR_MI = "SELECT id FROM cari WHERE cari_kodu = ?"
 
 
 class CariDB:
     """Cari hesap veritabanı işlemleri"""
+
+    # (ad, sorgu, örnek parametreler)
+    EXPLAIN_SORGULARI = [
+        ("cari_tc_ile_ara", _SQL_TC_ILE, ("10000000001",)),
+        ("cari_unvan_ile_ara", _SQL_UNVAN_ILE, ("Müşteri 1",)),
+        ("cari_vergi_no_ile", _SQL_VERGI_NO_ILE, ("20000000001",)),
+        ("cari_kodu_var_mi", _SQL_KOD_VAR_MI, ("1",)),
+    ]
+
+    # Liste sıralama anahtarları (?sirala=) -> kolon
+    SIRALAMA = {
+        "unvan": "unvan",
+        "cari_kodu": "cari_kodu",
+        "bakiye": "bakiye",
+        "olusturma_tarihi": "olusturma_tarihi",
+        "id": "id",
+    }
+    VARSAYILAN_SIRALAMA = "unvan"
+
+    # ?fields= ile seçilebilecek kolonlar
+    KOLONLAR = (
+        "id", "cari_kodu", "unvan", "tip", "telefon", "email", "adres", "tc_kimlik_no", "vergi_no",
+        "vergi_dairesi", "bakiye", "aciklama", "firma_tipi", "olusturma_tarihi",
+        "guncelleme_tarihi",
+    )
+    OZET_KOLONLAR = None
     
     def __init__(self, db_conn: DatabaseConnection):
         self.db = db_conn
@@ -16,65 +51,53 @@ class CariDB:
                   tc_kimlik_no: str = "", vergi_no: str = "", vergi_dairesi: str = "", 
                   bakiye: float = 0, aciklama: str = "", firma_tipi: str = "Şahıs") -> bool:
         """Yeni cari hesap ekle"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            cari_kodu_val = cari_kodu.strip() if cari_kodu and cari_kodu.strip() else None
-            tc_kimlik_no_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
-            vergi_no_val = vergi_no.strip() if vergi_no and vergi_no.strip() else None
-            bakiye_val = float(bakiye) if bakiye is not None else 0.0
-            query = """
-                INSERT INTO cari (cari_kodu, unvan, tip, telefon, email, adres,
-                                tc_kimlik_no, vergi_no, vergi_dairesi, bakiye, aciklama, firma_tipi)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (cari_kodu_val, unvan, tip, telefon, email, adres, 
-                  tc_kimlik_no_val, vergi_no_val, vergi_dairesi, bakiye_val, aciklama, firma_tipi))
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                cari_kodu_val = cari_kodu.strip() if cari_kodu and cari_kodu.strip() else None
+                tc_kimlik_no_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
+                vergi_no_val = vergi_no.strip() if vergi_no and vergi_no.strip() else None
+                bakiye_val = float(bakiye) if bakiye is not None else 0.0
+                query = """
+                    INSERT INTO cari (cari_kodu, unvan, tip, telefon, email, adres,
+                                    tc_kimlik_no, vergi_no, vergi_dairesi, bakiye, aciklama, firma_tipi)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (cari_kodu_val, unvan, tip, telefon, email, adres, 
+                      tc_kimlik_no_val, vergi_no_val, vergi_dairesi, bakiye_val, aciklama, firma_tipi))
             return True
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             if self.db._is_integrity_error(e):
-                if conn:
-                    try:
-                        conn.rollback()
-                    except:
-                        pass
                 return False
             print(f"Cari ekleme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return False
-        finally:
-            self.db.close()
     
     def cari_guncelle(self, cari_id: int, cari_kodu: str, unvan: str, tip: str,
                      telefon: str, email: str, adres: str, tc_kimlik_no: str, vergi_no: str,
                      vergi_dairesi: str, bakiye: float, aciklama: str, firma_tipi: str = "Şahıs") -> bool:
         """Cari hesap bilgilerini güncelle"""
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            cari_kodu_val = cari_kodu if cari_kodu else None
-            tc_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
-            query = """
-                UPDATE cari
-                SET cari_kodu = ?, unvan = ?, tip = ?, telefon = ?, email = ?,
-                    adres = ?, tc_kimlik_no = ?, vergi_no = ?, vergi_dairesi = ?, bakiye = ?,
-                    aciklama = ?, firma_tipi = ?, guncelleme_tarihi = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (cari_kodu_val, unvan, tip, telefon, email, adres, tc_val, vergi_no,
-                  vergi_dairesi, bakiye, aciklama, firma_tipi, cari_id))
-            conn.commit()
-            self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                cari_kodu_val = cari_kodu if cari_kodu else None
+                tc_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
+                query = """
+                    UPDATE cari
+                    SET cari_kodu = ?, unvan = ?, tip = ?, telefon = ?, email = ?,
+                        adres = ?, tc_kimlik_no = ?, vergi_no = ?, vergi_dairesi = ?, bakiye = ?,
+                        aciklama = ?, firma_tipi = ?, guncelleme_tarihi = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (cari_kodu_val, unvan, tip, telefon, email, adres, tc_val, vergi_no,
+                      vergi_dairesi, bakiye, aciklama, firma_tipi, cari_id))
             return True
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             if self.db._is_integrity_error(e):
                 return False
             print(f"Cari güncelleme hatası: {e}")
@@ -123,150 +146,136 @@ class CariDB:
         if not patches:
             return
 
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            sets = [f"{k} = ?" for k in patches.keys()]
-            vals = list(patches.values())
-            vals.append(cari_id)
-            query = f"UPDATE cari SET {', '.join(sets)}, guncelleme_tarihi = CURRENT_TIMESTAMP WHERE id = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, tuple(vals))
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                sets = [f"{k} = ?" for k in patches.keys()]
+                vals = list(patches.values())
+                vals.append(cari_id)
+                query = f"UPDATE cari SET {', '.join(sets)}, guncelleme_tarihi = CURRENT_TIMESTAMP WHERE id = ?"
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, tuple(vals))
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             print(f"Cari eksik alan tamamlama hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                    self.db.conn = None
-                except Exception:
-                    pass
 
     def cari_bakiye_artir(self, cari_id: int, tutar: float) -> bool:
         """Cari hesap bakiyesine tutar ekler (iş evrakı ödenmedi için)."""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            query = "UPDATE cari SET bakiye = COALESCE(bakiye, 0) + ? WHERE id = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (float(tutar), cari_id))
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                query = "UPDATE cari SET bakiye = COALESCE(bakiye, 0) + ? WHERE id = ?"
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (float(tutar), cari_id))
             return True
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             print(f"Cari bakiye güncelleme hatası: {e}")
             return False
-        finally:
-            self.db.close()
     
     def cari_sil(self, cari_id: int) -> bool:
         """Cari hesabı sil"""
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            query = "DELETE FROM cari WHERE id = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (cari_id,))
-            conn.commit()
-            self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                query = "DELETE FROM cari WHERE id = ?"
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (cari_id,))
             return True
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             print(f"Cari silme hatası: {e}")
             return False
     
-    def cari_listele(self, arama: str = "", tip: str = "") -> List[Dict]:
-        """Tüm cari hesapları listele"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        
-        query = "SELECT * FROM cari WHERE 1=1"
+    def _filtre(self, arama: str = "", tip: str = "") -> Tuple[List[str], list]:
+        """Liste filtreleri: (koşullar, parametreler)"""
+        kosullar = []
         params = []
         
         if arama:
-            query += " AND (cari_kodu LIKE ? OR unvan LIKE ?)"
+            kosullar.append("(cari_kodu LIKE ? OR unvan LIKE ?)")
             params.extend([f"%{arama}%", f"%{arama}%"])
         
         if tip:
-            query += " AND tip = ?"
+            kosullar.append("tip = ?")
             params.append(tip)
         
-        query += " ORDER BY unvan"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        self.db.close()
+        return kosullar, params
+
+    def _listele_sorgusu(self, arama: str = "", tip: str = "", sirala: Optional[str] = None,
+                         fields: Optional[str] = None) -> Tuple[str, tuple]:
+        """cari_listele / cari_akis için sorgu ve parametreler"""
+        kosullar, params = self._filtre(arama, tip)
+        kolon, azalan = siralama_coz(sirala, self.SIRALAMA, self.VARSAYILAN_SIRALAMA)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        query, params = sorgu_olustur("cari", kosullar, params, kolon, azalan, kolonlar=kolonlar)
+        return self.db._convert_placeholders(query), params
+
+    def cari_listele(self, arama: str = "", tip: str = "", sirala: Optional[str] = None,
+                     fields: Optional[str] = None) -> List[Dict]:
+        """Tüm cari hesapları listele"""
+        query, params = self._listele_sorgusu(arama, tip, sirala, fields)
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         return list(rows)
 
+    def cari_akis(self, arama: str = "", tip: str = "", parti: int = 500,
+                  sirala: Optional[str] = None, fields: Optional[str] = None) -> Iterator[SatirListesi]:
+        """cari_listele ile aynı sonuç; sunucu taraflı cursor ile parti parti üretilir"""
+        query, params = self._listele_sorgusu(arama, tip, sirala, fields)
+        return self.db.akis(query, params, parti)
+
+    def cari_sayfa(self, arama: str = "", tip: str = "", sirala: Optional[str] = None,
+                   cursor: Optional[str] = None, limit: int = VARSAYILAN_LIMIT, toplam: bool = False,
+                   fields: Optional[str] = None) -> Dict:
+        """Keyset sayfalama ile tek sayfa (bkz. app/sayfalama.py)"""
+        kosullar, params = self._filtre(arama, tip)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        return sayfa_getir(self.db, "cari", kosullar, params, self.SIRALAMA, self.VARSAYILAN_SIRALAMA,
+                           sirala, cursor, limit, toplam, kolonlar)
+
     def cari_getir(self, cari_id: int) -> Optional[Dict]:
         """Belirli bir cari hesabı getir"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        query = "SELECT * FROM cari WHERE id = ?"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (cari_id,))
-        row = cursor.fetchone()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            query = "SELECT * FROM cari WHERE id = ?"
+            query = self.db._convert_placeholders(query)
+            cursor.execute(query, (cari_id,))
+            row = cursor.fetchone()
         return row if row else None
 
     def cari_tc_ile_ara(self, tc_kimlik_no: str) -> Optional[Dict]:
         """TC kimlik no ile cari hesap ara"""
         if not tc_kimlik_no or not tc_kimlik_no.strip():
             return None
-        conn = None
-        try:
-            conn = self.db.connect()
+        with self.db.okuma() as conn:
             cursor = self.db._get_cursor(conn)
-            query = "SELECT * FROM cari WHERE tc_kimlik_no = ?"
+            query = _SQL_TC_ILE
             query = self.db._convert_placeholders(query)
             cursor.execute(query, (tc_kimlik_no.strip(),))
             row = cursor.fetchone()
-            return row if row else None
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                    self.db.conn = None
-                except:
-                    pass
+        return row if row else None
 
     def cari_unvan_ile_ara(self, unvan: str) -> Optional[Dict]:
         """Ünvan ile cari hesap ara"""
         if not unvan or not unvan.strip():
             return None
-        conn = None
-        try:
-            conn = self.db.connect()
+        with self.db.okuma() as conn:
             cursor = self.db._get_cursor(conn)
-            query = "SELECT * FROM cari WHERE unvan = ?"
+            query = _SQL_UNVAN_ILE
             query = self.db._convert_placeholders(query)
             cursor.execute(query, (unvan.strip(),))
             row = cursor.fetchone()
-            return row if row else None
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                    self.db.conn = None
-                except:
-                    pass
+        return row if row else None
 
     def cari_sonraki_kod_olustur(self) -> str:
         """Bir sonraki cari kodunu oluştur (sayısal)"""
-        conn = None
-        try:
-            conn = self.db.connect()
+        with self.db.connection() as conn:
             cursor = self.db._get_cursor(conn)
 
             query = """
@@ -279,29 +288,33 @@ class CariDB:
             cursor.execute(query)
             row = cursor.fetchone()
 
-            if row and row.get('cari_kodu'):
-                cari_kodu = row['cari_kodu']
-                if cari_kodu:
-                    try:
-                        son_kod = int(cari_kodu)
-                        return str(son_kod + 1)
-                    except ValueError:
-                        pass
-            return "1"
-        finally:
-            if conn:
+        if row and row.get('cari_kodu'):
+            cari_kodu = row['cari_kodu']
+            if cari_kodu:
                 try:
-                    conn.close()
-                    self.db.conn = None
-                except:
+                    son_kod = int(cari_kodu)
+                    return str(son_kod + 1)
+                except ValueError:
                     pass
+        return "1"
     
     def cari_ekle_tc_kontrolu_ile(self, cari_kodu: str, unvan: str, tip: str,
                                   telefon: str = "", email: str = "", adres: str = "",
                                   tc_kimlik_no: str = "", vergi_no: str = "", 
                                   vergi_dairesi: str = "", bakiye: float = 0, 
                                   aciklama: str = "", firma_tipi: str = "Şahıs") -> tuple[bool, str]:
-        """TC ve VKN kontrolü yaparak cari hesap ekle"""
+        """TC ve VKN kontrolü yaparak cari hesap ekle. Tüm adımlar tek bağlantı ve tek transaction'da çalışır."""
+        with self.db.unit_of_work():
+            return self._cari_ekle_tc_kontrolu_ile(
+                cari_kodu, unvan, tip, telefon, email, adres, tc_kimlik_no,
+                vergi_no, vergi_dairesi, bakiye, aciklama, firma_tipi,
+            )
+
+    def _cari_ekle_tc_kontrolu_ile(self, cari_kodu: str, unvan: str, tip: str,
+                                   telefon: str, email: str, adres: str,
+                                   tc_kimlik_no: str, vergi_no: str,
+                                   vergi_dairesi: str, bakiye: float,
+                                   aciklama: str, firma_tipi: str) -> tuple[bool, str]:
         tc_st = (tc_kimlik_no or "").strip()
         vergi_no_final = (vergi_no or "").strip()
         if tc_st and not vergi_no_final:
@@ -321,57 +334,34 @@ class CariDB:
         
         # VKN (vergi_no) kontrolü
         if vergi_no and vergi_no.strip():
-            conn = None
-            try:
-                conn = self.db.connect()
+            with self.db.connection() as conn:
                 cursor = self.db._get_cursor(conn)
-                query = "SELECT * FROM cari WHERE vergi_no = ?"
+                query = _SQL_VERGI_NO_ILE
                 query = self.db._convert_placeholders(query)
                 cursor.execute(query, (vergi_no.strip(),))
                 row = cursor.fetchone()
-                if row:
-                    if bakiye != 0:
-                        self.cari_bakiye_artir(row["id"], bakiye)
-                    self.cari_eksik_alanlari_evraktan_doldur(
-                        row["id"], telefon, email, adres, tc_kimlik_no or "",
-                        vergi_no_final, vergi_dairesi, firma_tipi,
-                    )
-                    return (True, f"Bu VKN'ye sahip cari hesap zaten mevcut: {row.get('unvan', '')}")
-            finally:
-                if conn:
-                    try:
-                        conn.close()
-                        self.db.conn = None
-                    except:
-                        pass
+            if row:
+                if bakiye != 0:
+                    self.cari_bakiye_artir(row["id"], bakiye)
+                self.cari_eksik_alanlari_evraktan_doldur(
+                    row["id"], telefon, email, adres, tc_kimlik_no or "",
+                    vergi_no_final, vergi_dairesi, firma_tipi,
+                )
+                return (True, f"Bu VKN'ye sahip cari hesap zaten mevcut: {row.get('unvan', '')}")
         
         if not tc_st:
             mevcut_cari = self.cari_unvan_ile_ara(unvan)
             if mevcut_cari:
                 if not mevcut_cari.get('tc_kimlik_no'):
                     if tc_st:
-                        conn = None
                         try:
-                            conn = self.db.connect()
-                            cursor = self.db._get_cursor(conn)
-                            query = "UPDATE cari SET tc_kimlik_no = ? WHERE id = ?"
-                            query = self.db._convert_placeholders(query)
-                            cursor.execute(query, (tc_st, mevcut_cari['id']))
-                            conn.commit()
+                            with self.db.transaction() as conn:
+                                cursor = self.db._get_cursor(conn)
+                                query = "UPDATE cari SET tc_kimlik_no = ? WHERE id = ?"
+                                query = self.db._convert_placeholders(query)
+                                cursor.execute(query, (tc_st, mevcut_cari['id']))
                         except Exception as e:
                             print(f"TC güncelleme hatası: {e}")
-                            if conn:
-                                try:
-                                    conn.rollback()
-                                except:
-                                    pass
-                        finally:
-                            if conn:
-                                try:
-                                    conn.close()
-                                    self.db.conn = None
-                                except:
-                                    pass
                 if bakiye != 0:
                     self.cari_bakiye_artir(mevcut_cari["id"], bakiye)
                 self.cari_eksik_alanlari_evraktan_doldur(
@@ -383,32 +373,23 @@ class CariDB:
         if not cari_kodu or not cari_kodu.strip():
             cari_kodu = self.cari_sonraki_kod_olustur()
         
-        conn = None
-        try:
-            conn = self.db.connect()
+        with self.db.connection() as conn:
             cursor = self.db._get_cursor(conn)
-            query = "SELECT id FROM cari WHERE cari_kodu = ?"
+            query = _SQL_KOD_VAR_MI
             query = self.db._convert_placeholders(query)
             cursor.execute(query, (cari_kodu,))
             if cursor.fetchone():
                 cari_kodu = self.cari_sonraki_kod_olustur()
-                query = "SELECT id FROM cari WHERE cari_kodu = ?"
+                query = _SQL_KOD_VAR_MI
                 query = self.db._convert_placeholders(query)
                 cursor.execute(query, (cari_kodu,))
                 sayac = 0
                 while cursor.fetchone() and sayac < 100:
                     cari_kodu = str(int(cari_kodu) + 1)
-                    query = "SELECT id FROM cari WHERE cari_kodu = ?"
+                    query = _SQL_KOD_VAR_MI
                     query = self.db._convert_placeholders(query)
                     cursor.execute(query, (cari_kodu,))
                     sayac += 1
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                    self.db.conn = None
-                except:
-                    pass
         
         if self.cari_ekle(cari_kodu, unvan, tip, telefon, email, adres,
                          tc_kimlik_no, vergi_no_final, vergi_dairesi, bakiye, aciklama, firma_tipi):
@@ -1,12 +1,66 @@
 """
 İş evrakı veritabanı işlemleri
 """
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterator, Tuple
 from .db_connection import DatabaseConnection
+from .satir import SatirListesi, satir_listesi
+from .sayfalama import VARSAYILAN_LIMIT, cursor_olustur, kolonlar_coz, sayfa_getir, siralama_coz, sorgu_olustur
+
+
+# Sık çalışan sorgular (explain_kontrol.py EXPLAIN ile index kullanımını doğrular)
+# Varsayılan sıralamada bir sonraki sayfa (keyset: olusturma_tarihi, id)
+_SQL_SAYFA, _SAYFA_PARAMS = sorgu_olustur(
+    "is_evraki", [], [], "olusturma_tarihi", True, cursor_olustur("2025-01-01 00:00:00", 1000), 50
+)
+_SQL_AYLIK = "SELECT * FROM is_evraki WHERE tarih_donem = ? ORDER BY tarih, is_emri_no"
+_SQL_IS_EMRI_NOLARI = "SELECT DISTINCT is_emri_no FROM is_evraki WHERE is_emri_no > 0 ORDER BY is_emri_no"
+
+
+def tarih_donemi(tarih: str) -> Optional[str]:
+    """'Gün-Ay-Yıl' tarihinden 'YYYY-MM' dönemi (aylık rapor index'i için). Çözülemezse None."""
+    parcalar = (tarih or "").strip().replace(".", "-").replace("/", "-").split("-")
+    if len(parcalar) != 3:
+        return None
+    try:
+        ay, yil = int(parcalar[1]), int(parcalar[2])
+    except ValueError:
+        return None
+    if not (1 <= ay <= 12) or not (1900 <= yil <= 9999):
+        return None
+    return f"{yil:04d}-{ay:02d}"
 
 
 class IsEvrakiDB:
     """İş evrakı veritabanı işlemleri"""
+
+    # (ad, sorgu, örnek parametreler)
+    EXPLAIN_SORGULARI = [
+        ("is_evraki_aylik_getir", _SQL_AYLIK, ("2025-01",)),
+        ("is_emri_no_sonraki", _SQL_IS_EMRI_NOLARI, ()),
+        ("is_evraki_sayfa", _SQL_SAYFA, _SAYFA_PARAMS),
+    ]
+
+    # Liste sıralama anahtarları (?sirala=) -> kolon
+    SIRALAMA = {
+        "olusturma_tarihi": "olusturma_tarihi",
+        "is_emri_no": "is_emri_no",
+        "musteri_unvan": "musteri_unvan",
+        "toplam_tutar": "toplam_tutar",
+        "id": "id",
+    }
+    VARSAYILAN_SIRALAMA = "-olusturma_tarihi"
+
+    # ?fields= ile seçilebilecek kolonlar; varsayılan liste görünümü OZET_KOLONLAR (TEXT alanlar sadece detayda)
+    KOLONLAR = (
+        "id", "is_emri_no", "tarih", "tarih_donem", "musteri_unvan", "telefon", "arac_plakasi",
+        "cekici_dorse", "marka_model", "talep_edilen_isler", "musteri_sikayeti", "yapilan_is",
+        "baslama_saati", "bitis_saati", "kullanilan_urunler", "toplam_tutar", "tc_kimlik_no",
+        "odeme_durumu", "olusturma_tarihi",
+    )
+    OZET_KOLONLAR = (
+        "id", "is_emri_no", "tarih", "musteri_unvan", "arac_plakasi", "toplam_tutar",
+        "odeme_durumu", "olusturma_tarihi",
+    )
     
     def __init__(self, db_conn: DatabaseConnection):
         self.db = db_conn
@@ -19,67 +73,101 @@ class IsEvrakiDB:
                       kullanilan_urunler: str = "", toplam_tutar: float = 0,
                       tc_kimlik_no: str = "", odeme_durumu: str = "odenmedi") -> tuple[bool, str]:
         """Yeni iş evrakı ekle. odeme_durumu: 'odendi' | 'odenmedi'"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
             
-            telefon_val = telefon if telefon else None
-            arac_plakasi_val = arac_plakasi if arac_plakasi else None
-            cekici_dorse_val = cekici_dorse if cekici_dorse else None
-            marka_model_val = marka_model if marka_model else None
-            talep_edilen_isler_val = talep_edilen_isler if talep_edilen_isler else None
-            musteri_sikayeti_val = musteri_sikayeti if musteri_sikayeti else None
-            yapilan_is_val = yapilan_is if yapilan_is else None
-            baslama_saati_val = baslama_saati if baslama_saati else None
-            bitis_saati_val = bitis_saati if bitis_saati else None
-            kullanilan_urunler_val = kullanilan_urunler if kullanilan_urunler else None
-            tc_kimlik_no_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
-            odeme_durumu_val = (odeme_durumu or "odenmedi").strip() or "odenmedi"
+                telefon_val = telefon if telefon else None
+                arac_plakasi_val = arac_plakasi if arac_plakasi else None
+                cekici_dorse_val = cekici_dorse if cekici_dorse else None
+                marka_model_val = marka_model if marka_model else None
+                talep_edilen_isler_val = talep_edilen_isler if talep_edilen_isler else None
+                musteri_sikayeti_val = musteri_sikayeti if musteri_sikayeti else None
+                yapilan_is_val = yapilan_is if yapilan_is else None
+                baslama_saati_val = baslama_saati if baslama_saati else None
+                bitis_saati_val = bitis_saati if bitis_saati else None
+                kullanilan_urunler_val = kullanilan_urunler if kullanilan_urunler else None
+                tc_kimlik_no_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
+                odeme_durumu_val = (odeme_durumu or "odenmedi").strip() or "odenmedi"
             
-            query = """
-                INSERT INTO is_evraki (is_emri_no, tarih, musteri_unvan, telefon, arac_plakasi,
-                                     cekici_dorse, marka_model, talep_edilen_isler, musteri_sikayeti,
-                                     yapilan_is, baslama_saati, bitis_saati, kullanilan_urunler,
-                                     toplam_tutar, tc_kimlik_no, odeme_durumu)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (is_emri_no, tarih, musteri_unvan, telefon_val, arac_plakasi_val, cekici_dorse_val,
-                  marka_model_val, talep_edilen_isler_val, musteri_sikayeti_val, yapilan_is_val,
-                  baslama_saati_val, bitis_saati_val, kullanilan_urunler_val, toplam_tutar, tc_kimlik_no_val, odeme_durumu_val))
-            conn.commit()
+                query = """
+                    INSERT INTO is_evraki (is_emri_no, tarih, musteri_unvan, telefon, arac_plakasi,
+                                         cekici_dorse, marka_model, talep_edilen_isler, musteri_sikayeti,
+                                         yapilan_is, baslama_saati, bitis_saati, kullanilan_urunler,
+                                         toplam_tutar, tc_kimlik_no, odeme_durumu, tarih_donem)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (is_emri_no, tarih, musteri_unvan, telefon_val, arac_plakasi_val, cekici_dorse_val,
+                      marka_model_val, talep_edilen_isler_val, musteri_sikayeti_val, yapilan_is_val,
+                      baslama_saati_val, bitis_saati_val, kullanilan_urunler_val, toplam_tutar, tc_kimlik_no_val, odeme_durumu_val,
+                      tarih_donemi(tarih)))
             return (True, "İş evrakı başarıyla kaydedildi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Veritabanı hatası: {str(e)}"
             print(f"İş evrakı ekleme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
     
-    def is_evraki_listele(self) -> List[Dict]:
+    def _filtre(self, arama: str = "", donem: str = "", odeme_durumu: str = "") -> Tuple[List[str], list]:
+        """Liste filtreleri: (koşullar, parametreler). donem: 'YYYY-MM'"""
+        kosullar = []
+        params = []
+        if arama:
+            kosullar.append("(musteri_unvan LIKE ? OR arac_plakasi LIKE ?)")
+            params.extend([f"%{arama}%", f"%{arama}%"])
+        if donem:
+            kosullar.append("tarih_donem = ?")
+            params.append(donem)
+        if odeme_durumu:
+            kosullar.append("odeme_durumu = ?")
+            params.append(odeme_durumu)
+        return kosullar, params
+
+    def _listele_sorgusu(self, arama: str = "", donem: str = "", odeme_durumu: str = "",
+                         sirala: Optional[str] = None, fields: Optional[str] = None) -> Tuple[str, tuple]:
+        """is_evraki_listele / is_evraki_akis için sorgu ve parametreler"""
+        kosullar, params = self._filtre(arama, donem, odeme_durumu)
+        kolon, azalan = siralama_coz(sirala, self.SIRALAMA, self.VARSAYILAN_SIRALAMA)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        query, params = sorgu_olustur("is_evraki", kosullar, params, kolon, azalan, kolonlar=kolonlar)
+        return self.db._convert_placeholders(query), params
+
+    def is_evraki_listele(self, arama: str = "", donem: str = "", odeme_durumu: str = "",
+                          sirala: Optional[str] = None, fields: Optional[str] = None) -> List[Dict]:
         """Tüm iş evraklarını listele"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        cursor.execute("SELECT * FROM is_evraki ORDER BY olusturma_tarihi DESC")
-        rows = cursor.fetchall()
-        self.db.close()
+        query, params = self._listele_sorgusu(arama, donem, odeme_durumu, sirala, fields)
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         return list(rows)
 
+    def is_evraki_akis(self, arama: str = "", donem: str = "", odeme_durumu: str = "", parti: int = 500,
+                       sirala: Optional[str] = None, fields: Optional[str] = None) -> Iterator[SatirListesi]:
+        """is_evraki_listele ile aynı sonuç; sunucu taraflı cursor ile parti parti üretilir"""
+        query, params = self._listele_sorgusu(arama, donem, odeme_durumu, sirala, fields)
+        return self.db.akis(query, params, parti)
+
+    def is_evraki_sayfa(self, arama: str = "", donem: str = "", odeme_durumu: str = "",
+                        sirala: Optional[str] = None, cursor: Optional[str] = None,
+                        limit: int = VARSAYILAN_LIMIT, toplam: bool = False,
+                        fields: Optional[str] = None) -> Dict:
+        """Keyset sayfalama ile tek sayfa (bkz. app/sayfalama.py)"""
+        kosullar, params = self._filtre(arama, donem, odeme_durumu)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        return sayfa_getir(self.db, "is_evraki", kosullar, params, self.SIRALAMA, self.VARSAYILAN_SIRALAMA,
+                           sirala, cursor, limit, toplam, kolonlar)
+
     def is_evraki_getir(self, evrak_id: int) -> Dict:
         """ID ile iş evrakı getir"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        query = "SELECT * FROM is_evraki WHERE id = ?"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (evrak_id,))
-        row = cursor.fetchone()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            query = "SELECT * FROM is_evraki WHERE id = ?"
+            query = self.db._convert_placeholders(query)
+            cursor.execute(query, (evrak_id,))
+            row = cursor.fetchone()
         return row if row else None
 
     def is_evraki_guncelle(self, evrak_id: int, is_emri_no: int, tarih: str, musteri_unvan: str,
@@ -90,108 +178,90 @@ class IsEvrakiDB:
                            kullanilan_urunler: str = "", toplam_tutar: float = 0,
                            tc_kimlik_no: str = "", odeme_durumu: str = "odenmedi") -> tuple[bool, str]:
         """İş evrakı güncelle. odeme_durumu: 'odendi' | 'odenmedi'"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            
-            check_query = "SELECT id FROM is_evraki WHERE id = ?"
-            check_query = self.db._convert_placeholders(check_query)
-            cursor.execute(check_query, (evrak_id,))
-            existing = cursor.fetchone()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
             
-            if not existing:
-                return (False, "İş evrakı bulunamadı")
+                check_query = "SELECT id FROM is_evraki WHERE id = ?"
+                check_query = self.db._convert_placeholders(check_query)
+                cursor.execute(check_query, (evrak_id,))
+                existing = cursor.fetchone()
             
-            telefon_val = telefon if telefon else None
-            arac_plakasi_val = arac_plakasi if arac_plakasi else None
-            cekici_dorse_val = cekici_dorse if cekici_dorse else None
-            marka_model_val = marka_model if marka_model else None
-            talep_edilen_isler_val = talep_edilen_isler if talep_edilen_isler else None
-            musteri_sikayeti_val = musteri_sikayeti if musteri_sikayeti else None
-            yapilan_is_val = yapilan_is if yapilan_is else None
-            baslama_saati_val = baslama_saati if baslama_saati else None
-            bitis_saati_val = bitis_saati if bitis_saati else None
-            kullanilan_urunler_val = kullanilan_urunler if kullanilan_urunler else None
-            tc_kimlik_no_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
-            odeme_durumu_val = (odeme_durumu or "odenmedi").strip() or "odenmedi"
+                if not existing:
+                    return (False, "İş evrakı bulunamadı")
             
-            query = """
-                UPDATE is_evraki 
-                SET is_emri_no = ?, tarih = ?, musteri_unvan = ?, telefon = ?, arac_plakasi = ?,
-                    cekici_dorse = ?, marka_model = ?, talep_edilen_isler = ?, musteri_sikayeti = ?,
-                    yapilan_is = ?, baslama_saati = ?, bitis_saati = ?, kullanilan_urunler = ?,
-                    toplam_tutar = ?, tc_kimlik_no = ?, odeme_durumu = ?
-                WHERE id = ?
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (is_emri_no, tarih, musteri_unvan, telefon_val, arac_plakasi_val, cekici_dorse_val,
-                  marka_model_val, talep_edilen_isler_val, musteri_sikayeti_val, yapilan_is_val,
-                  baslama_saati_val, bitis_saati_val, kullanilan_urunler_val, toplam_tutar, tc_kimlik_no_val, odeme_durumu_val, evrak_id))
-            conn.commit()
+                telefon_val = telefon if telefon else None
+                arac_plakasi_val = arac_plakasi if arac_plakasi else None
+                cekici_dorse_val = cekici_dorse if cekici_dorse else None
+                marka_model_val = marka_model if marka_model else None
+                talep_edilen_isler_val = talep_edilen_isler if talep_edilen_isler else None
+                musteri_sikayeti_val = musteri_sikayeti if musteri_sikayeti else None
+                yapilan_is_val = yapilan_is if yapilan_is else None
+                baslama_saati_val = baslama_saati if baslama_saati else None
+                bitis_saati_val = bitis_saati if bitis_saati else None
+                kullanilan_urunler_val = kullanilan_urunler if kullanilan_urunler else None
+                tc_kimlik_no_val = tc_kimlik_no.strip() if tc_kimlik_no and tc_kimlik_no.strip() else None
+                odeme_durumu_val = (odeme_durumu or "odenmedi").strip() or "odenmedi"
             
+                query = """
+                    UPDATE is_evraki 
+                    SET is_emri_no = ?, tarih = ?, musteri_unvan = ?, telefon = ?, arac_plakasi = ?,
+                        cekici_dorse = ?, marka_model = ?, talep_edilen_isler = ?, musteri_sikayeti = ?,
+                        yapilan_is = ?, baslama_saati = ?, bitis_saati = ?, kullanilan_urunler = ?,
+                        toplam_tutar = ?, tc_kimlik_no = ?, odeme_durumu = ?, tarih_donem = ?
+                    WHERE id = ?
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (is_emri_no, tarih, musteri_unvan, telefon_val, arac_plakasi_val, cekici_dorse_val,
+                      marka_model_val, talep_edilen_isler_val, musteri_sikayeti_val, yapilan_is_val,
+                      baslama_saati_val, bitis_saati_val, kullanilan_urunler_val, toplam_tutar, tc_kimlik_no_val, odeme_durumu_val,
+                      tarih_donemi(tarih), evrak_id))
             return (True, "İş evrakı başarıyla güncellendi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Güncelleme hatası: {str(e)}"
             print(f"İş evrakı güncelleme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
     
     def is_evraki_sil(self, evrak_id: int) -> tuple[bool, str]:
         """İş evrakı sil"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            query = "DELETE FROM is_evraki WHERE id = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (evrak_id,))
-            conn.commit()
-            
-            if cursor.rowcount == 0:
-                return (False, "İş evrakı bulunamadı")
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                query = "DELETE FROM is_evraki WHERE id = ?"
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (evrak_id,))
             
+                if cursor.rowcount == 0:
+                    return (False, "İş evrakı bulunamadı")
             return (True, "İş evrakı başarıyla silindi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Silme hatası: {str(e)}"
             print(f"İş evrakı silme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
     
-    def is_evraki_aylik_getir(self, ay: int, yil: int) -> List[Dict]:
-        """Belirtilen ay ve yıla ait iş evraklarını getir. tarih formatı: Gün-Ay-Yıl"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        # Örn: Ocak 2025 -> '%-1-2025'
-        pattern = f"%-{ay}-{yil}"
-        query = "SELECT * FROM is_evraki WHERE tarih LIKE ? ORDER BY tarih, is_emri_no"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (pattern,))
-        rows = cursor.fetchall()
-        self.db.close()
-        return list(rows)
+    def is_evraki_aylik_getir(self, ay: int, yil: int) -> SatirListesi:
+        """
+        Belirtilen ay ve yıla ait iş evraklarını getir (tarih_donem index'i: 'YYYY-MM').
+        Bütün ayın evrakları tek seferde okunduğundan satırlar kompakt döner (sözlük gibi okunur).
+        """
+        with self.db.okuma() as conn:
+            cursor = self.db._get_tuple_cursor(conn)
+            query = self.db._convert_placeholders(_SQL_AYLIK)
+            cursor.execute(query, (f"{yil:04d}-{ay:02d}",))
+            return satir_listesi(cursor)
 
     def is_emri_no_sonraki(self) -> int:
         """En küçük kullanılmayan pozitif iş emri numarasını döndür"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
+        with self.db.connection() as conn:
+            cursor = self.db._get_cursor(conn)
         
-        # Tüm iş emri numaralarını al (pozitif olanlar)
-        cursor.execute("SELECT DISTINCT is_emri_no FROM is_evraki WHERE is_emri_no > 0 ORDER BY is_emri_no")
-        rows = cursor.fetchall()
-        self.db.close()
+            # Tüm iş emri numaralarını al (pozitif olanlar)
+            cursor.execute(_SQL_IS_EMRI_NOLARI)
+            rows = cursor.fetchall()
 
         kullanilan_nolar = {row['is_emri_no'] for row in rows}
 
@@ -1,304 +1,303 @@
 """
 İş prosesi veritabanı işlemleri
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from .db_connection import DatabaseConnection
+from .sayfalama import VARSAYILAN_LIMIT, kolonlar_coz, sayfa_getir, siralama_coz, sorgu_olustur
+
+
+# Sık çalışan sorgular (explain_kontrol.py EXPLAIN ile index kullanımını doğrular)
+_SQL_MADDELER = "SELECT * FROM is_prosesi_maddeleri WHERE proses_id = ? ORDER BY sira_no ASC"
 
 
 class IsProsesiDB:
     """İş prosesi veritabanı işlemleri"""
+
+    # (ad, sorgu, örnek parametreler)
+    EXPLAIN_SORGULARI = [
+        ("is_prosesi_maddeleri_getir", _SQL_MADDELER, (1,)),
+    ]
+
+    # Liste sıralama anahtarları (?sirala=) -> kolon
+    SIRALAMA = {
+        "olusturma_tarihi": "olusturma_tarihi",
+        "proses_adi": "proses_adi",
+        "id": "id",
+    }
+    VARSAYILAN_SIRALAMA = "-olusturma_tarihi"
+
+    # ?fields= ile seçilebilecek kolonlar
+    KOLONLAR = (
+        "id", "proses_adi", "proses_tipi", "aciklama", "olusturma_tarihi", "guncelleme_tarihi",
+    )
+    OZET_KOLONLAR = None
     
     def __init__(self, db_conn: DatabaseConnection):
         self.db = db_conn
     
     def is_prosesi_ekle(self, proses_adi: str, aciklama: str = "", proses_tipi: Optional[str] = None) -> tuple[bool, str, Optional[int]]:
         """Yeni iş prosesi ekle. proses_tipi: Söküm, Temizlik, Revizyon, Montaj"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
             
-            aciklama_val = aciklama if aciklama else None
-            proses_tipi_val = proses_tipi if proses_tipi else None
+                aciklama_val = aciklama if aciklama else None
+                proses_tipi_val = proses_tipi if proses_tipi else None
             
-            query = """
-                INSERT INTO is_prosesi (proses_adi, proses_tipi, aciklama)
-                VALUES (?, ?, ?)
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (proses_adi, proses_tipi_val, aciklama_val))
-            conn.commit()
+                query = """
+                    INSERT INTO is_prosesi (proses_adi, proses_tipi, aciklama)
+                    VALUES (?, ?, ?)
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (proses_adi, proses_tipi_val, aciklama_val))
             
-            proses_id = cursor.lastrowid if hasattr(cursor, 'lastrowid') else None
-            if not proses_id:
-                cursor.execute("SELECT LAST_INSERT_ID()")
-                result = cursor.fetchone()
-                if result:
-                    proses_id = result.get('LAST_INSERT_ID()') or (result[0] if isinstance(result, (list, tuple)) else None)
-
+                proses_id = cursor.lastrowid
             return (True, "İş prosesi başarıyla kaydedildi", proses_id)
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Veritabanı hatası: {str(e)}"
             print(f"İş prosesi ekleme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji, None)
-        finally:
-            self.db.close()
     
-    def is_prosesi_listele(self) -> List[Dict]:
+    def _filtre(self, arama: str = "", proses_tipi: str = "") -> Tuple[List[str], list]:
+        """Liste filtreleri: (koşullar, parametreler)"""
+        kosullar = []
+        params = []
+        if arama:
+            kosullar.append("proses_adi LIKE ?")
+            params.append(f"%{arama}%")
+        if proses_tipi:
+            kosullar.append("proses_tipi = ?")
+            params.append(proses_tipi)
+        return kosullar, params
+
+    def is_prosesi_listele(self, arama: str = "", proses_tipi: str = "", sirala: Optional[str] = None,
+                           fields: Optional[str] = None) -> List[Dict]:
         """Tüm iş proseslerini listele"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        cursor.execute("SELECT * FROM is_prosesi ORDER BY olusturma_tarihi DESC")
-        rows = cursor.fetchall()
-        self.db.close()
+        kosullar, params = self._filtre(arama, proses_tipi)
+        kolon, azalan = siralama_coz(sirala, self.SIRALAMA, self.VARSAYILAN_SIRALAMA)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        query, params = sorgu_olustur("is_prosesi", kosullar, params, kolon, azalan, kolonlar=kolonlar)
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(self.db._convert_placeholders(query), params)
+            rows = cursor.fetchall()
         return list(rows)
 
+    def is_prosesi_sayfa(self, arama: str = "", proses_tipi: str = "", sirala: Optional[str] = None,
+                         cursor: Optional[str] = None, limit: int = VARSAYILAN_LIMIT, toplam: bool = False,
+                         fields: Optional[str] = None) -> Dict:
+        """Keyset sayfalama ile tek sayfa (bkz. app/sayfalama.py)"""
+        kosullar, params = self._filtre(arama, proses_tipi)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        return sayfa_getir(self.db, "is_prosesi", kosullar, params, self.SIRALAMA, self.VARSAYILAN_SIRALAMA,
+                           sirala, cursor, limit, toplam, kolonlar)
+
     def is_prosesi_getir(self, proses_id: int) -> Optional[Dict]:
         """ID ile iş prosesi getir"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        query = "SELECT * FROM is_prosesi WHERE id = ?"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (proses_id,))
-        row = cursor.fetchone()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            query = "SELECT * FROM is_prosesi WHERE id = ?"
+            query = self.db._convert_placeholders(query)
+            cursor.execute(query, (proses_id,))
+            row = cursor.fetchone()
         return row if row else None
 
     def is_prosesi_guncelle(self, proses_id: int, proses_adi: str, aciklama: str = "", proses_tipi: Optional[str] = None) -> tuple[bool, str]:
         """İş prosesi güncelle. proses_tipi: Söküm, Temizlik, Revizyon, Montaj"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
             
-            # Önce kaydın var olup olmadığını kontrol et
-            check_query = "SELECT id FROM is_prosesi WHERE id = ?"
-            check_query = self.db._convert_placeholders(check_query)
-            cursor.execute(check_query, (proses_id,))
-            existing = cursor.fetchone()
+                # Önce kaydın var olup olmadığını kontrol et
+                check_query = "SELECT id FROM is_prosesi WHERE id = ?"
+                check_query = self.db._convert_placeholders(check_query)
+                cursor.execute(check_query, (proses_id,))
+                existing = cursor.fetchone()
             
-            if not existing:
-                return (False, "İş prosesi bulunamadı")
+                if not existing:
+                    return (False, "İş prosesi bulunamadı")
             
-            aciklama_val = aciklama if aciklama else None
-            proses_tipi_val = proses_tipi if proses_tipi else None
-            
-            query = """
-                UPDATE is_prosesi 
-                SET proses_adi = ?, proses_tipi = ?, aciklama = ?
-                WHERE id = ?
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (proses_adi, proses_tipi_val, aciklama_val, proses_id))
-            conn.commit()
+                aciklama_val = aciklama if aciklama else None
+                proses_tipi_val = proses_tipi if proses_tipi else None
             
+                query = """
+                    UPDATE is_prosesi 
+                    SET proses_adi = ?, proses_tipi = ?, aciklama = ?
+                    WHERE id = ?
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (proses_adi, proses_tipi_val, aciklama_val, proses_id))
             return (True, "İş prosesi başarıyla güncellendi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Güncelleme hatası: {str(e)}"
             print(f"İş prosesi güncelleme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
     
     def is_prosesi_sil(self, proses_id: int) -> tuple[bool, str]:
         """İş prosesi sil (maddeleri de otomatik silinir - CASCADE)"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            query = "DELETE FROM is_prosesi WHERE id = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (proses_id,))
-            conn.commit()
-            
-            if cursor.rowcount == 0:
-                return (False, "İş prosesi bulunamadı")
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                query = "DELETE FROM is_prosesi WHERE id = ?"
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (proses_id,))
             
+                if cursor.rowcount == 0:
+                    return (False, "İş prosesi bulunamadı")
             return (True, "İş prosesi başarıyla silindi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Silme hatası: {str(e)}"
             print(f"İş prosesi silme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
     
     # ========== PROSES MADDELERİ İŞLEMLERİ ==========
     
     def is_prosesi_madde_ekle(self, proses_id: int, sira_no: int, madde_adi: str, aciklama: str = "", kullanilan_malzemeler: str = "") -> tuple[bool, str, Optional[int]]:
         """Yeni proses maddesi ekle"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
             
-            aciklama_val = aciklama if aciklama else None
-            kullanilan_malzemeler_val = kullanilan_malzemeler if kullanilan_malzemeler else None
+                aciklama_val = aciklama if aciklama else None
+                kullanilan_malzemeler_val = kullanilan_malzemeler if kullanilan_malzemeler else None
             
-            query = """
-                INSERT INTO is_prosesi_maddeleri (proses_id, sira_no, madde_adi, aciklama, kullanilan_malzemeler)
-                VALUES (?, ?, ?, ?, ?)
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (proses_id, sira_no, madde_adi, aciklama_val, kullanilan_malzemeler_val))
-            conn.commit()
+                query = """
+                    INSERT INTO is_prosesi_maddeleri (proses_id, sira_no, madde_adi, aciklama, kullanilan_malzemeler)
+                    VALUES (?, ?, ?, ?, ?)
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (proses_id, sira_no, madde_adi, aciklama_val, kullanilan_malzemeler_val))
             
-            madde_id = cursor.lastrowid if hasattr(cursor, 'lastrowid') else None
-            if not madde_id:
-                cursor.execute("SELECT LAST_INSERT_ID()")
-                result = cursor.fetchone()
-                if result:
-                    madde_id = result.get('LAST_INSERT_ID()') or (result[0] if isinstance(result, (list, tuple)) else None)
-
+                madde_id = cursor.lastrowid
             return (True, "Proses maddesi başarıyla kaydedildi", madde_id)
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Veritabanı hatası: {str(e)}"
             print(f"Proses maddesi ekleme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji, None)
-        finally:
-            self.db.close()
     
+    def is_prosesi_madde_ekle_bulk(self, proses_id: int, maddeler: List[Dict]) -> List[tuple[bool, str]]:
+        """
+        Prosese birden çok madde ekle (tek transaction, çok satırlı INSERT).
+        maddeler: sira_no, madde_adi, aciklama, kullanilan_malzemeler anahtarlı sözlükler.
+        Dönüş: her madde için (başarılı, mesaj), aynı sırada.
+        """
+        satirlar = [
+            (proses_id, m.get("sira_no"), m.get("madde_adi"),
+             m.get("aciklama") or None, m.get("kullanilan_malzemeler") or None)
+            for m in maddeler
+        ]
+        return self.db.toplu_ekle(
+            "is_prosesi_maddeleri",
+            ("proses_id", "sira_no", "madde_adi", "aciklama", "kullanilan_malzemeler"),
+            satirlar,
+            butunluk_mesaji="İş prosesi bulunamadı veya madde geçersiz",
+        )
+
     def is_prosesi_maddeleri_getir(self, proses_id: int) -> List[Dict]:
         """Proses maddelerini getir"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        query = "SELECT * FROM is_prosesi_maddeleri WHERE proses_id = ? ORDER BY sira_no ASC"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (proses_id,))
-        rows = cursor.fetchall()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            query = _SQL_MADDELER
+            query = self.db._convert_placeholders(query)
+            cursor.execute(query, (proses_id,))
+            rows = cursor.fetchall()
         return list(rows)
 
     def is_prosesi_madde_guncelle(self, madde_id: int, sira_no: int, madde_adi: str, 
                                    aciklama: str = "", kullanilan_malzemeler: str = "", tamamlandi: bool = False) -> tuple[bool, str]:
         """Proses maddesi güncelle"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
             
-            # Önce kaydın var olup olmadığını kontrol et
-            check_query = "SELECT id FROM is_prosesi_maddeleri WHERE id = ?"
-            check_query = self.db._convert_placeholders(check_query)
-            cursor.execute(check_query, (madde_id,))
-            existing = cursor.fetchone()
+                # Önce kaydın var olup olmadığını kontrol et
+                check_query = "SELECT id FROM is_prosesi_maddeleri WHERE id = ?"
+                check_query = self.db._convert_placeholders(check_query)
+                cursor.execute(check_query, (madde_id,))
+                existing = cursor.fetchone()
             
-            if not existing:
-                return (False, "Proses maddesi bulunamadı")
+                if not existing:
+                    return (False, "Proses maddesi bulunamadı")
             
-            aciklama_val = aciklama if aciklama else None
-            kullanilan_malzemeler_val = kullanilan_malzemeler if kullanilan_malzemeler else None
+                aciklama_val = aciklama if aciklama else None
+                kullanilan_malzemeler_val = kullanilan_malzemeler if kullanilan_malzemeler else None
             
-            tamamlanma_tarihi = "CURRENT_TIMESTAMP" if tamamlandi else None
-            tamamlandi_val = tamamlandi
+                tamamlanma_tarihi = "CURRENT_TIMESTAMP" if tamamlandi else None
+                tamamlandi_val = tamamlandi
 
-            if tamamlanma_tarihi:
-                query = """
-                    UPDATE is_prosesi_maddeleri 
-                    SET sira_no = ?, madde_adi = ?, aciklama = ?, kullanilan_malzemeler = ?, tamamlandi = ?, tamamlanma_tarihi = {}
-                    WHERE id = ?
-                """.format(tamamlanma_tarihi)
-            else:
-                query = """
-                    UPDATE is_prosesi_maddeleri 
-                    SET sira_no = ?, madde_adi = ?, aciklama = ?, kullanilan_malzemeler = ?, tamamlandi = ?, tamamlanma_tarihi = NULL
-                    WHERE id = ?
-                """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (sira_no, madde_adi, aciklama_val, kullanilan_malzemeler_val, tamamlandi_val, madde_id))
-            conn.commit()
-            
+                if tamamlanma_tarihi:
+                    query = """
+                        UPDATE is_prosesi_maddeleri 
+                        SET sira_no = ?, madde_adi = ?, aciklama = ?, kullanilan_malzemeler = ?, tamamlandi = ?, tamamlanma_tarihi = {}
+                        WHERE id = ?
+                    """.format(tamamlanma_tarihi)
+                else:
+                    query = """
+                        UPDATE is_prosesi_maddeleri 
+                        SET sira_no = ?, madde_adi = ?, aciklama = ?, kullanilan_malzemeler = ?, tamamlandi = ?, tamamlanma_tarihi = NULL
+                        WHERE id = ?
+                    """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (sira_no, madde_adi, aciklama_val, kullanilan_malzemeler_val, tamamlandi_val, madde_id))
             return (True, "Proses maddesi başarıyla güncellendi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Güncelleme hatası: {str(e)}"
             print(f"Proses maddesi güncelleme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
     
     def is_prosesi_madde_sil(self, madde_id: int) -> tuple[bool, str]:
         """Proses maddesi sil"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            query = "DELETE FROM is_prosesi_maddeleri WHERE id = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (madde_id,))
-            conn.commit()
-            
-            if cursor.rowcount == 0:
-                return (False, "Proses maddesi bulunamadı")
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                query = "DELETE FROM is_prosesi_maddeleri WHERE id = ?"
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (madde_id,))
             
+                if cursor.rowcount == 0:
+                    return (False, "Proses maddesi bulunamadı")
             return (True, "Proses maddesi başarıyla silindi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Silme hatası: {str(e)}"
             print(f"Proses maddesi silme hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
     
     def is_prosesi_tamamla_madde(self, madde_id: int, tamamlandi: bool = True) -> tuple[bool, str]:
         """Proses maddesini tamamlandı olarak işaretle"""
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            tamamlandi_val = tamamlandi
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                tamamlandi_val = tamamlandi
 
-            if tamamlandi:
-                query = """
-                    UPDATE is_prosesi_maddeleri 
-                    SET tamamlandi = %s, tamamlanma_tarihi = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                """
-            else:
-                query = """
-                    UPDATE is_prosesi_maddeleri 
-                    SET tamamlandi = %s, tamamlanma_tarihi = NULL
-                    WHERE id = %s
-                """
-            cursor.execute(query, (tamamlandi_val, madde_id))
-            conn.commit()
-            
+                if tamamlandi:
+                    query = """
+                        UPDATE is_prosesi_maddeleri 
+                        SET tamamlandi = %s, tamamlanma_tarihi = CURRENT_TIMESTAMP
+                        WHERE id = %s
+                    """
+                else:
+                    query = """
+                        UPDATE is_prosesi_maddeleri 
+                        SET tamamlandi = %s, tamamlanma_tarihi = NULL
+                        WHERE id = %s
+                    """
+                cursor.execute(query, (tamamlandi_val, madde_id))
             return (True, "Proses maddesi durumu güncellendi")
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             hata_mesaji = f"Güncelleme hatası: {str(e)}"
             print(f"Proses maddesi tamamlama hatası: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
             return (False, hata_mesaji)
-        finally:
-            self.db.close()
@@ -0,0 +1,345 @@
+"""
+Sorgu düzeyi ölçüm - mantıksal DB metodu başına süre, bağlantı alma süresi, sorgu sayısı,
+dönen satır ve okunan bayt; eşik üstü sorgular için yavaş sorgu logu.
+
+Mantıksal metod, router'ın çağırdığı en dıştaki metottur (örn. CariDB.cari_ekle_tc_kontrolu_ile);
+içinden çağrılan diğer metodların sorguları ona yazılır. AsyncDatabase her çağrıyı olc() ile sarar,
+DatabaseConnection cursor'ları olculen_cursor() ile sarar ve havuzdan bağlantı alma süresini bildirir.
+Ayarlar: DB_YAVAS_SORGU_MS (varsayılan 200) - bu süreyi aşan sorgu parametre şekliyle loglanır.
+
+Ayrıca HTTP isteği başına sayaç (IstekSayaci): sorgu, bağlantı ve aynı ifadenin tekrar sayısı;
+sorgu bütçesi ve N+1 kontrolü bunu kullanır (app/sorgu_butcesi.py).
+"""
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence
+
+YAVAS_SORGU_MS = float(os.getenv("DB_YAVAS_SORGU_MS", "200"))
+
+# Histogram kova üst sınırları
+SURE_SINIRLARI_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SAYI_SINIRLARI = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SATIR_SINIRLARI = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+BAYT_SINIRLARI = (0, 1024, 8192, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Sabit kovalı histogram (Prometheus gibi: her kova kendi sınırına kadar olan gözlemleri sayar)"""
+
+    __slots__ = ("sinirlar", "kovalar", "sayi", "toplam", "max")
+
+    def __init__(self, sinirlar: Sequence[float]):
+        self.sinirlar = tuple(sinirlar)
+        self.kovalar = [0] * (len(self.sinirlar) + 1)  # son kova: +Inf
+        self.sayi = 0
+        self.toplam = 0.0
+        self.max = 0.0
+
+    def ekle(self, deger: float) -> None:
+        self.kovalar[bisect_left(self.sinirlar, deger)] += 1
+        self.sayi += 1
+        self.toplam += deger
+        if deger > self.max:
+            self.max = deger
+
+    def sozluk(self) -> dict:
+        kumulatif = {}
+        birikim = 0
+        for sinir, adet in zip(self.sinirlar, self.kovalar):
+            birikim += adet
+            kumulatif[f"le_{sinir:g}"] = birikim
+        kumulatif["le_inf"] = self.sayi
+        return {
+            "sayi": self.sayi,
+            "toplam": round(self.toplam, 3),
+            "ort": round(self.toplam / self.sayi, 3) if self.sayi else 0.0,
+            "max": round(self.max, 3),
+            "kovalar": kumulatif,
+        }
+
+
+class _MetodMetrik:
+    """Tek bir mantıksal DB metodunun histogramları"""
+
+    __slots__ = ("hata", "yavas", "sure_ms", "baglanti_ms", "sorgu", "satir", "bayt")
+
+    def __init__(self):
+        self.hata = 0
+        self.yavas = 0
+        self.sure_ms = Histogram(SURE_SINIRLARI_MS)
+        self.baglanti_ms = Histogram(SURE_SINIRLARI_MS)
+        self.sorgu = Histogram(SAYI_SINIRLARI)
+        self.satir = Histogram(SATIR_SINIRLARI)
+        self.bayt = Histogram(BAYT_SINIRLARI)
+
+    def sozluk(self) -> dict:
+        return {
+            "cagri": self.sure_ms.sayi,
+            "hata": self.hata,
+            "yavas_sorgu": self.yavas,
+            "sure_ms": self.sure_ms.sozluk(),
+            "baglanti_ms": self.baglanti_ms.sozluk(),
+            "sorgu": self.sorgu.sozluk(),
+            "satir": self.satir.sozluk(),
+            "bayt": self.bayt.sozluk(),
+        }
+
+
+_metrikler: Dict[str, _MetodMetrik] = {}
+_kilit = threading.Lock()
+
+
+class Olcum:
+    """
+    Bir mantıksal metod çağrısının sayaçları. Akışlı okumada (AsyncDatabase.akis) aynı ölçüm
+    her parti için tekrar etkinleştirilir; süre yalnızca DB'de geçen zamanı içerir.
+    """
+
+    __slots__ = ("ad", "sure", "baglanti_sure", "baglanti", "sorgu", "satir", "bayt", "yavas")
+
+    def __init__(self, ad: str):
+        self.ad = ad
+        self.sure = 0.0
+        self.baglanti_sure = 0.0
+        self.baglanti = 0
+        self.sorgu = 0
+        self.satir = 0
+        self.bayt = 0
+        self.yavas = 0
+
+    @contextmanager
+    def etkin(self):
+        """Blok süresince bu thread / görevdeki sorgular bu ölçüme yazılır"""
+        token = _aktif_olcum.set(self)
+        baslangic = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.sure += time.perf_counter() - baslangic
+            _aktif_olcum.reset(token)
+
+    def kaydet(self, hata: bool = False) -> None:
+        with _kilit:
+            m = _metrikler.get(self.ad)
+            if m is None:
+                m = _metrikler[self.ad] = _MetodMetrik()
+            m.hata += hata
+            m.yavas += self.yavas
+            m.sure_ms.ekle(self.sure * 1000)
+            m.baglanti_ms.ekle(self.baglanti_sure * 1000)
+            m.sorgu.ekle(self.sorgu)
+            m.satir.ekle(self.satir)
+            m.bayt.ekle(self.bayt)
+
+
+_aktif_olcum: ContextVar[Optional[Olcum]] = ContextVar("db_olcum", default=None)
+
+
+@contextmanager
+def olc(ad: str):
+    """
+    Mantıksal metod ölçümü. İç içe çağrılırsa dıştaki ölçüm sürer (iç metodun sorguları dışa yazılır).
+    """
+    if _aktif_olcum.get() is not None:
+        yield _aktif_olcum.get()
+        return
+    olcum = Olcum(ad)
+    hata = False
+    try:
+        with olcum.etkin():
+            yield olcum
+    except BaseException:
+        hata = True
+        raise
+    finally:
+        olcum.kaydet(hata)
+
+
+class IstekSayaci:
+    """
+    Tek HTTP isteğinin DB gidiş-dönüşleri. İsteğin DB çağrıları farklı executor thread'lerinde
+    (gerekirse aynı anda) çalışabildiğinden sayaçlar kilitle güncellenir.
+    """
+
+    __slots__ = ("sorgu", "baglanti", "ifadeler", "_kilit")
+
+    def __init__(self):
+        self.sorgu = 0
+        self.baglanti = 0
+        self.ifadeler: Counter = Counter()
+        self._kilit = threading.Lock()
+
+    def sorgu_ekle(self, query: str) -> None:
+        with self._kilit:
+            self.sorgu += 1
+            self.ifadeler[query] += 1
+
+    def baglanti_ekle(self) -> None:
+        with self._kilit:
+            self.baglanti += 1
+
+    def en_cok_tekrarlanan(self):
+        """(sorgu metni, tekrar sayısı) veya sorgu yoksa None"""
+        with self._kilit:
+            en_cok = self.ifadeler.most_common(1)
+        return en_cok[0] if en_cok else None
+
+
+_istek_sayaci: ContextVar[Optional[IstekSayaci]] = ContextVar("db_istek_sayaci", default=None)
+
+
+def istek_sayaci_ac():
+    """Yeni istek sayacı başlat (HTTP middleware): (sayaç, token)"""
+    sayac = IstekSayaci()
+    return sayac, _istek_sayaci.set(sayac)
+
+
+def istek_sayaci_kapat(token) -> None:
+    _istek_sayaci.reset(token)
+
+
+def baglanti_alindi(sure: float) -> None:
+    """DatabaseConnection havuzdan bağlantı aldığında (bekleme + gerekirse bağlanma süresi, saniye)"""
+    olcum = _aktif_olcum.get()
+    if olcum is not None:
+        olcum.baglanti += 1
+        olcum.baglanti_sure += sure
+    sayac = _istek_sayaci.get()
+    if sayac is not None:
+        sayac.baglanti_ekle()
+
+
+_BOSLUK = re.compile(r"\s+")
+
+
+def _parametre_sekli(params) -> str:
+    """Parametre değerleri yerine tipleri ve uzunlukları: (int, str[11], None)"""
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: {_deger_sekli(v)}" for k, v in params.items()) + "}"
+    return "(" + ", ".join(_deger_sekli(p) for p in params) + ")"
+
+
+def _deger_sekli(deger) -> str:
+    if deger is None:
+        return "None"
+    if isinstance(deger, (str, bytes)):
+        return f"{type(deger).__name__}[{len(deger)}]"
+    return type(deger).__name__
+
+
+def _satir_bayt(satir) -> int:
+    """Satırın yaklaşık boyutu: metin / bayt uzunluğu, diğer değerler 8 bayt"""
+    degerler = satir.values() if isinstance(satir, dict) else satir
+    toplam = 0
+    for deger in degerler:
+        if isinstance(deger, (str, bytes)):
+            toplam += len(deger)
+        elif deger is not None:
+            toplam += 8
+    return toplam
+
+
+def sorgu_ozeti(query: str, uzunluk: int = 300) -> str:
+    """Log için tek satır, kısaltılmış sorgu metni"""
+    sorgu = _BOSLUK.sub(" ", query).strip()
+    return sorgu[:uzunluk] + "..." if len(sorgu) > uzunluk else sorgu
+
+
+def _yavas_logla(olcum: Optional[Olcum], sure: float, query: str, sekil: str) -> None:
+    if olcum is not None:
+        olcum.yavas += 1
+    sorgu = sorgu_ozeti(query)
+    ad = olcum.ad if olcum is not None else "-"
+    print(f"🐢 Yavaş sorgu ({sure * 1000:.1f} ms) {ad}: {sorgu} | parametreler: {sekil}")
+
+
+class _OlculenCursor:
+    """pymysql / SQLite cursor'ını saran ölçüm katmanı; diğer her şey alttaki cursor'a iletilir"""
+
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, ad):
+        return getattr(self._cursor, ad)
+
+    def _calistir(self, metod, query, params, sekil):
+        olcum = _aktif_olcum.get()
+        baslangic = time.perf_counter()
+        try:
+            return metod(query, params)
+        finally:
+            sure = time.perf_counter() - baslangic
+            if olcum is not None:
+                olcum.sorgu += 1
+            sayac = _istek_sayaci.get()
+            if sayac is not None:
+                sayac.sorgu_ekle(query)
+            if sure * 1000 >= YAVAS_SORGU_MS:
+                _yavas_logla(olcum, sure, query, sekil())
+
+    def execute(self, query, params=None):
+        return self._calistir(self._cursor.execute, query, params, lambda: _parametre_sekli(params))
+
+    def executemany(self, query, seq_of_params):
+        seq_of_params = list(seq_of_params)
+
+        def sekil():
+            ilk = _parametre_sekli(seq_of_params[0]) if seq_of_params else "()"
+            return f"{len(seq_of_params)} x {ilk}"
+
+        return self._calistir(self._cursor.executemany, query, seq_of_params, sekil)
+
+    def _okundu(self, satirlar) -> None:
+        olcum = _aktif_olcum.get()
+        if olcum is not None and satirlar:
+            olcum.satir += len(satirlar)
+            olcum.bayt += sum(_satir_bayt(s) for s in satirlar)
+
+    def fetchone(self):
+        satir = self._cursor.fetchone()
+        if satir is not None:
+            self._okundu((satir,))
+        return satir
+
+    def fetchmany(self, size=None):
+        satirlar = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._okundu(satirlar)
+        return satirlar
+
+    def fetchall(self):
+        satirlar = self._cursor.fetchall()
+        self._okundu(satirlar)
+        return satirlar
+
+    def __iter__(self):
+        for satir in self._cursor:
+            self._okundu((satir,))
+            yield satir
+
+
+def olculen_cursor(cursor):
+    return _OlculenCursor(cursor)
+
+
+def db_metrikleri() -> dict:
+    """Metod bazında histogramlar (süreler ms, bayt yaklaşık)"""
+    with _kilit:
+        return {
+            "yavas_sorgu_esik_ms": YAVAS_SORGU_MS,
+            "metodlar": {ad: m.sozluk() for ad, m in sorted(_metrikler.items())},
+        }
+
+
+def db_metriklerini_sifirla() -> None:
+    with _kilit:
+        _metrikler.clear()
@@ -0,0 +1,214 @@
+"""
+Veritabanı bağlantı havuzu - thread-safe, sınırlı boyutlu
+Bağlantılar tekrar kullanılır; her istek havuzdan kendi bağlantısını alır.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+
+
+class HavuzZamanAsimi(HTTPException):
+    """Havuzda belirtilen süre içinde boş bağlantı bulunamadı - istek 503 + Retry-After ile reddedilir (ExecutorDolu gibi)."""
+
+    def __init__(self, mesaj: str, retry_after: int = 1):
+        super().__init__(
+            status_code=503,
+            detail=f"{mesaj}. Lütfen {retry_after} saniye sonra tekrar deneyin.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class _HavuzBaglantisi:
+    """Havuzdaki fiziksel bağlantı ve yaşam bilgisi"""
+
+    __slots__ = ("conn", "olusturma", "son_kullanim")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.olusturma = time.monotonic()
+        self.son_kullanim = self.olusturma
+
+
+class ConnectionPool:
+    """
+    Sınırlı boyutlu bağlantı havuzu.
+    - pool_size: havuzda boşta tutulabilecek kalıcı bağlantı sayısı
+    - max_overflow: yoğunlukta pool_size üzerine açılabilecek geçici bağlantı sayısı
+    - timeout: boş bağlantı beklenecek en uzun süre (saniye)
+    - recycle: bu süreden (saniye) eski bağlantılar kapatılıp yenisi açılır
+    - ping_interval: bu süreden uzun boşta kalan bağlantı alınırken ping ile doğrulanır
+    """
+
+    def __init__(
+        self,
+        creator: Callable,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        timeout: float = 30.0,
+        recycle: float = 3600.0,
+        ping_interval: float = 30.0,
+    ):
+        self._creator = creator
+        self.pool_size = max(1, int(pool_size))
+        self.max_overflow = max(0, int(max_overflow))
+        self.timeout = float(timeout)
+        self.recycle = float(recycle)
+        self.ping_interval = float(ping_interval)
+
+        self._bosta: deque = deque()
+        self._kullanimda = {}
+        self._kosul = threading.Condition(threading.Lock())
+        self._acik_sayisi = 0
+        self._kapali = False
+
+        self._istatistik = {
+            "olusturulan": 0,
+            "kapatilan": 0,
+            "alinan": 0,
+            "iade": 0,
+            "ping_hatasi": 0,
+            "yenilenen": 0,
+            "zaman_asimi": 0,
+            "toplam_bekleme_ms": 0.0,
+        }
+
+    # ---------- İç yardımcılar ----------
+
+    def _yeni_baglanti(self) -> _HavuzBaglantisi:
+        conn = self._creator()
+        with self._kosul:
+            self._istatistik["olusturulan"] += 1
+        return _HavuzBaglantisi(conn)
+
+    def _kapat(self, kayit: _HavuzBaglantisi) -> None:
+        try:
+            kayit.conn.close()
+        except Exception:
+            pass
+        with self._kosul:
+            self._istatistik["kapatilan"] += 1
+
+    def _gecerli_mi(self, kayit: _HavuzBaglantisi) -> bool:
+        """Süresi dolmuş bağlantıyı eler, uzun süre boşta kalanı ping ile doğrular."""
+        simdi = time.monotonic()
+        if self.recycle > 0 and simdi - kayit.olusturma > self.recycle:
+            with self._kosul:
+                self._istatistik["yenilenen"] += 1
+            return False
+        if simdi - kayit.son_kullanim > self.ping_interval:
+            try:
+                kayit.conn.ping(reconnect=False)
+            except Exception:
+                with self._kosul:
+                    self._istatistik["ping_hatasi"] += 1
+                return False
+        return True
+
+    # ---------- Genel arayüz ----------
+
+    def acquire(self):
+        """Havuzdan bağlantı al. Boş bağlantı yoksa ve limit doluysa timeout kadar bekler."""
+        baslangic = time.monotonic()
+        son_an = baslangic + self.timeout
+        while True:
+            kayit = None
+            yeni_ac = False
+            with self._kosul:
+                if self._kapali:
+                    raise RuntimeError("Bağlantı havuzu kapatıldı")
+                while not self._bosta and self._acik_sayisi >= self.pool_size + self.max_overflow:
+                    kalan = son_an - time.monotonic()
+                    if kalan <= 0:
+                        self._istatistik["zaman_asimi"] += 1
+                        raise HavuzZamanAsimi(
+                            f"Veritabanı bağlantı havuzu dolu ({self._acik_sayisi} bağlantı kullanımda)"
+                        )
+                    self._kosul.wait(kalan)
+                if self._bosta:
+                    kayit = self._bosta.pop()
+                else:
+                    self._acik_sayisi += 1
+                    yeni_ac = True
+
+            if yeni_ac:
+                try:
+                    kayit = self._yeni_baglanti()
+                except Exception:
+                    with self._kosul:
+                        self._acik_sayisi -= 1
+                        self._kosul.notify()
+                    raise
+            elif not self._gecerli_mi(kayit):
+                self._kapat(kayit)
+                try:
+                    kayit = self._yeni_baglanti()
+                except Exception:
+                    with self._kosul:
+                        self._acik_sayisi -= 1
+                        self._kosul.notify()
+                    raise
+
+            with self._kosul:
+                self._kullanimda[id(kayit.conn)] = kayit
+                self._istatistik["alinan"] += 1
+                self._istatistik["toplam_bekleme_ms"] += (time.monotonic() - baslangic) * 1000
+            return kayit.conn
+
+    def release(self, conn, bozuk: bool = False) -> None:
+        """Bağlantıyı havuza iade et. bozuk=True ise (veya havuz doluysa) bağlantı kapatılır."""
+        with self._kosul:
+            kayit = self._kullanimda.pop(id(conn), None)
+            if kayit is None:
+                return
+            self._istatistik["iade"] += 1
+            kayit.son_kullanim = time.monotonic()
+            sakla = not bozuk and not self._kapali and len(self._bosta) < self.pool_size
+            if sakla:
+                self._bosta.append(kayit)
+            else:
+                self._acik_sayisi -= 1
+            self._kosul.notify()
+        if not sakla:
+            self._kapat(kayit)
+
+    def dogrulama_iste(self) -> None:
+        """
+        Boştaki bağlantıların hepsi bir sonraki alınışta ping ile doğrulansın
+        (bir bağlantı koptuğunda; örn. sunucu yeniden başladıysa diğerleri de kopuktur).
+        """
+        with self._kosul:
+            for kayit in self._bosta:
+                kayit.son_kullanim = float("-inf")
+
+    def dispose(self) -> None:
+        """Boştaki tüm bağlantıları kapat. Kullanımdaki bağlantılar iade edilince kapanır."""
+        with self._kosul:
+            bostakiler = list(self._bosta)
+            self._bosta.clear()
+            self._acik_sayisi -= len(bostakiler)
+            self._kosul.notify_all()
+        for kayit in bostakiler:
+            self._kapat(kayit)
+
+    def close(self) -> None:
+        """Havuzu kalıcı olarak kapat."""
+        with self._kosul:
+            self._kapali = True
+        self.dispose()
+
+    def stats(self) -> dict:
+        """Havuz istatistikleri (izleme / boyutlandırma için)"""
+        with self._kosul:
+            alinan = self._istatistik["alinan"]
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "acik": self._acik_sayisi,
+                "bosta": len(self._bosta),
+                "kullanimda": len(self._kullanimda),
+                **{k: v for k, v in self._istatistik.items() if k != "toplam_bekleme_ms"},
+                "ortalama_bekleme_ms": round(self._istatistik["toplam_bekleme_ms"] / alinan, 3) if alinan else 0.0,
+            }
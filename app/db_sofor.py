@@ -4,6 +4,7 @@ SRC / ehliyet / psikoteknik bitiş tarihleri ileride uyarı mantığı için DAT
 """
 from typing import Optional, List, Dict, Tuple
 from .db_connection import DatabaseConnection
+from .sayfalama import VARSAYILAN_LIMIT, kolonlar_coz, sayfa_getir, siralama_coz, sorgu_olustur
 
 SOFOR_DURUMLARI = ("aktif", "pasif")
 
@@ -11,6 +12,30 @@ SOFOR_DURUMLARI = ("aktif", "pasif")
 class SoforDB:
     """Şoför kayıtları"""
 
+    # Liste sıralama anahtarları (?sirala=) -> kolon
+    SIRALAMA = {
+        "ad_soyad": "ad_soyad",
+        "ise_baslama_tarihi": "ise_baslama_tarihi",
+        "src_bitis_tarihi": "src_bitis_tarihi",
+        "ehliyet_bitis_tarihi": "ehliyet_bitis_tarihi",
+        "psikoteknik_bitis": "psikoteknik_bitis",
+        "olusturma_tarihi": "olusturma_tarihi",
+        "id": "id",
+    }
+    VARSAYILAN_SIRALAMA = "ad_soyad"
+
+    # ?fields= ile seçilebilecek kolonlar; varsayılan liste görünümü OZET_KOLONLAR (TEXT alanlar sadece detayda)
+    KOLONLAR = (
+        "id", "ad_soyad", "tc_kimlik_no", "telefon", "email", "adres", "ise_baslama_tarihi",
+        "src_belge_no", "src_bitis_tarihi", "ehliyet_sinifi", "ehliyet_bitis_tarihi",
+        "psikoteknik_bitis", "acil_iletisim", "iban", "durum", "olusturma_tarihi",
+        "guncelleme_tarihi",
+    )
+    OZET_KOLONLAR = (
+        "id", "ad_soyad", "tc_kimlik_no", "telefon", "src_bitis_tarihi", "ehliyet_bitis_tarihi",
+        "psikoteknik_bitis", "durum",
+    )
+
     def __init__(self, db_conn: DatabaseConnection):
         self.db = db_conn
 
@@ -38,51 +63,44 @@ class SoforDB:
             return (False, "Ad soyad, TC kimlik no ve telefon zorunludur.")
         if durum not in SOFOR_DURUMLARI:
             durum = "aktif"
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = """
-                INSERT INTO sofor (
-                    ad_soyad, tc_kimlik_no, telefon, email, adres,
-                    ise_baslama_tarihi, src_belge_no, src_bitis_tarihi,
-                    ehliyet_sinifi, ehliyet_bitis_tarihi, psikoteknik_bitis,
-                    acil_iletisim, iban, durum
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            q = self.db._convert_placeholders(q)
-            cursor.execute(
-                q,
-                (
-                    ad_soyad,
-                    tc_kimlik_no,
-                    telefon,
-                    email or None,
-                    adres or None,
-                    ise_baslama_tarihi,
-                    src_belge_no.strip(),
-                    src_bitis_tarihi,
-                    ehliyet_sinifi.strip(),
-                    ehliyet_bitis_tarihi,
-                    psikoteknik_bitis,
-                    acil_iletisim.strip(),
-                    iban or None,
-                    durum,
-                ),
-            )
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = """
+                    INSERT INTO sofor (
+                        ad_soyad, tc_kimlik_no, telefon, email, adres,
+                        ise_baslama_tarihi, src_belge_no, src_bitis_tarihi,
+                        ehliyet_sinifi, ehliyet_bitis_tarihi, psikoteknik_bitis,
+                        acil_iletisim, iban, durum
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                q = self.db._convert_placeholders(q)
+                cursor.execute(
+                    q,
+                    (
+                        ad_soyad,
+                        tc_kimlik_no,
+                        telefon,
+                        email or None,
+                        adres or None,
+                        ise_baslama_tarihi,
+                        src_belge_no.strip(),
+                        src_bitis_tarihi,
+                        ehliyet_sinifi.strip(),
+                        ehliyet_bitis_tarihi,
+                        psikoteknik_bitis,
+                        acil_iletisim.strip(),
+                        iban or None,
+                        durum,
+                    ),
+                )
             return (True, "Şoför eklendi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             if self.db._is_integrity_error(e):
                 return (False, "Bu TC kimlik numarası zaten kayıtlı.")
             return (False, str(e))
-        finally:
-            self.db.close()
 
     def sofor_guncelle(
         self,
@@ -109,106 +127,103 @@ class SoforDB:
             return (False, "Ad soyad, TC kimlik no ve telefon zorunludur.")
         if durum not in SOFOR_DURUMLARI:
             durum = "aktif"
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = """
-                UPDATE sofor SET
-                    ad_soyad=?, tc_kimlik_no=?, telefon=?, email=?, adres=?,
-                    ise_baslama_tarihi=?, src_belge_no=?, src_bitis_tarihi=?,
-                    ehliyet_sinifi=?, ehliyet_bitis_tarihi=?, psikoteknik_bitis=?,
-                    acil_iletisim=?, iban=?, durum=?,
-                    guncelleme_tarihi=CURRENT_TIMESTAMP
-                WHERE id=?
-            """
-            q = self.db._convert_placeholders(q)
-            cursor.execute(
-                q,
-                (
-                    ad_soyad,
-                    tc_kimlik_no,
-                    telefon,
-                    email or None,
-                    adres or None,
-                    ise_baslama_tarihi,
-                    src_belge_no.strip(),
-                    src_bitis_tarihi,
-                    ehliyet_sinifi.strip(),
-                    ehliyet_bitis_tarihi,
-                    psikoteknik_bitis,
-                    acil_iletisim.strip(),
-                    iban or None,
-                    durum,
-                    sofor_id,
-                ),
-            )
-            conn.commit()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = """
+                    UPDATE sofor SET
+                        ad_soyad=?, tc_kimlik_no=?, telefon=?, email=?, adres=?,
+                        ise_baslama_tarihi=?, src_belge_no=?, src_bitis_tarihi=?,
+                        ehliyet_sinifi=?, ehliyet_bitis_tarihi=?, psikoteknik_bitis=?,
+                        acil_iletisim=?, iban=?, durum=?,
+                        guncelleme_tarihi=CURRENT_TIMESTAMP
+                    WHERE id=?
+                """
+                q = self.db._convert_placeholders(q)
+                cursor.execute(
+                    q,
+                    (
+                        ad_soyad,
+                        tc_kimlik_no,
+                        telefon,
+                        email or None,
+                        adres or None,
+                        ise_baslama_tarihi,
+                        src_belge_no.strip(),
+                        src_bitis_tarihi,
+                        ehliyet_sinifi.strip(),
+                        ehliyet_bitis_tarihi,
+                        psikoteknik_bitis,
+                        acil_iletisim.strip(),
+                        iban or None,
+                        durum,
+                        sofor_id,
+                    ),
+                )
             return (True, "Şoför güncellendi.")
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             if self.db._is_integrity_error(e):
                 return (False, "Bu TC kimlik numarası başka bir kayıtta kullanılıyor.")
             return (False, str(e))
-        finally:
-            self.db.close()
 
     def sofor_sil(self, sofor_id: int) -> bool:
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            q = "DELETE FROM sofor WHERE id = ?"
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, (sofor_id,))
-            conn.commit()
-            self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                q = "DELETE FROM sofor WHERE id = ?"
+                q = self.db._convert_placeholders(q)
+                cursor.execute(q, (sofor_id,))
             return True
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
-            self.db.close()
+            if self.db._is_transient_error(e):
+                raise
             print(f"Şoför silme hatası: {e}")
             return False
 
-    def sofor_listele(self, arama: str = "", durum: Optional[str] = None) -> List[Dict]:
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        if arama or durum:
-            conditions = []
-            params = []
-            if arama:
-                conditions.append(
-                    "(ad_soyad LIKE ? OR tc_kimlik_no LIKE ? OR telefon LIKE ? OR src_belge_no LIKE ?)"
-                )
-                p = f"%{arama}%"
-                params.extend([p, p, p, p])
-            if durum:
-                conditions.append("durum = ?")
-                params.append(durum)
-            where = " AND ".join(conditions)
-            q = f"SELECT * FROM sofor WHERE {where} ORDER BY ad_soyad"
-            q = self.db._convert_placeholders(q)
-            cursor.execute(q, tuple(params))
-        else:
-            cursor.execute("SELECT * FROM sofor ORDER BY ad_soyad")
-        rows = cursor.fetchall()
-        self.db.close()
+    def _filtre(self, arama: str = "", durum: Optional[str] = None) -> Tuple[List[str], list]:
+        """Liste filtreleri: (koşullar, parametreler)"""
+        conditions = []
+        params = []
+        if arama:
+            conditions.append(
+                "(ad_soyad LIKE ? OR tc_kimlik_no LIKE ? OR telefon LIKE ? OR src_belge_no LIKE ?)"
+            )
+            p = f"%{arama}%"
+            params.extend([p, p, p, p])
+        if durum:
+            conditions.append("durum = ?")
+            params.append(durum)
+        return conditions, params
+
+    def sofor_listele(self, arama: str = "", durum: Optional[str] = None, sirala: Optional[str] = None,
+                      fields: Optional[str] = None) -> List[Dict]:
+        conditions, params = self._filtre(arama, durum)
+        kolon, azalan = siralama_coz(sirala, self.SIRALAMA, self.VARSAYILAN_SIRALAMA)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        q, params = sorgu_olustur("sofor", conditions, params, kolon, azalan, kolonlar=kolonlar)
+        q = self.db._convert_placeholders(q)
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(q, params)
+            rows = cursor.fetchall()
         return [dict(r) for r in rows] if rows else []
 
+    def sofor_sayfa(self, arama: str = "", durum: Optional[str] = None, sirala: Optional[str] = None,
+                    cursor: Optional[str] = None, limit: int = VARSAYILAN_LIMIT, toplam: bool = False,
+                    fields: Optional[str] = None) -> Dict:
+        """Keyset sayfalama ile tek sayfa (bkz. app/sayfalama.py)."""
+        conditions, params = self._filtre(arama, durum)
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        return sayfa_getir(self.db, "sofor", conditions, params, self.SIRALAMA, self.VARSAYILAN_SIRALAMA,
+                           sirala, cursor, limit, toplam, kolonlar)
+
     def sofor_getir(self, sofor_id: int) -> Optional[Dict]:
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        q = "SELECT * FROM sofor WHERE id = ?"
-        q = self.db._convert_placeholders(q)
-        cursor.execute(q, (sofor_id,))
-        row = cursor.fetchone()
-        self.db.close()
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            q = "SELECT * FROM sofor WHERE id = ?"
+            q = self.db._convert_placeholders(q)
+            cursor.execute(q, (sofor_id,))
+            row = cursor.fetchone()
         return dict(row) if row else None
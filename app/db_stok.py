@@ -1,259 +1,932 @@
 """
 Stok veritabanı işlemleri
 """
-from typing import Optional, List, Dict, Tuple, Any
+import os
+import secrets
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional, List, Dict, Tuple, Any, Iterator
+from .arama import LIKE_KACIS, arama_metni, katla, like_deseni, trigram_yaz, trigramlar
 from .db_connection import DatabaseConnection
+from .katalog import KatalogOnbellegi
+from .oneri import OneriIndeksi
+from .satir import SatirListesi
+from .talep_tahmini import TAHMIN_KOLONLARI, tahmin_hesapla
+from .sayfalama import MAX_LIMIT, VARSAYILAN_LIMIT, kolonlar_coz, sayfa_getir, siralama_coz, sorgu_olustur
+
+
+# API'ye dönen kolonlar (arama_metni iç index kolonudur, dönmez)
+_KOLONLAR = (
+    "id", "urun_kodu", "urun_adi", "marka", "birim", "stok_miktari", "rezerve_miktar", "birim_fiyat", "kritik_stok",
+    "aciklama", "olusturma_tarihi", "guncelleme_tarihi",
+)
+_SELECT = f"SELECT {', '.join(_KOLONLAR)} FROM stok"
+
+# Sık çalışan sorgular (explain_kontrol.py EXPLAIN ile index kullanımını doğrular)
+_SQL_URUN_ADI_ILE = _SELECT + " WHERE urun_adi = ?"
+_SQL_URUN_KODU_ILE = _SELECT + " WHERE urun_kodu = ?"
+# Arama adayları: sorgunun tüm trigramlarını içeren ürünler (app/arama.py)
+_SQL_ARAMA_ADAY = "SELECT stok_id FROM stok_arama WHERE trigram IN ({}) GROUP BY stok_id HAVING COUNT(*) = ?"
+# stok_hareket.kaynak değerleri (miktar: + giriş, - çıkış)
+HAREKET_ACILIS = "acilis"                # yeni ürünün ilk miktarı / migration açılış bakiyesi
+HAREKET_EXCEL = "excel_import"           # kaynak_no: dosya adı
+HAREKET_MANUEL = "manuel"                # ürün düzenleme / elle stok düşümü
+HAREKET_IS_EVRAKI = "is_evraki"          # kaynak_no: iş emri no
+HAREKET_IS_EVRAKI_IPTAL = "is_evraki_iptal"
+HAREKET_TOPLU = "toplu_guncelleme"       # stok_upsert_bulk; kaynak_no: irsaliye / teslimat no
+
+# stok_upsert_bulk modları -> çakışmada (ürün kodu mevcut) güncellenen kolon ve ifadesi
+UPSERT_MODLARI = {
+    "miktar_ayarla": ("stok_miktari", "{yeni}"),
+    "miktar_ekle": ("stok_miktari", "stok_miktari + {yeni}"),
+    "fiyat": ("birim_fiyat", "{yeni}"),
+}
+
+# Stok analizi (stok_analiz): değerleme toplamı, marka / birim kırılımı ve eşiğin altındaki ürünler
+_SQL_ANALIZ_TOPLAM = """
+    SELECT COUNT(*) AS urun_sayisi, COALESCE(SUM(stok_miktari), 0) AS toplam_miktar,
+           COALESCE(SUM(stok_miktari * birim_fiyat), 0) AS toplam_deger
+    FROM stok
+"""
+_SQL_ANALIZ_KIRILIM = """
+    SELECT COALESCE({0}, '') AS {0}, COUNT(*) AS urun_sayisi, COALESCE(SUM(stok_miktari), 0) AS toplam_miktar,
+           COALESCE(SUM(stok_miktari * birim_fiyat), 0) AS toplam_deger
+    FROM stok GROUP BY COALESCE({0}, '') ORDER BY toplam_deger DESC
+"""
+# kritik_stok > 0 koşulu idx_stok_kritik_stok ile yalnızca eşiği tanımlı ürünleri tarar
+# (* 1.0: SQLite tam sayı bölmesi yapmasın)
+_SQL_KRITIK = """
+    SELECT id, urun_kodu, urun_adi, marka, birim, stok_miktari, kritik_stok, kritik_stok - stok_miktari AS eksik
+    FROM stok WHERE kritik_stok > 0 AND stok_miktari <= kritik_stok
+    ORDER BY stok_miktari * 1.0 / kritik_stok, urun_adi LIMIT ?
+"""
+
+# Talep tahmini (stok_tahmin_yenile / stok_siparis_onerileri, app/talep_tahmini.py)
+_SQL_TAHMIN_KAYITLARI = """
+    SELECT tarih_donem, kullanilan_urunler FROM is_evraki
+    WHERE tarih_donem IS NOT NULL AND kullanilan_urunler IS NOT NULL
+    ORDER BY tarih_donem, id
+"""
+TAHMIN_GECERLILIK_SAATI = 12  # bu süreden yeni tahmin varsa yenileme atlanır (zorla=False)
+_ONERILEN = "t.hedef_stok - COALESCE(s.stok_miktari - s.rezerve_miktar, 0)"
+_SQL_SIPARIS_ONERILERI = f"""
+    SELECT t.urun_kodu, t.stok_id, COALESCE(s.urun_adi, t.urun_adi) AS urun_adi, t.ay_sayisi, t.ortalama,
+           t.mevsim_katsayisi, t.tahmin, t.guvenlik_stogu, t.hedef_stok,
+           s.stok_miktari - s.rezerve_miktar AS kullanilabilir,
+           CASE WHEN {_ONERILEN} > 0 THEN {_ONERILEN} ELSE 0 END AS onerilen_siparis, t.hesaplama_tarihi
+    FROM stok_tahmin t LEFT JOIN stok s ON s.id = t.stok_id
+"""
+
+_SQL_HAREKETLER = """
+    SELECT id, stok_id, urun_kodu, miktar, kaynak, kaynak_no, aciklama, tarih
+    FROM stok_hareket WHERE stok_id = ? AND tarih >= ? AND tarih < ?
+    ORDER BY tarih DESC, id DESC LIMIT ?
+"""
+
+# Kontrol ve düşüm tek ifadede: eşzamanlı iki istek aynı stoğu iki kez satamaz (InnoDB satır kilidi).
+# Başka taslakların rezerve ettiği miktar düşülemez (kendi rezervasyonu düşümden önce bırakılır).
+_SQL_AZALT = """
+    UPDATE stok
+    SET stok_miktari = stok_miktari - ?, guncelleme_tarihi = CURRENT_TIMESTAMP
+    WHERE urun_kodu = ? AND stok_miktari - rezerve_miktar >= ?
+"""
+
+# Rezervasyon: kullanılabilir miktar (stok_miktari - rezerve_miktar) yetiyorsa sayaç artar; ürün düzenlemesi sayılmaz
+STOK_REZERVASYON_SURESI = int(os.getenv("STOK_REZERVASYON_SURESI", "120"))  # dakika
+_SQL_REZERVE = """
+    UPDATE stok
+    SET rezerve_miktar = rezerve_miktar + ?, guncelleme_tarihi = guncelleme_tarihi
+    WHERE urun_kodu = ? AND stok_miktari - rezerve_miktar >= ?
+"""
+_SQL_REZERVASYONLAR = "SELECT id, taslak, evrak_no, stok_id, urun_kodu, miktar FROM stok_rezervasyon WHERE {}"
 
 
 class StokDB:
     """Stok veritabanı işlemleri"""
+
+    # (ad, sorgu, örnek parametreler)
+    EXPLAIN_SORGULARI = [
+        ("stok_urun_adi_ile_ara", _SQL_URUN_ADI_ILE, ("Ürün 1",)),
+        ("stok_urun_kodu_ile_ara", _SQL_URUN_KODU_ILE, ("U000001",)),
+        ("stok_miktar_azalt", _SQL_AZALT, (1, "U000001", 1)),
+        ("stok_hareket_listele", _SQL_HAREKETLER, (1, "2025-01-01", "2026-01-01", 100)),
+        ("stok_arama_aday", _SQL_ARAMA_ADAY.format("?, ?, ?"), ("ürü", "rün", "ün ", 3)),
+        ("stok_analiz_kritik", _SQL_KRITIK, (100,)),
+        ("stok_rezervasyon_taslak", _SQL_REZERVASYONLAR.format("taslak = ?"), ("0" * 32,)),
+        ("stok_rezervasyon_suresi_dolan", _SQL_REZERVASYONLAR.format("bitis <= ?"), ("2025-01-01 00:00:00",)),
+    ]
+
+    # Liste sıralama anahtarları (?sirala=) -> kolon
+    SIRALAMA = {
+        "urun_adi": "urun_adi",
+        "urun_kodu": "urun_kodu",
+        "marka": "marka",
+        "stok_miktari": "stok_miktari",
+        "birim_fiyat": "birim_fiyat",
+        "olusturma_tarihi": "olusturma_tarihi",
+        "id": "id",
+    }
+    VARSAYILAN_SIRALAMA = "urun_adi"
+
+    # ?fields= ile seçilebilecek kolonlar
+    KOLONLAR = _KOLONLAR
+    OZET_KOLONLAR = None
     
     def __init__(self, db_conn: DatabaseConnection):
         self.db = db_conn
+        # stok_getir / stok_urun_kodu_ile_ara / stok_urun_adi_ile_ara önbelleği; stok'a yazan her metod
+        # transaction'ında self.katalog.surum_artir() (ürün değişikliği) veya self.katalog.miktar_degisti(stok_idler)
+        # (yalnızca stok_miktari / rezerve_miktar) çağırır (app/katalog.py)
+        self.katalog = KatalogOnbellegi(db_conn, "stok")
+        # stok_oner index'i; ürün ekleme / güncelleme / silme commit sonrası oneri.uygula ile işlenir (app/oneri.py)
+        self.oneri = OneriIndeksi(db_conn)
     
     def stok_ekle(self, urun_kodu: str, urun_adi: str, marka: str = "", 
                   birim: str = "Adet", stok_miktari: float = 0, 
-                  birim_fiyat: float = 0, aciklama: str = "") -> bool:
-        """Yeni ürün ekle"""
+                  birim_fiyat: float = 0, aciklama: str = "", kritik_stok: float = 0) -> bool:
+        """Yeni ürün ekle; ürün kodu zaten kullanılıyorsa False"""
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            urun_kodu_val = urun_kodu if urun_kodu else None
-            query = """
-                INSERT INTO stok (urun_kodu, urun_adi, marka, birim, stok_miktari, 
-                                birim_fiyat, aciklama)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (urun_kodu_val, urun_adi, marka, birim, stok_miktari, birim_fiyat, aciklama))
-            conn.commit()
-            self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                urun_kodu_val = urun_kodu if urun_kodu else None
+                metin = arama_metni(urun_kodu_val, urun_adi, marka)
+                query = """
+                    INSERT INTO stok (urun_kodu, urun_adi, marka, birim, stok_miktari, 
+                                    birim_fiyat, aciklama, arama_metni, kritik_stok)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (urun_kodu_val, urun_adi, marka, birim, stok_miktari, birim_fiyat, aciklama, metin,
+                                       kritik_stok or 0))
+                stok_id = cursor.lastrowid
+                trigram_yaz(cursor, [(stok_id, metin)], sil=False)
+                self.katalog.surum_artir()
+                oneri_surumu = self.oneri.surum_artir(cursor)
+                if stok_miktari:
+                    self._hareket_ekle(cursor, [(stok_id, urun_kodu_val, stok_miktari, HAREKET_ACILIS, None, None)])
+            self.oneri.uygula(oneri_surumu, [(stok_id, urun_kodu_val, urun_adi, marka, birim)])
             return True
         except Exception as e:
+            # Yalnızca bütünlük ihlali (tekrar eden ürün kodu) False döner; diğer hatalar (geçici, havuz zaman
+            # aşımı, veri hatası) yukarı iletilir ve rota 500 / 503 döner
             if self.db._is_integrity_error(e):
                 return False
-            print(f"Stok ekleme hatası: {e}")
-            return False
+            raise
     
+    def stok_ekle_bulk(self, urunler: List[Dict], kaynak: str = HAREKET_ACILIS,
+                       kaynak_no: Optional[str] = None) -> List[Tuple[bool, str]]:
+        """
+        Birden çok ürünü tek transaction'da çok satırlı INSERT ile ekle (Excel içe aktarma).
+        urunler: stok_ekle parametreleriyle aynı anahtarlı sözlükler (eksik anahtarlar varsayılanı alır).
+        İlk miktarlar kaynak / kaynak_no (örn. 'excel_import', dosya adı) ile stok_hareket'e yazılır.
+        Dönüş: her ürün için (başarılı, mesaj), aynı sırada.
+        """
+        sonuclar = [(False, "Ürün adı zorunlu")] * len(urunler)
+        # Ürün adı boşsa DB'ye gönderilmez; böylece bütünlük hatası yalnızca tekrar eden ürün kodudur
+        gecerli = [i for i, u in enumerate(urunler) if u.get("urun_adi")]
+        satirlar = [
+            (u.get("urun_kodu") or None, u["urun_adi"], u.get("marka", ""), u.get("birim", "Adet"),
+             u.get("stok_miktari", 0), u.get("birim_fiyat", 0), u.get("aciklama", ""),
+             arama_metni(u.get("urun_kodu") or None, u["urun_adi"], u.get("marka", "")), u.get("kritik_stok") or 0)
+            for u in (urunler[i] for i in gecerli)
+        ]
+        oneri_surumu = None
+        with self.db.unit_of_work():
+            eklenen = self.db.toplu_ekle(
+                "stok",
+                ("urun_kodu", "urun_adi", "marka", "birim", "stok_miktari", "birim_fiyat", "aciklama", "arama_metni",
+                 "kritik_stok"),
+                satirlar,
+                butunluk_mesaji="Ürün kodu zaten mevcut",
+                id_dondur=True,
+            )
+            # Yeni ürünler toplu_ekle'nin satır başına döndürdüğü id'lerle: (id, kod, ad, marka, birim, miktar, metin)
+            yeniler = [
+                (stok_id,) + satir[:5] + (satir[7],) for (ok, _, stok_id), satir in zip(eklenen, satirlar) if ok
+            ]
+            if yeniler:
+                with self.db.transaction() as conn:
+                    cursor = self.db._get_cursor(conn)
+                    trigram_yaz(cursor, [(stok_id, metin) for stok_id, *_, metin in yeniler], sil=False)
+                    self.katalog.surum_artir()
+                    oneri_surumu = self.oneri.surum_artir(cursor)
+                    self._hareket_ekle(cursor, [
+                        (stok_id, kod, miktar, kaynak, kaynak_no, None)
+                        for stok_id, kod, _, _, _, miktar, _ in yeniler if miktar
+                    ])
+        if oneri_surumu is not None:
+            self.oneri.uygula(oneri_surumu, [yeni[:5] for yeni in yeniler])
+        for i, (ok, mesaj, _) in zip(gecerli, eklenen):
+            sonuclar[i] = (ok, mesaj)
+        return sonuclar
+
+    def stok_upsert_bulk(self, urunler: List[Dict], mod: str, kaynak_no: Optional[str] = None,
+                         kaynak: str = HAREKET_TOPLU) -> List[Tuple[str, Any]]:
+        """
+        Ürün koduna göre toplu ekle / güncelle: çok satırlı INSERT ... ON DUPLICATE KEY UPDATE, tek transaction.
+        mod: 'miktar_ayarla' (stok_miktari = değer), 'miktar_ekle' (stok_miktari + değer), 'fiyat' (yalnızca birim_fiyat).
+        Kodu olmayan ürün urun_adi verilmişse eklenir (miktar / fiyat verilen değerle), verilmemişse hata döner.
+        Aynı kod birden çok satırda geçerse satırlar sırayla uygulanır. Miktar değişiklikleri kaynak / kaynak_no
+        ile stok_hareket'e yazılır; mevcut ürünler bu yüzden parti başına tek SELECT ile kilitli okunur.
+        Dönüş: her satır için (durum, değer) aynı sırada; durum 'eklendi' / 'guncellendi' (değer: yeni miktar veya
+        fiyat) ya da 'hata' (değer: mesaj).
+        """
+        if mod not in UPSERT_MODLARI:
+            raise ValueError(f"Geçersiz mod: {mod}. İzin verilenler: {', '.join(UPSERT_MODLARI)}")
+        kolon, ifade = UPSERT_MODLARI[mod]
+        sonuclar: List[Tuple[str, Any]] = [("hata", "")] * len(urunler)
+        gecerli = []
+        for i, urun in enumerate(urunler):
+            urun_kodu = (urun.get("urun_kodu") or "").strip()
+            deger = urun.get(kolon)
+            if not urun_kodu:
+                sonuclar[i] = ("hata", "Ürün kodu boş olamaz")
+            elif deger is None:
+                sonuclar[i] = ("hata", f"{kolon} zorunlu")
+            elif mod == "miktar_ekle" and deger <= 0:
+                sonuclar[i] = ("hata", "Eklenecek miktar 0'dan büyük olmalıdır")
+            elif deger < 0:
+                sonuclar[i] = ("hata", f"{kolon} negatif olamaz")
+            else:
+                gecerli.append((i, urun_kodu, deger))
+        if not gecerli:
+            return sonuclar
+
+        kodlar = list(dict.fromkeys(urun_kodu for _, urun_kodu, _ in gecerli))
+        parti = max(1, self.db.dialect.en_fazla_parametre // 2)
+        oneri_surumu, yeni_urunler = None, []
+        with self.db.unit_of_work():
+            with self.db.connection() as conn:
+                cursor = self.db._get_cursor(conn)
+                mevcut: Dict[str, Dict] = {}
+                for bas in range(0, len(kodlar), parti):
+                    dilim = kodlar[bas:bas + parti]
+                    query = self.db._for_update(
+                        f"SELECT id, urun_kodu, stok_miktari, birim_fiyat FROM stok "
+                        f"WHERE urun_kodu IN ({', '.join('?' * len(dilim))})"
+                    )
+                    cursor.execute(self.db._convert_placeholders(query), dilim)
+                    mevcut.update((katla(row["urun_kodu"]), dict(row)) for row in cursor.fetchall())
+
+                # Satırları sırayla uygula (ifade de aynı sırayla işler): sonuç ve hareket farkları burada hesaplanır.
+                # urun_kodu harf duyarsız (_ci) benzersizdir; mevcut katlanmış kodla anahtarlıdır
+
+                satirlar, farklar, yeni_kodlar = [], [], {}
+                for i, urun_kodu, deger in gecerli:
+                    urun = urunler[i]
+                    durum = mevcut.get(katla(urun_kodu))
+                    if durum is None:
+                        if not urun.get("urun_adi"):
+                            sonuclar[i] = ("hata", "Ürün bulunamadı (yeni ürün için urun_adi gerekli)")
+                            continue
+                        miktar = urun.get("stok_miktari") or 0
+                        durum = mevcut[katla(urun_kodu)] = {
+                            "id": None, "urun_kodu": urun_kodu, "stok_miktari": miktar,
+                            "birim_fiyat": urun.get("birim_fiyat") or 0,
+                        }
+                        yeni_kodlar[urun_kodu] = None
+                        sonuclar[i] = ("eklendi", durum[kolon])
+                        fark = miktar
+                    else:
+                        onceki = durum[kolon]
+                        deger = _ayni_tipte(deger, onceki)
+                        durum[kolon] = onceki + deger if mod == "miktar_ekle" else deger
+                        sonuclar[i] = ("guncellendi", durum[kolon])
+                        fark = durum[kolon] - onceki if kolon == "stok_miktari" else 0
+                    if fark:
+                        # Hareket stok satırındaki kodla yazılır (çağıranın harf biçimiyle değil)
+                        farklar.append((katla(urun_kodu), fark))
+                    satirlar.append((
+                        urun_kodu, urun.get("urun_adi") or "", urun.get("marka") or "", urun.get("birim") or "Adet",
+                        urun.get("stok_miktari") or 0, urun.get("birim_fiyat") or 0, urun.get("aciklama") or "",
+                        arama_metni(urun_kodu, urun.get("urun_adi"), urun.get("marka")),
+                    ))
+
+            self.db.toplu_upsert(
+                "stok",
+                ("urun_kodu", "urun_adi", "marka", "birim", "stok_miktari", "birim_fiyat", "aciklama", "arama_metni"),
+                satirlar, "urun_kodu",
+                {kolon: ifade, "guncelleme_tarihi": "CURRENT_TIMESTAMP"},
+            )
+
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                yeni_kodlar = list(yeni_kodlar)
+                for bas in range(0, len(yeni_kodlar), parti):
+                    dilim = yeni_kodlar[bas:bas + parti]
+                    query = (f"SELECT id, urun_kodu, urun_adi, marka, birim, arama_metni FROM stok "
+                             f"WHERE urun_kodu IN ({', '.join('?' * len(dilim))})")
+                    cursor.execute(self.db._convert_placeholders(query), dilim)
+                    for row in cursor.fetchall():
+                        mevcut[katla(row["urun_kodu"])].update(id=row["id"], urun_kodu=row["urun_kodu"])
+                        yeni_urunler.append(row)
+                trigram_yaz(cursor, [(row["id"], row["arama_metni"]) for row in yeni_urunler], sil=False)
+                self._hareket_ekle(cursor, [
+                    (mevcut[anahtar]["id"], mevcut[anahtar]["urun_kodu"], fark, kaynak, kaynak_no, None)
+                    for anahtar, fark in farklar
+                ])
+                if satirlar:
+                    self.katalog.surum_artir()
+                if yeni_urunler:
+                    oneri_surumu = self.oneri.surum_artir(cursor)
+        if oneri_surumu is not None:
+            self.oneri.uygula(oneri_surumu, [
+                (row["id"], row["urun_kodu"], row["urun_adi"], row["marka"], row["birim"]) for row in yeni_urunler
+            ])
+        return sonuclar
+
     def stok_guncelle(self, stok_id: int, urun_kodu: str, urun_adi: str, 
                      marka: str, birim: str, stok_miktari: float, 
-                     birim_fiyat: float, aciklama: str) -> bool:
-        """Ürün bilgilerini güncelle"""
+                     birim_fiyat: float, aciklama: str, kritik_stok: float = 0) -> bool:
+        """Ürün bilgilerini güncelle; ürün kodu başka üründe kullanılıyorsa False"""
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            urun_kodu_val = urun_kodu if urun_kodu else None
-            query = """
-                UPDATE stok 
-                SET urun_kodu = ?, urun_adi = ?, marka = ?, birim = ?, stok_miktari = ?,
-                    birim_fiyat = ?, aciklama = ?, guncelleme_tarihi = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (urun_kodu_val, urun_adi, marka, birim, stok_miktari, birim_fiyat, aciklama, stok_id))
-            conn.commit()
-            self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                urun_kodu_val = urun_kodu if urun_kodu else None
+                metin = arama_metni(urun_kodu_val, urun_adi, marka)
+                # Miktar farkı hareket olarak yazılır; satır kilitli okunur ki eşzamanlı düşüm fark hesabını bozmasın
+                query = self.db._for_update("SELECT stok_miktari, arama_metni FROM stok WHERE id = ?")
+                cursor.execute(self.db._convert_placeholders(query), (stok_id,))
+                onceki = cursor.fetchone()
+                query = """
+                    UPDATE stok 
+                    SET urun_kodu = ?, urun_adi = ?, marka = ?, birim = ?, stok_miktari = ?,
+                        birim_fiyat = ?, aciklama = ?, arama_metni = ?, kritik_stok = ?,
+                        guncelleme_tarihi = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (urun_kodu_val, urun_adi, marka, birim, stok_miktari, birim_fiyat, aciklama, metin,
+                                       kritik_stok or 0, stok_id))
+                self.katalog.surum_artir()
+                oneri_surumu = self.oneri.surum_artir(cursor)
+                if onceki is not None and onceki["arama_metni"] != metin:
+                    trigram_yaz(cursor, [(stok_id, metin)])
+                if onceki is not None:
+                    fark = _ayni_tipte(stok_miktari, onceki["stok_miktari"]) - onceki["stok_miktari"]
+                    if fark:
+                        self._hareket_ekle(cursor, [(stok_id, urun_kodu_val, fark, HAREKET_MANUEL, None, "Ürün düzenleme")])
+            self.oneri.uygula(oneri_surumu, [(stok_id, urun_kodu_val, urun_adi, marka, birim)] if onceki is not None else [])
             return True
         except Exception as e:
             if self.db._is_integrity_error(e):
                 return False
-            print(f"Stok güncelleme hatası: {e}")
-            return False
+            raise
     
     def stok_sil(self, stok_id: int) -> bool:
         """Ürünü sil"""
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            query = "DELETE FROM stok WHERE id = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (stok_id,))
-            conn.commit()
-            self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                query = "DELETE FROM stok WHERE id = ?"
+                query = self.db._convert_placeholders(query)
+                cursor.execute(query, (stok_id,))
+                self.katalog.surum_artir()
+                oneri_surumu = self.oneri.surum_artir(cursor)
+            self.oneri.uygula(oneri_surumu, silinen=[stok_id])
             return True
         except Exception as e:
+            if self.db._is_transient_error(e):
+                raise
             print(f"Stok silme hatası: {e}")
             return False
     
-    def stok_listele(self, arama: str = "") -> List[Dict]:
+    def _filtre(self, arama: str = "") -> Tuple[List[str], list]:
+        """
+        Liste filtreleri: (koşullar, parametreler).
+        arama: ürün kodu / adı / markasında Türkçe katlamalı alt dize; adaylar trigram index'inden
+        gelir, LIKE yalnızca onları doğrular (3 karakterden kısa sorguda katlanmış metin taranır).
+        """
+        katli = katla(arama)
+        if not katli:
+            return [], []
+        kosullar = [f"arama_metni LIKE ? ESCAPE '{LIKE_KACIS}'"]
+        params: list = [like_deseni(katli)]
+        parcalar = sorted(trigramlar(katli))
+        if parcalar:
+            kosullar.insert(0, f"id IN ({_SQL_ARAMA_ADAY.format(', '.join('?' * len(parcalar)))})")
+            params = parcalar + [len(parcalar)] + params
+        return kosullar, params
+
+    def _kolonlar(self, fields: Optional[str]) -> List[str]:
+        """?fields= kolonları; '*' yerine KOLONLAR (arama_metni dönmez)"""
+        kolonlar = kolonlar_coz(fields, self.KOLONLAR, self.OZET_KOLONLAR)
+        return list(self.KOLONLAR) if kolonlar == "*" else kolonlar
+
+    def _listele_sorgusu(self, arama: str = "", sirala: Optional[str] = None,
+                         fields: Optional[str] = None) -> Tuple[str, tuple]:
+        """stok_listele / stok_akis için sorgu ve parametreler"""
+        kosullar, params = self._filtre(arama)
+        kolon, azalan = siralama_coz(sirala, self.SIRALAMA, self.VARSAYILAN_SIRALAMA)
+        kolonlar = self._kolonlar(fields)
+        query, params = sorgu_olustur("stok", kosullar, params, kolon, azalan, kolonlar=kolonlar)
+        return self.db._convert_placeholders(query), params
+
+    def stok_listele(self, arama: str = "", sirala: Optional[str] = None,
+                     fields: Optional[str] = None) -> List[Dict]:
         """Tüm ürünleri listele"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        
-        if arama:
-            query = """
-                SELECT * FROM stok 
-                WHERE urun_kodu LIKE ? OR urun_adi LIKE ? OR marka LIKE ?
-                ORDER BY urun_adi
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (f"%{arama}%", f"%{arama}%", f"%{arama}%"))
-        else:
-            query = "SELECT * FROM stok ORDER BY urun_adi"
-            cursor.execute(query)
-        
-        rows = cursor.fetchall()
-        self.db.close()
+        query, params = self._listele_sorgusu(arama, sirala, fields)
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         return list(rows)
 
-    def stok_getir(self, stok_id: int) -> Optional[Dict]:
-        """Belirli bir ürünü getir"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        query = "SELECT * FROM stok WHERE id = ?"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (stok_id,))
-        row = cursor.fetchone()
-        self.db.close()
+    def stok_akis(self, arama: str = "", parti: int = 500, sirala: Optional[str] = None,
+                  fields: Optional[str] = None) -> Iterator[SatirListesi]:
+        """stok_listele ile aynı sonuç; sunucu taraflı cursor ile parti parti üretilir"""
+        query, params = self._listele_sorgusu(arama, sirala, fields)
+        return self.db.akis(query, params, parti)
+
+    def stok_sayfa(self, arama: str = "", sirala: Optional[str] = None, cursor: Optional[str] = None,
+                   limit: int = VARSAYILAN_LIMIT, toplam: bool = False, fields: Optional[str] = None) -> Dict:
+        """Keyset sayfalama ile tek sayfa (bkz. app/sayfalama.py)"""
+        kosullar, params = self._filtre(arama)
+        kolonlar = self._kolonlar(fields)
+        return sayfa_getir(self.db, "stok", kosullar, params, self.SIRALAMA, self.VARSAYILAN_SIRALAMA,
+                           sirala, cursor, limit, toplam, kolonlar)
+
+    def stok_ara(self, arama: str, limit: int = 20) -> List[Dict]:
+        """
+        Sıralı ürün arama (Türkçe katlamalı, trigram index'li). Sıra: tam ürün kodu, tam ürün adı,
+        kod ile başlayan, ad / marka ile başlayan, kelime başı, diğer alt dize eşleşmeleri; sonra ürün adı.
+        """
+        katli = katla(arama)
+        if not katli:
+            return []
+        kosullar, params = self._filtre(arama)
+        kacis = f" ESCAPE '{LIKE_KACIS}'"
+        skor = (
+            "CASE WHEN arama_metni LIKE ?{0} THEN 0 WHEN arama_metni LIKE ?{0} THEN 1"
+            " WHEN arama_metni LIKE ?{0} THEN 2 WHEN arama_metni LIKE ?{0} THEN 3"
+            " WHEN arama_metni LIKE ?{0} THEN 4 ELSE 5 END"
+        ).format(kacis)
+        skor_params = [
+            like_deseni(katli, "", "\t%"),         # tam kod
+            like_deseni(katli, "%\t", "\t%"),     # tam ad
+            like_deseni(katli, "", "%"),           # kod ile başlıyor
+            like_deseni(katli, "%\t", "%"),        # ad / marka ile başlıyor
+            like_deseni(katli, "% ", "%"),         # kelime başı
+        ]
+        query = f"{_SELECT} WHERE {' AND '.join(kosullar)} ORDER BY {skor}, urun_adi, id LIMIT ?"
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(self.db._convert_placeholders(query),
+                           params + skor_params + [max(1, min(limit, MAX_LIMIT))])
+            return list(cursor.fetchall())
+
+    def stok_oner(self, sorgu: str, limit: int = 10) -> List[Dict]:
+        """Yazarken öneri: kodu / adı / adındaki bir kelime / markası sorguyla başlayan ürünler (bellek içi index)"""
+        return self.oneri.oner(sorgu, max(1, min(limit, MAX_LIMIT)))
+
+    def stok_analiz(self, kritik_limit: int = 100) -> Dict:
+        """
+        Stok değerlemesi (SUM(stok_miktari * birim_fiyat)), marka / birim kırılımları ve kritik_stok eşiğinde
+        veya altındaki ürünler (en düşük doluluk oranı önce, en fazla kritik_limit). SQL toplamlarıyla hesaplanır;
+        sonuç katalog önbelleğinde tutulur, stok'a her yazmada yeniden hesaplanır (yalnızca miktar değişen yazmalarda
+        diğer worker'lar en geç DB_KATALOG_TTL sonra).
+        """
+        kritik_limit = max(1, min(kritik_limit, MAX_LIMIT))
+        return self.katalog.getir("analiz", kritik_limit, lambda: self._analiz_hesapla(kritik_limit))
+
+    def _analiz_hesapla(self, kritik_limit: int) -> Dict:
+        """stok_analiz önbelleğini dolduran okuma (birincilden, tek bağlantıda)"""
+        with self.db.connection() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(_SQL_ANALIZ_TOPLAM)
+            analiz = {"toplam": dict(cursor.fetchone())}
+            for kolon in ("marka", "birim"):
+                cursor.execute(_SQL_ANALIZ_KIRILIM.format(kolon))
+                analiz[kolon] = list(cursor.fetchall())
+            cursor.execute(self.db._convert_placeholders(_SQL_KRITIK), (kritik_limit,))
+            analiz["kritik"] = list(cursor.fetchall())
+        return analiz
+
+    def _tek_satir(self, query: str, params: tuple) -> Optional[Dict]:
+        """Katalog önbelleğini dolduran okuma: birincilden (replika gecikmesi önbelleğe girmesin)"""
+        with self.db.connection() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(self.db._convert_placeholders(query), params)
+            row = cursor.fetchone()
         return row if row else None
 
+    def stok_getir(self, stok_id: int) -> Optional[Dict]:
+        """Belirli bir ürünü getir (katalog önbelleğinden)"""
+        return self.katalog.getir("id", stok_id, lambda: self._tek_satir(_SELECT + " WHERE id = ?", (stok_id,)))
+
     def stok_urun_adi_ile_ara(self, urun_adi: str) -> Optional[Dict]:
-        """Ürün adı ile ürün ara"""
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        query = "SELECT * FROM stok WHERE urun_adi = ?"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (urun_adi,))
-        row = cursor.fetchone()
-        self.db.close()
-        return row if row else None
+        """Ürün adı ile ürün ara (katalog önbelleğinden; anahtar büyük/küçük harf ve sondaki boşluk duyarsız)"""
+        return self.katalog.getir("ad", (urun_adi or "").rstrip().lower(),
+                                  lambda: self._tek_satir(_SQL_URUN_ADI_ILE, (urun_adi,)))
 
     def stok_urun_kodu_ile_ara(self, urun_kodu: str) -> Optional[Dict]:
-        """Ürün kodu ile ürün ara"""
+        """Ürün kodu ile ürün ara (katalog önbelleğinden)"""
         if not urun_kodu or not urun_kodu.strip():
             return None
-        conn = self.db.connect()
-        cursor = self.db._get_cursor(conn)
-        query = "SELECT * FROM stok WHERE urun_kodu = ?"
-        query = self.db._convert_placeholders(query)
-        cursor.execute(query, (urun_kodu.strip(),))
-        row = cursor.fetchone()
-        self.db.close()
-        return row if row else None
+        urun_kodu = urun_kodu.strip()
+        return self.katalog.getir("kod", urun_kodu, lambda: self._tek_satir(_SQL_URUN_KODU_ILE, (urun_kodu,)))
 
-    def stok_miktar_azalt(self, urun_kodu: str, miktar: float) -> Tuple[bool, str]:
-        """Ürün koduna göre stok miktarını azalt"""
+    def _hareket_ekle(self, cursor, hareketler: List[Tuple]) -> None:
+        """
+        stok_hareket'e çok satırlı INSERT (çağıranın transaction'ında; yer tutucu sınırına göre partiler hâlinde).
+        hareketler: (stok_id, urun_kodu, miktar, kaynak, kaynak_no, aciklama); miktar + giriş, - çıkış.
+        """
+        parti = max(1, self.db.dialect.en_fazla_parametre // 6)
+        for bas in range(0, len(hareketler), parti):
+            dilim = hareketler[bas:bas + parti]
+            query = (
+                "INSERT INTO stok_hareket (stok_id, urun_kodu, miktar, kaynak, kaynak_no, aciklama) VALUES "
+                + ", ".join(["(?, ?, ?, ?, ?, ?)"] * len(dilim))
+            )
+            cursor.execute(self.db._convert_placeholders(query), [d for hareket in dilim for d in hareket])
+
+    def _kod_ile_satirlar(self, cursor, kodlar: List[str]) -> Dict[str, Dict]:
+        """
+        Ürün koduna göre ad / miktar / rezerve miktar (tek SELECT, çağıranın transaction'ında).
+        Dönüş istenen kodla anahtarlıdır; kolon harf duyarsız (_ci) karşılaştırdığından eşleme katlanmış kodla yapılır.
+        """
+        query = (f"SELECT id, urun_kodu, urun_adi, stok_miktari, rezerve_miktar FROM stok "
+                 f"WHERE urun_kodu IN ({', '.join('?' * len(kodlar))})")
+        cursor.execute(self.db._convert_placeholders(query), kodlar)
+        katli = {katla(row["urun_kodu"]): row for row in cursor.fetchall()}
+        return {kod: katli[katla(kod)] for kod in kodlar if katla(kod) in katli}
+
+    def _kosullu_azalt(self, cursor, kalemler: List[Tuple[str, float]], kaynak: str,
+                       kaynak_no: Optional[str]) -> List[Tuple[bool, Optional[Dict], Any]]:
+        """
+        Kalemleri sırayla koşullu UPDATE ile düş (stok_miktari >= miktar); sonuç etkilenen satır sayısından okunur.
+        Ardından ürün adı / kalan miktar ve başarısızlık nedeni için tek SELECT, düşülen kalemler için tek
+        stok_hareket INSERT'i yapılır (kalem başına 1 + 2 sorgu).
+        Dönüş: her kalem için (düşüldü mü, stok satırı (ürün yoksa None), kalem anındaki miktar (düşüm sonrası)).
+        """
+        query = self.db._convert_placeholders(_SQL_AZALT)
+        dusuldu = []
+        for urun_kodu, miktar in kalemler:
+            cursor.execute(query, (miktar, urun_kodu, miktar))
+            dusuldu.append(cursor.rowcount == 1)
+
+        kodlar = list(dict.fromkeys(urun_kodu for urun_kodu, _ in kalemler))
+        satirlar = self._kod_ile_satirlar(cursor, kodlar)
+
+        # Aynı ürün birden çok kalemdeyse her kalemin anındaki miktar: sondan geriye, sonraki düşümleri geri ekle
+        sonuclar: List[Tuple[bool, Optional[Dict], Any]] = [(False, None, None)] * len(kalemler)
+        sonra_dusulen: Dict[int, Any] = {}
+        for i in reversed(range(len(kalemler))):
+            urun_kodu, miktar = kalemler[i]
+            row = satirlar.get(urun_kodu)
+            if row is None:
+                continue
+            miktar = _ayni_tipte(miktar, row["stok_miktari"])
+            miktar_o_an = row["stok_miktari"] + sonra_dusulen.get(row["id"], 0)
+            if dusuldu[i]:
+                sonra_dusulen[row["id"]] = sonra_dusulen.get(row["id"], 0) + miktar
+            sonuclar[i] = (dusuldu[i], row, miktar_o_an)
+
+        self.katalog.miktar_degisti(row["id"] for ok, row, _ in sonuclar if ok)
+        self._hareket_ekle(cursor, [
+            (row["id"], urun_kodu, -miktar, kaynak, kaynak_no, None)
+            for (urun_kodu, miktar), (ok, row, _) in zip(kalemler, sonuclar) if ok
+        ])
+        return sonuclar
+
+    def stok_miktar_azalt(self, urun_kodu: str, miktar: float, kaynak: str = HAREKET_MANUEL,
+                          kaynak_no: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Ürün koduna göre stok miktarını azalt (tek koşullu UPDATE; yetersiz stokta hiçbir şey değişmez).
+        Düşüm kaynak / kaynak_no ile stok_hareket'e yazılır.
+        """
         if not urun_kodu or not urun_kodu.strip():
             return (False, "Ürün kodu boş olamaz")
+        if miktar <= 0:
+            return (False, "Miktar 0'dan büyük olmalıdır")
         
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            query = "SELECT id, stok_miktari, urun_adi FROM stok WHERE urun_kodu = ?"
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (urun_kodu.strip(),))
-            row = cursor.fetchone()
-            
-            if not row:
-                self.db.close()
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                ((dusuldu, row, kalan),) = self._kosullu_azalt(cursor, [(urun_kodu.strip(), miktar)], kaynak, kaynak_no)
+            if row is None:
                 return (False, f"Ürün kodu '{urun_kodu}' stokta bulunamadı")
-            
-            stok_id = row['id']
-            mevcut_miktar = row['stok_miktari']
-            urun_adi = row['urun_adi']
-
-            if mevcut_miktar < miktar:
-                self.db.close()
-                return (False, f"Yetersiz stok! Mevcut: {mevcut_miktar}, İstenen: {miktar} (Ürün: {urun_adi})")
-            
-            yeni_miktar = mevcut_miktar - miktar
-            query = """
-                UPDATE stok 
-                SET stok_miktari = ?, guncelleme_tarihi = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """
-            query = self.db._convert_placeholders(query)
-            cursor.execute(query, (yeni_miktar, stok_id))
-            
-            conn.commit()
-            self.db.close()
-            return (True, f"Stok güncellendi: {urun_adi} (Kalan: {yeni_miktar})")
+            if not dusuldu:
+                return (False, f"Yetersiz stok! Mevcut: {kalan}{_rezerve_notu(row)}, İstenen: {miktar} (Ürün: {row['urun_adi']})")
+            return (True, f"Stok güncellendi: {row['urun_adi']} (Kalan: {kalan})")
             
         except Exception as e:
-            if conn:
-                conn.rollback()
-                self.db.close()
+            if self.db._is_transient_error(e):
+                raise
             return (False, f"Stok azaltma hatası: {str(e)}")
     
-    def stok_miktar_azalt_batch(self, urunler: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
-        """Birden fazla ürünün stok miktarını tek bir transaction içinde azalt"""
+    def stok_miktar_azalt_batch(self, urunler: List[Dict[str, Any]], kaynak: str = HAREKET_MANUEL,
+                                kaynak_no: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """
+        Birden fazla ürünün stok miktarını tek bir transaction içinde azalt.
+        Her kalem koşullu UPDATE ile düşülür; stoğu yetmeyen / bulunamayan kalem atlanır, diğerleri uygulanır.
+        Düşülen kalemler kaynak / kaynak_no ile (örn. 'is_evraki', iş emri no) stok_hareket'e yazılır.
+        """
         basarili_mesajlar = []
-        hata_mesajlari = []
+        kalemler, adlar, hata_mesajlari = _kalemleri_ayikla(urunler)
         
-        if not urunler:
+        if not kalemler:
             return (basarili_mesajlar, hata_mesajlari)
         
-        conn = None
         try:
-            conn = self.db.connect()
-            cursor = self.db._get_cursor(conn)
-            
-            urun_bilgileri = []
-            for urun in urunler:
-                urun_kodu = urun.get("urun_kodu", "").strip()
-                miktar = urun.get("miktar", 0)
-                urun_adi = urun.get("urun_adi", "")
-                
-                if not urun_kodu:
-                    hata_mesajlari.append(f"{urun_adi or 'Bilinmeyen'}: Ürün kodu boş")
-                    continue
-                
-                if miktar <= 0:
-                    hata_mesajlari.append(f"{urun_adi} ({urun_kodu}): Miktar 0'dan büyük olmalıdır")
-                    continue
-                
-                query = "SELECT id, stok_miktari, urun_adi FROM stok WHERE urun_kodu = ?"
-                query = self.db._convert_placeholders(query)
-                cursor.execute(query, (urun_kodu,))
-                row = cursor.fetchone()
-                
-                if not row:
-                    hata_mesajlari.append(f"{urun_adi} ({urun_kodu}): Stokta bulunamadı")
-                    continue
-                
-                stok_id = row['id']
-                mevcut_miktar = row['stok_miktari']
-                db_urun_adi = row['urun_adi']
-
-                if mevcut_miktar < miktar:
-                    hata_mesajlari.append(f"{db_urun_adi} ({urun_kodu}): Yetersiz stok! Mevcut: {mevcut_miktar}, İstenen: {miktar}")
-                    continue
-                
-                urun_bilgileri.append({
-                    "stok_id": stok_id,
-                    "urun_kodu": urun_kodu,
-                    "urun_adi": db_urun_adi,
-                    "mevcut_miktar": mevcut_miktar,
-                    "miktar": miktar
-                })
-            
-            if hata_mesajlari and not urun_bilgileri:
-                conn.rollback()
-                return (basarili_mesajlar, hata_mesajlari)
-            
-            for urun_info in urun_bilgileri:
-                yeni_miktar = urun_info["mevcut_miktar"] - urun_info["miktar"]
-                query = """
-                    UPDATE stok 
-                    SET stok_miktari = ?, guncelleme_tarihi = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """
-                query = self.db._convert_placeholders(query)
-                cursor.execute(query, (yeni_miktar, urun_info["stok_id"]))
-                basarili_mesajlar.append(f"{urun_info['urun_adi']} ({urun_info['urun_kodu']}): Stok güncellendi (Kalan: {yeni_miktar})")
-            
-            conn.commit()
-            return (basarili_mesajlar, hata_mesajlari)
-            
+            with self.db.transaction() as conn:
+                cursor = self.db._get_cursor(conn)
+                sonuclar = self._kosullu_azalt(cursor, kalemler, kaynak, kaynak_no)
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
+            if self.db._is_transient_error(e):
+                raise
             hata_mesajlari.append(f"Toplu stok azaltma hatası: {str(e)}")
             return (basarili_mesajlar, hata_mesajlari)
-        finally:
-            self.db.close()
+        
+        for (urun_kodu, miktar), urun_adi, (dusuldu, row, kalan) in zip(kalemler, adlar, sonuclar):
+            if row is None:
+                hata_mesajlari.append(f"{urun_adi} ({urun_kodu}): Stokta bulunamadı")
+            elif not dusuldu:
+                hata_mesajlari.append(
+                    f"{row['urun_adi']} ({urun_kodu}): Yetersiz stok! Mevcut: {kalan}{_rezerve_notu(row)}, İstenen: {miktar}"
+                )
+            else:
+                basarili_mesajlar.append(f"{row['urun_adi']} ({urun_kodu}): Stok güncellendi (Kalan: {kalan})")
+        return (basarili_mesajlar, hata_mesajlari)
+
+    def stok_hareket_geri_al(self, kaynak: str, kaynak_no: str, iptal_kaynagi: str,
+                             aciklama: Optional[str] = None) -> int:
+        """
+        Bir belgenin (kaynak + kaynak_no, örn. 'is_evraki' + iş emri no) stok hareketlerini ters hareketle geri al:
+        ürün başına net miktar stoğa geri eklenir, iptal_kaynagi ile aynı kaynak_no'ya yazılır.
+        Önceki iptaller nete dahildir; iki kez çağrılması stoğu iki kez artırmaz. Geri alınan ürün sayısını döndürür.
+        """
+        with self.db.transaction() as conn:
+            cursor = self.db._get_cursor(conn)
+            query = """
+                SELECT stok_id, MAX(urun_kodu) AS urun_kodu, SUM(miktar) AS net
+                FROM stok_hareket
+                WHERE kaynak_no = ? AND kaynak IN (?, ?) AND stok_id IS NOT NULL
+                GROUP BY stok_id
+            """
+            cursor.execute(self.db._convert_placeholders(query), (kaynak_no, kaynak, iptal_kaynagi))
+            netler = [row for row in cursor.fetchall() if row["net"]]
+            if not netler:
+                return 0
+            query = """
+                UPDATE stok SET stok_miktari = stok_miktari - ?, guncelleme_tarihi = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """
+            cursor.executemany(self.db._convert_placeholders(query), [(row["net"], row["stok_id"]) for row in netler])
+            self.katalog.miktar_degisti(row["stok_id"] for row in netler)
+            self._hareket_ekle(cursor, [
+                (row["stok_id"], row["urun_kodu"], -row["net"], iptal_kaynagi, kaynak_no, aciklama)
+                for row in netler
+            ])
+        return len(netler)
+
+    def stok_hareket_listele(self, stok_id: int, baslangic: Optional[str] = None, bitis: Optional[str] = None,
+                             limit: int = VARSAYILAN_LIMIT) -> List[Dict]:
+        """
+        Ürünün hareket geçmişi, yeniden eskiye (idx_stok_hareket_stok_tarih).
+        baslangic / bitis: 'YYYY-MM-DD' (bitis dahil); verilmezse tüm geçmiş.
+        """
+        bitis_siniri = (date.fromisoformat(bitis) + timedelta(days=1)).isoformat() if bitis else "9999-12-31"
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(
+                self.db._convert_placeholders(_SQL_HAREKETLER),
+                (stok_id, baslangic or "1900-01-01", bitis_siniri, max(1, min(int(limit), MAX_LIMIT))),
+            )
+            rows = cursor.fetchall()
+        return list(rows)
+
+    def stok_bakiye_dogrula(self, duzelt: bool = False) -> List[Dict]:
+        """
+        stok.stok_miktari ile stok_hareket toplamı farklı olan ürünleri döndür (defter esastır).
+        duzelt=True ise bu ürünlerin stok_miktari hareket toplamından yeniden hesaplanır.
+        """
+        query = """
+            SELECT s.id, s.urun_kodu, s.urun_adi, s.stok_miktari, COALESCE(h.toplam, 0) AS defter_toplami
+            FROM stok s
+            LEFT JOIN (
+                SELECT stok_id, SUM(miktar) AS toplam FROM stok_hareket
+                WHERE stok_id IS NOT NULL GROUP BY stok_id
+            ) h ON h.stok_id = s.id
+            WHERE ABS(s.stok_miktari - COALESCE(h.toplam, 0)) >= 0.005
+            ORDER BY s.id
+        """
+        if not duzelt:
+            with self.db.okuma() as conn:
+                cursor = self.db._get_cursor(conn)
+                cursor.execute(query)
+                return list(cursor.fetchall())
+
+        with self.db.transaction() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(query)
+            farklar = list(cursor.fetchall())
+            if farklar:
+                # Okunan değer yerine alt sorgu: okuma ile güncelleme arasındaki yeni hareketler de dahil olur
+                guncelle = """
+                    UPDATE stok SET stok_miktari = (
+                        SELECT COALESCE(SUM(miktar), 0) FROM stok_hareket WHERE stok_id = stok.id
+                    ), guncelleme_tarihi = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """
+                cursor.executemany(self.db._convert_placeholders(guncelle), [(row["id"],) for row in farklar])
+                self.katalog.miktar_degisti(row["id"] for row in farklar)
+        if farklar:
+            print(f"🔧 Stok bakiyesi hareketlerden yeniden hesaplandı: {len(farklar)} ürün")
+        return farklar
+
+    def _rezervasyon_birak(self, cursor, kosul: str, params: list) -> List[Dict]:
+        """
+        Koşula uyan rezervasyonları kilitli oku, sil ve ürünlerin rezerve_miktar sayacından düş
+        (çağıranın transaction'ında). Silinen rezervasyonları döndürür.
+        """
+        query = self.db._for_update(_SQL_REZERVASYONLAR.format(kosul))
+        cursor.execute(self.db._convert_placeholders(query), params)
+        rezervasyonlar = list(cursor.fetchall())
+        if not rezervasyonlar:
+            return rezervasyonlar
+        toplamlar: Dict[int, Any] = {}
+        for row in rezervasyonlar:
+            toplamlar[row["stok_id"]] = toplamlar.get(row["stok_id"], 0) + row["miktar"]
+        query = "UPDATE stok SET rezerve_miktar = rezerve_miktar - ?, guncelleme_tarihi = guncelleme_tarihi WHERE id = ?"
+        cursor.executemany(self.db._convert_placeholders(query), [(miktar, stok_id) for stok_id, miktar in toplamlar.items()])
+        idler = [row["id"] for row in rezervasyonlar]
+        parti = self.db.dialect.en_fazla_parametre
+        for bas in range(0, len(idler), parti):
+            dilim = idler[bas:bas + parti]
+            query = f"DELETE FROM stok_rezervasyon WHERE id IN ({', '.join('?' * len(dilim))})"
+            cursor.execute(self.db._convert_placeholders(query), dilim)
+        self.katalog.miktar_degisti(toplamlar)
+        return rezervasyonlar
+
+    def stok_rezerve_et(self, taslak: Optional[str], urunler: List[Dict[str, Any]], evrak_no: Optional[str] = None,
+                        sure_dakika: Optional[int] = None) -> Tuple[str, List[str], List[str]]:
+        """
+        Taslak evrakın ürünlerini rezerve et; taslağın önceki rezervasyonlarının yerine geçer
+        (taslak her değiştiğinde güncel listeyle çağrılır, boş liste rezervasyonları bırakır).
+        taslak: sunucunun verdiği taslak anahtarı; None ise yeni anahtar üretilir ve döndürülür. Rezervasyonlar
+        iş emri no ile değil bu anahtarla tutulur: aynı anda açılan iki taslağa aynı iş emri no önerilebilir.
+        evrak_no: taslağın iş emri no'su (yalnızca bilgi).
+        Her kalem koşullu UPDATE ile ayrılır (stok_miktari - rezerve_miktar >= miktar); yetmeyen / bulunamayan
+        kalem atlanır. urunler: stok_miktar_azalt_batch ile aynı ({"urun_kodu", "miktar", "urun_adi"}).
+        Rezervasyon sure_dakika (varsayılan STOK_REZERVASYON_SURESI) sonra stok_rezervasyon_temizle ile düşer;
+        evrak kaydedilirken stok_rezervasyon_birak ile bırakılıp aynı transaction'da gerçek düşüme dönüşür.
+        Dönüş: (taslak, başarılı mesajlar, hata mesajları).
+        """
+        taslak = taslak or secrets.token_hex(16)
+        basarili_mesajlar = []
+        kalemler, adlar, hata_mesajlari = _kalemleri_ayikla(urunler)
+        bitis = (datetime.now() + timedelta(minutes=sure_dakika or STOK_REZERVASYON_SURESI)).strftime("%Y-%m-%d %H:%M:%S")
+        with self.db.transaction() as conn:
+            cursor = self.db._get_cursor(conn)
+            self._rezervasyon_birak(cursor, "taslak = ?", [taslak])
+            if not kalemler:
+                return (taslak, basarili_mesajlar, hata_mesajlari)
+            query = self.db._convert_placeholders(_SQL_REZERVE)
+            ayrildi = []
+            for urun_kodu, miktar in kalemler:
+                cursor.execute(query, (miktar, urun_kodu, miktar))
+                ayrildi.append(cursor.rowcount == 1)
+            satirlar = self._kod_ile_satirlar(cursor, list(dict.fromkeys(urun_kodu for urun_kodu, _ in kalemler)))
+            rezervasyonlar = [
+                (taslak, evrak_no or "", satirlar[urun_kodu]["id"], urun_kodu, miktar, bitis)
+                for (urun_kodu, miktar), ok in zip(kalemler, ayrildi) if ok
+            ]
+            if rezervasyonlar:
+                query = (
+                    "INSERT INTO stok_rezervasyon (taslak, evrak_no, stok_id, urun_kodu, miktar, bitis) VALUES "
+                    + ", ".join(["(?, ?, ?, ?, ?, ?)"] * len(rezervasyonlar))
+                )
+                cursor.execute(self.db._convert_placeholders(query), [d for r in rezervasyonlar for d in r])
+                self.katalog.miktar_degisti(r[2] for r in rezervasyonlar)
+
+        for (urun_kodu, miktar), urun_adi, ok in zip(kalemler, adlar, ayrildi):
+            row = satirlar.get(urun_kodu)
+            if row is None:
+                hata_mesajlari.append(f"{urun_adi} ({urun_kodu}): Stokta bulunamadı")
+                continue
+            kullanilabilir = row["stok_miktari"] - row["rezerve_miktar"]
+            if ok:
+                basarili_mesajlar.append(f"{row['urun_adi']} ({urun_kodu}): {miktar} rezerve edildi (Kullanılabilir: {kullanilabilir})")
+            else:
+                hata_mesajlari.append(
+                    f"{row['urun_adi']} ({urun_kodu}): Yetersiz stok! Kullanılabilir: {kullanilabilir}, İstenen: {miktar}"
+                )
+        return (taslak, basarili_mesajlar, hata_mesajlari)
+
+    def stok_rezervasyon_birak(self, taslak: str) -> int:
+        """Taslağın rezervasyonlarını bırak (evrak kaydı / taslak iptali); bırakılan rezervasyon sayısını döndür"""
+        with self.db.transaction() as conn:
+            cursor = self.db._get_cursor(conn)
+            return len(self._rezervasyon_birak(cursor, "taslak = ?", [taslak]))
+
+    def stok_rezervasyon_listele(self, taslak: str) -> List[Dict]:
+        """Taslağın rezervasyonları ve ürünlerin kullanılabilir miktarı (stok_miktari - rezerve_miktar)"""
+        query = """
+            SELECT r.id, r.taslak, r.evrak_no, r.stok_id, r.urun_kodu, s.urun_adi, r.miktar, r.bitis,
+                   s.stok_miktari - s.rezerve_miktar AS kullanilabilir
+            FROM stok_rezervasyon r JOIN stok s ON s.id = r.stok_id
+            WHERE r.taslak = ? ORDER BY r.id
+        """
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(self.db._convert_placeholders(query), (taslak,))
+            return list(cursor.fetchall())
+
+    def stok_rezervasyon_temizle(self) -> int:
+        """Süresi dolan rezervasyonları sil ve sayaçlardan düş (zamanlanmış görev); silinen sayısını döndür"""
+        simdi = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.db.transaction() as conn:
+            cursor = self.db._get_cursor(conn)
+            silinen = len(self._rezervasyon_birak(cursor, "bitis <= ?", [simdi]))
+        if silinen:
+            print(f"🧹 Süresi dolan {silinen} stok rezervasyonu bırakıldı")
+        return silinen
+
+    def stok_tahmin_yenile(self, zorla: bool = False) -> int:
+        """
+        Talep tahminini tüm iş evrakı geçmişinden yeniden hesapla (app/talep_tahmini.py) ve stok_tahmin'i
+        tek transaction'da değiştir. Gece görevi ve açılış çağırır; zorla=False iken son
+        TAHMIN_GECERLILIK_SAATI saat içinde hesaplanmışsa (başka worker / önceki çalışma) atlanır ve -1 döner.
+        Yazılan ürün sayısını döndürür.
+        """
+        with self.db.connection() as conn:
+            cursor = self.db._get_tuple_cursor(conn)
+            cursor.execute("SELECT MAX(hesaplama_tarihi) FROM stok_tahmin")
+            son = cursor.fetchone()[0]
+        if isinstance(son, str):
+            son = datetime.fromisoformat(son)
+        if not zorla and son is not None and datetime.now() - son < timedelta(hours=TAHMIN_GECERLILIK_SAATI):
+            return -1
+
+        baslangic = datetime.now()
+        sorgu = self.db._convert_placeholders(_SQL_TAHMIN_KAYITLARI)
+        tahminler = tahmin_hesapla(parti.degerler for parti in self.db.akis(sorgu, parti=1000))
+        with self.db.connection() as conn:
+            cursor = self.db._get_tuple_cursor(conn)
+            cursor.execute("SELECT id, urun_kodu FROM stok WHERE urun_kodu IS NOT NULL")
+            stok_idleri = {katla(urun_kodu): stok_id for stok_id, urun_kodu in cursor.fetchall()}
+        zaman = baslangic.strftime("%Y-%m-%d %H:%M:%S")
+        satirlar = [(stok_idleri.get(katla(tahmin[0])),) + tuple(tahmin) + (zaman,) for tahmin in tahminler]
+        with self.db.unit_of_work():
+            with self.db.transaction() as conn:
+                self.db._get_cursor(conn).execute("DELETE FROM stok_tahmin")
+            self.db.toplu_ekle("stok_tahmin", ("stok_id",) + TAHMIN_KOLONLARI + ("hesaplama_tarihi",), satirlar)
+        sure = (datetime.now() - baslangic).total_seconds()
+        print(f"📈 Talep tahmini yenilendi: {len(satirlar)} ürün ({sure:.1f} sn)")
+        return len(satirlar)
+
+    def stok_siparis_onerileri(self, urun_kodu: Optional[str] = None, hepsi: bool = False,
+                               limit: int = VARSAYILAN_LIMIT) -> List[Dict]:
+        """
+        Talep tahmini ve önerilen sipariş miktarı (hedef_stok - kullanılabilir stok, en az 0), büyükten küçüğe.
+        Tahmin gece hesaplanır (stok_tahmin); öneri okuma anındaki stok ve rezervasyonlarla hesaplanır.
+        hepsi=False: yalnızca sipariş önerilen ürünler. urun_kodu: tek ürün (evraktaki veya stoktaki kod).
+        """
+        kosullar, params = [], []
+        if not hepsi:
+            kosullar.append(f"{_ONERILEN} > 0")
+        if urun_kodu:
+            kosullar.append("(t.urun_kodu = ? OR s.urun_kodu = ?)")
+            params += [urun_kodu.strip(), urun_kodu.strip()]
+        query = _SQL_SIPARIS_ONERILERI
+        if kosullar:
+            query += " WHERE " + " AND ".join(kosullar)
+        query += " ORDER BY onerilen_siparis DESC, t.urun_kodu LIMIT ?"
+        with self.db.okuma() as conn:
+            cursor = self.db._get_cursor(conn)
+            cursor.execute(self.db._convert_placeholders(query), params + [max(1, min(limit, MAX_LIMIT))])
+            return list(cursor.fetchall())
+
+
+def _kalemleri_ayikla(urunler: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, Any]], List[str], List[str]]:
+    """{"urun_kodu", "miktar", "urun_adi"} listesinden geçerli (kod, miktar) kalemleri, adları ve hata mesajları"""
+    kalemler, adlar, hata_mesajlari = [], [], []
+    for urun in urunler:
+        urun_kodu = (urun.get("urun_kodu") or "").strip()
+        miktar = urun.get("miktar", 0)
+        urun_adi = urun.get("urun_adi", "")
+
+        if not urun_kodu:
+            hata_mesajlari.append(f"{urun_adi or 'Bilinmeyen'}: Ürün kodu boş")
+            continue
+
+        if miktar <= 0:
+            hata_mesajlari.append(f"{urun_adi} ({urun_kodu}): Miktar 0'dan büyük olmalıdır")
+            continue
+
+        kalemler.append((urun_kodu, miktar))
+        adlar.append(urun_adi)
+    return kalemler, adlar, hata_mesajlari
+
+
+def _rezerve_notu(row: Dict) -> str:
+    """Yetersiz stok mesajına eklenen rezerve miktar (varsa)"""
+    return f", Rezerve: {row['rezerve_miktar']}" if row.get("rezerve_miktar") else ""
+
 
+def _ayni_tipte(miktar, ornek):
+    """MySQL DECIMAL kolonlar Decimal döner; float ile aritmetik için miktarı aynı tipe çevir"""
+    if isinstance(ornek, Decimal) and not isinstance(miktar, Decimal):
+        return Decimal(str(miktar))
+    return miktar
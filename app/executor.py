@@ -0,0 +1,159 @@
+"""
+Sınırlı thread havuzu - bloklayan çağrıları (DB, html2pdf, Gmail) olay döngüsünden ayırır
+Kuyruk doluysa bekletmeden 503 + Retry-After ile reddeder; her çağrı yeri için
+kuyrukta bekleme ve çalışma süresi metrikleri tutar (worker sayısını boyutlandırmak için).
+"""
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from fastapi import HTTPException
+
+# Oluşturulan tüm executor'lar (izleme endpoint'i için)
+_EXECUTORLER: Dict[str, "SinirliExecutor"] = {}
+
+
+class ExecutorDolu(HTTPException):
+    """Executor kuyruğu dolu - istek hemen 503 ile reddedilir."""
+
+    def __init__(self, ad: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Sunucu şu anda yoğun ({ad}). Lütfen {retry_after} saniye sonra tekrar deneyin.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class _CagriMetrik:
+    """Tek bir çağrı yerinin sayaçları"""
+
+    __slots__ = ("sayi", "hata", "reddedilen", "bekleme_toplam", "bekleme_max", "calisma_toplam", "calisma_max")
+
+    def __init__(self):
+        self.sayi = 0
+        self.hata = 0
+        self.reddedilen = 0
+        self.bekleme_toplam = 0.0
+        self.bekleme_max = 0.0
+        self.calisma_toplam = 0.0
+        self.calisma_max = 0.0
+
+    def sozluk(self) -> dict:
+        return {
+            "sayi": self.sayi,
+            "hata": self.hata,
+            "reddedilen": self.reddedilen,
+            "ort_bekleme_ms": round(self.bekleme_toplam / self.sayi * 1000, 3) if self.sayi else 0.0,
+            "max_bekleme_ms": round(self.bekleme_max * 1000, 3),
+            "ort_calisma_ms": round(self.calisma_toplam / self.sayi * 1000, 3) if self.sayi else 0.0,
+            "max_calisma_ms": round(self.calisma_max * 1000, 3),
+        }
+
+
+class SinirliExecutor:
+    """
+    Boyutu ve kuyruk derinliği sınırlı thread havuzu.
+    - max_workers: aynı anda çalışan iş sayısı
+    - max_kuyruk: worker bekleyen en fazla iş sayısı; aşılırsa ExecutorDolu (503)
+    """
+
+    def __init__(self, ad: str, max_workers: int, max_kuyruk: int):
+        self.ad = ad
+        self.max_workers = max(1, int(max_workers))
+        self.max_kuyruk = max(0, int(max_kuyruk))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=ad)
+        self._kilit = threading.Lock()
+        self._kuyrukta = 0
+        self._calisan = 0
+        self._reddedilen = 0
+        self._metrikler: Dict[str, _CagriMetrik] = {}
+        _EXECUTORLER[ad] = self
+
+    def _metrik(self, cagri_yeri: str) -> _CagriMetrik:
+        m = self._metrikler.get(cagri_yeri)
+        if m is None:
+            m = self._metrikler[cagri_yeri] = _CagriMetrik()
+        return m
+
+    def _retry_after(self) -> int:
+        """Kuyruğun boşalması için tahmini süre (saniye, en az 1)"""
+        sayi = sum(m.sayi for m in self._metrikler.values())
+        if not sayi:
+            return 1
+        ort_calisma = sum(m.calisma_toplam for m in self._metrikler.values()) / sayi
+        return max(1, math.ceil(ort_calisma * (self._kuyrukta + 1) / self.max_workers))
+
+    async def run(self, cagri_yeri: str, fonksiyon, *args, **kwargs):
+        """fonksiyon(*args, **kwargs) çağrısını havuzda çalıştır ve sonucunu bekle (contextvars korunur)."""
+        with self._kilit:
+            if self._kuyrukta + self._calisan >= self.max_workers + self.max_kuyruk:
+                self._reddedilen += 1
+                self._metrik(cagri_yeri).reddedilen += 1
+                raise ExecutorDolu(self.ad, self._retry_after())
+            self._kuyrukta += 1
+
+        gonderim = time.perf_counter()
+        ctx = contextvars.copy_context()
+
+        def _is():
+            baslangic = time.perf_counter()
+            with self._kilit:
+                self._kuyrukta -= 1
+                self._calisan += 1
+            hata = False
+            try:
+                return ctx.run(fonksiyon, *args, **kwargs)
+            except BaseException:
+                hata = True
+                raise
+            finally:
+                bitis = time.perf_counter()
+                with self._kilit:
+                    self._calisan -= 1
+                    m = self._metrik(cagri_yeri)
+                    m.sayi += 1
+                    m.hata += hata
+                    m.bekleme_toplam += baslangic - gonderim
+                    m.bekleme_max = max(m.bekleme_max, baslangic - gonderim)
+                    m.calisma_toplam += bitis - baslangic
+                    m.calisma_max = max(m.calisma_max, bitis - baslangic)
+
+        gelecek = self._executor.submit(_is)
+        try:
+            return await asyncio.wrap_future(gelecek)
+        except asyncio.CancelledError:
+            # İş henüz başlamadan iptal edildiyse kuyruk sayacını geri al
+            if gelecek.cancel():
+                with self._kilit:
+                    self._kuyrukta -= 1
+            raise
+
+    def stats(self) -> dict:
+        """Anlık doluluk ve çağrı yeri bazında metrikler"""
+        with self._kilit:
+            return {
+                "max_workers": self.max_workers,
+                "max_kuyruk": self.max_kuyruk,
+                "calisan": self._calisan,
+                "kuyrukta": self._kuyrukta,
+                "reddedilen": self._reddedilen,
+                "cagri_yerleri": {ad: m.sozluk() for ad, m in sorted(self._metrikler.items())},
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def executor_istatistikleri() -> dict:
+    """Tüm executor'ların istatistikleri"""
+    return {ad: e.stats() for ad, e in _EXECUTORLER.items()}
+
+
+def executorleri_kapat() -> None:
+    """Tüm executor'ları kapat (uygulama kapanırken)"""
+    for e in list(_EXECUTORLER.values()):
+        e.shutdown()
@@ -0,0 +1,176 @@
+"""
+Süreç içi ürün kataloğu önbelleği (StokDB.stok_getir / stok_urun_kodu_ile_ara / stok_urun_adi_ile_ara)
+Satırlar (bulunamadı sonucu dahil) ("id" | "kod" | "ad", anahtar) ile tutulur; ilk istekte birincil
+veritabanından okunur (lazy), en fazla DB_KATALOG_BOYUT kayıt (LRU) ve DB_KATALOG_TTL saniye yaşar.
+
+Geçersizleştirme: ürünü ekleyen / güncelleyen / silen yazma commit edildikten sonra bu süreçteki önbelleği
+boşaltır ve onbellek_surum tablosundaki sürümü kısa, ayrı bir transaction'da artırır (yazma transaction'ında
+artırılsa tek satırlık sürüm kilidi commit'e kadar tutulur, tüm stok yazmaları sıraya girer ve stok satırı
+kilitleriyle ters sırada alınıp deadlock'a yol açabilirdi; commit öncesi boşaltılsa, o arada okuyan istek eski
+satırı yeni nesilde önbelleğe yazabilirdi). Diğer worker'lar en fazla DB_KATALOG_SURUM_ARALIGI saniyede
+bir sürümü tek satırlık PK sorgusuyla okur; değişmişse önbelleklerini boşaltır. Böylece başka bir
+worker'ın yazması en geç bu aralık kadar gecikmeyle görülür.
+
+Yalnızca stok_miktari / rezerve_miktar'ı değiştiren yazmalar (düşüm, rezervasyon, iade, bakiye düzeltme)
+sürümü artırmaz; commit'ten sonra bu süreçte yalnızca o ürünlerin satırları ve analiz sonuçları düşürülür.
+Diğer worker'ların önbelleğindeki miktarlar en fazla DB_KATALOG_TTL kadar eski olabilir (düşüm / rezervasyon
+koşullu UPDATE ile veritabanında doğrulandığından yalnızca gösterimi etkiler).
+
+Unit of work içinde önbellek kullanılmaz (commit edilmemiş veri önbelleğe girmesin).
+
+Ayarlar:
+    DB_KATALOG_BOYUT          en fazla kayıt (varsayılan 5000; 0 önbelleği kapatır)
+    DB_KATALOG_TTL            kayıt ömrü, saniye (varsayılan 300)
+    DB_KATALOG_SURUM_ARALIGI  sürüm kontrol aralığı, saniye (varsayılan 2)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+KATALOG_BOYUT = int(os.getenv("DB_KATALOG_BOYUT", "5000"))
+KATALOG_TTL = float(os.getenv("DB_KATALOG_TTL", "300"))
+KATALOG_SURUM_ARALIGI = float(os.getenv("DB_KATALOG_SURUM_ARALIGI", "2"))
+
+_SQL_SURUM = "SELECT surum FROM onbellek_surum WHERE ad = ?"
+_SQL_SURUM_ARTIR = "UPDATE onbellek_surum SET surum = surum + 1 WHERE ad = ?"
+
+
+def surum_oku(db_conn, ad: str, cursor=None) -> int:
+    """onbellek_surum'daki sürüm (birincilden; cursor verilirse onun transaction'ında)"""
+    if cursor is None:
+        with db_conn.connection() as conn:
+            return surum_oku(db_conn, ad, db_conn._get_tuple_cursor(conn))
+    cursor.execute(db_conn._convert_placeholders(_SQL_SURUM), (ad,))
+    row = cursor.fetchone()
+    if row is None:
+        return 0
+    return row["surum"] if isinstance(row, dict) else row[0]
+
+
+def surum_artir(db_conn, ad: str, cursor) -> None:
+    """cursor'ın transaction'ında sürümü artır (commit ile diğer worker'lara görünür)"""
+    cursor.execute(db_conn._convert_placeholders(_SQL_SURUM_ARTIR), (ad,))
+
+
+class KatalogOnbellegi:
+    """Sürüm kontrollü, boyut ve süre sınırlı satır önbelleği (thread-safe)"""
+
+    def __init__(self, db_conn, ad: str, boyut: int = KATALOG_BOYUT, ttl: float = KATALOG_TTL,
+                 surum_araligi: float = KATALOG_SURUM_ARALIGI):
+        self.db = db_conn
+        self.ad = ad
+        self.boyut = boyut
+        self.ttl = ttl
+        self.surum_araligi = surum_araligi
+        self._kayitlar: "OrderedDict[Tuple[str, object], Tuple[Optional[Dict], float]]" = OrderedDict()
+        self._kilit = threading.Lock()
+        self._surum: Optional[int] = None
+        # Her boşaltmada artar; okuma sürerken boşaltılan önbelleğe eski satır yazılmasın
+        self._nesil = 0
+        self._son_kontrol = float("-inf")
+        self._istatistik = {"isabet": 0, "iska": 0, "bosaltma": 0}
+
+    def getir(self, tur: str, anahtar, yukle: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Önbellekte varsa kopyasını döndür; yoksa yukle() ile oku ve sakla.
+        yukle birincil veritabanından okumalıdır (replika gecikmesi önbelleğe girmesin).
+        """
+        if self.boyut <= 0 or self.db.oturum_acik_mi():
+            return yukle()
+        self._surum_kontrol()
+        simdi = time.monotonic()
+        with self._kilit:
+            kayit = self._kayitlar.get((tur, anahtar))
+            if kayit is not None and kayit[1] > simdi:
+                self._kayitlar.move_to_end((tur, anahtar))
+                self._istatistik["isabet"] += 1
+                return dict(kayit[0]) if kayit[0] is not None else None
+            self._istatistik["iska"] += 1
+            nesil = self._nesil
+        satir = yukle()
+        with self._kilit:
+            if nesil == self._nesil:
+                self._kayitlar[(tur, anahtar)] = (dict(satir) if satir else None, simdi + self.ttl)
+                self._kayitlar.move_to_end((tur, anahtar))
+                while len(self._kayitlar) > self.boyut:
+                    self._kayitlar.popitem(last=False)
+        return satir
+
+    def _surum_kontrol(self) -> None:
+        """Aralık dolduysa veritabanındaki sürümü oku; değişmişse önbelleği boşalt"""
+        simdi = time.monotonic()
+        if simdi - self._son_kontrol < self.surum_araligi:
+            return
+        self._son_kontrol = simdi
+        surum = surum_oku(self.db, self.ad)
+        with self._kilit:
+            if surum != self._surum:
+                if self._surum is not None:
+                    self._bosalt()
+                self._surum = surum
+
+    def surum_artir(self) -> None:
+        """
+        Ürün ekleyen / güncelleyen / silen yazmanın transaction'ı içinde çağrılır: commit edilince bu süreçteki
+        önbellek boşaltılır ve diğer worker'lar için sürüm ayrı bir transaction'da artırılır (geri alınırsa
+        hiçbiri yapılmaz).
+        """
+        self.db.commit_sonrasi(self._yayinla)
+
+    def miktar_degisti(self, stok_idler: Iterable[int]) -> None:
+        """
+        Yalnızca stok_miktari / rezerve_miktar'ı değiştiren yazmanın transaction'ı içinde çağrılır: sürüm
+        artırılmaz; commit edilince bu süreçte ürünlerin satırları ve analiz sonuçları düşürülür.
+        """
+        idler = set(stok_idler)
+        if idler:
+            self.db.commit_sonrasi(lambda: self._satirlari_dusur(idler))
+
+    def _yayinla(self) -> None:
+        """Commit sonrası: önbelleği boşalt, sürümü kısa bir transaction'da artır"""
+        self.temizle()
+        try:
+            with self.db.transaction() as conn:
+                cursor = self.db._get_tuple_cursor(conn)
+                surum_artir(self.db, self.ad, cursor)
+                surum = surum_oku(self.db, self.ad, cursor)
+        except Exception as e:
+            # Yazma commit edildi; diğer worker'lar değişikliği en geç DB_KATALOG_TTL sonra görür
+            print(f"⚠️ Katalog sürümü artırılamadı ({self.ad}): {e}")
+            return
+        with self._kilit:
+            # Arada başka worker yazmadıysa kendi artışımız için önbelleği bir daha boşaltma
+            if self._surum is not None and surum == self._surum + 1:
+                self._surum = surum
+
+    def _satirlari_dusur(self, idler: set) -> None:
+        """stok_id'si idler'de olan satırları ve analiz sonuçlarını düşür (yüklenmekte olanlar da yazılmaz)"""
+        with self._kilit:
+            self._nesil += 1
+            for anahtar in [a for a, (satir, _) in self._kayitlar.items()
+                            if a[0] == "analiz" or (satir is not None and satir.get("id") in idler)]:
+                del self._kayitlar[anahtar]
+
+    def temizle(self) -> None:
+        """Önbelleği boşalt; sonraki okuma sürümü yeniden kontrol eder"""
+        with self._kilit:
+            self._bosalt()
+        self._son_kontrol = float("-inf")
+
+    def _bosalt(self) -> None:
+        self._nesil += 1
+        if self._kayitlar:
+            self._kayitlar.clear()
+            self._istatistik["bosaltma"] += 1
+
+    def istatistik(self) -> dict:
+        with self._kilit:
+            return {
+                **self._istatistik,
+                "kayit": len(self._kayitlar),
+                "boyut": self.boyut,
+                "ttl": self.ttl,
+                "surum": self._surum,
+            }
@@ -0,0 +1,149 @@
+"""
+Şema migration'ları - sürümlü, sıralı
+Her migration bu paket içinde `mNNNN_aciklama.py` dosyasıdır ve şunları tanımlar:
+    VERSIYON = NNNN
+    AD = "kısa açıklama"
+    def yukselt(cursor): ...
+Uygulanan sürümler `schema_version` tablosunda tutulur. Başlangıçta tek bir sorgu ile
+"zaten güncel mi" kontrol edilir; eksik migration varsa MySQL GET_LOCK ile tek bir
+worker uygular, diğerleri bekleyip tekrar kontrol eder.
+Migration'lar MySQL sözdizimiyle yazılır; SQLite bağlantısı (app/db_dialect.py) CREATE TABLE'ı çevirir,
+şema sorguları (tablo / kolon / index var mı) lehçeye göre çalışır.
+
+Komut satırı: python -m app.migrations        (bekleyenleri uygula)
+              python -m app.migrations durum  (mevcut / hedef sürüm)
+"""
+import importlib
+import pkgutil
+import re
+from typing import List, Tuple
+
+from app.db_dialect import cursor_dialect
+
+_KILIT_ADI = "onmuhasebe_schema_migrate"
+_KILIT_BEKLEME = 120
+
+
+def migrationlari_yukle() -> List[Tuple[int, str, object]]:
+    """Paket içindeki migration modüllerini sürüm sırasıyla döndür: [(versiyon, ad, modul)]"""
+    liste = []
+    for bilgi in pkgutil.iter_modules(__path__):
+        if not re.match(r"^m\d{4}_", bilgi.name):
+            continue
+        modul = importlib.import_module(f"{__name__}.{bilgi.name}")
+        liste.append((int(modul.VERSIYON), getattr(modul, "AD", bilgi.name), modul))
+    liste.sort(key=lambda m: m[0])
+    surumler = [m[0] for m in liste]
+    if len(surumler) != len(set(surumler)):
+        raise RuntimeError(f"Aynı sürüm numarasına sahip birden fazla migration var: {surumler}")
+    return liste
+
+
+def hedef_surum() -> int:
+    liste = migrationlari_yukle()
+    return liste[-1][0] if liste else 0
+
+
+def _schema_version_olustur(cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versiyon INT PRIMARY KEY,
+            ad VARCHAR(255) NOT NULL,
+            uygulanma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def mevcut_surum(cursor) -> int:
+    """Veritabanına uygulanmış en yüksek sürüm (tablo yoksa 0)"""
+    try:
+        cursor.execute("SELECT MAX(versiyon) FROM schema_version")
+    except Exception:
+        return 0
+    row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+def migrate(conn) -> int:
+    """
+    Bekleyen migration'ları sırayla uygula, uygulanan migration sayısını döndür.
+    conn: açık bir pymysql / SQLite bağlantısı (kapatmak çağırana aittir).
+    """
+    liste = migrationlari_yukle()
+    hedef = liste[-1][0] if liste else 0
+    cursor = conn.cursor()
+    dialect = cursor_dialect(cursor)
+    try:
+        # Hızlı yol: tek sorgu, kilit yok
+        surum = mevcut_surum(cursor)
+        conn.commit()
+        if surum >= hedef:
+            print(f"✅ Veritabanı şeması güncel (sürüm {surum})")
+            return 0
+
+        if not dialect.kilit_al(cursor, _KILIT_ADI, _KILIT_BEKLEME):
+            raise RuntimeError("Migration kilidi alınamadı (başka bir süreç migration çalıştırıyor olabilir)")
+        try:
+            _schema_version_olustur(cursor)
+            conn.commit()
+            # Kilidi beklerken başka bir worker uygulamış olabilir
+            surum = mevcut_surum(cursor)
+            conn.commit()
+            uygulanan = 0
+            for versiyon, ad, modul in liste:
+                if versiyon <= surum:
+                    continue
+                print(f"🔄 Migration {versiyon:04d} uygulanıyor: {ad}")
+                try:
+                    modul.yukselt(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_version (versiyon, ad) VALUES (%s, %s)", (versiyon, ad)
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    print(f"❌ Migration {versiyon:04d} başarısız: {ad}")
+                    raise
+                uygulanan += 1
+            print(f"✅ Veritabanı şeması güncellendi: {surum} → {hedef} ({uygulanan} migration)")
+            return uygulanan
+        finally:
+            try:
+                dialect.kilit_birak(cursor, _KILIT_ADI)
+            except Exception:
+                pass
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+# ---------- Migration dosyaları için yardımcılar ----------
+
+def tablo_var_mi(cursor, tablo: str) -> bool:
+    return cursor_dialect(cursor).tablo_var_mi(cursor, tablo)
+
+
+def kolon_var_mi(cursor, tablo: str, kolon: str) -> bool:
+    return cursor_dialect(cursor).kolon_var_mi(cursor, tablo, kolon)
+
+
+def kolon_ekle(cursor, tablo: str, kolon: str, tanim: str) -> bool:
+    """Kolon yoksa ekle (hata yakalayıp geçmek yerine önce kontrol eder). Eklendiyse True."""
+    if kolon_var_mi(cursor, tablo, kolon):
+        return False
+    cursor.execute(f"ALTER TABLE {tablo} ADD COLUMN {kolon} {tanim}")
+    return True
+
+
+def index_var_mi(cursor, tablo: str, index: str) -> bool:
+    return cursor_dialect(cursor).index_var_mi(cursor, tablo, index)
+
+
+def index_ekle(cursor, tablo: str, index: str, kolonlar: str, unique: bool = False) -> bool:
+    """Index yoksa oluştur. Oluşturulduysa True."""
+    if index_var_mi(cursor, tablo, index):
+        return False
+    cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {index} ON {tablo} ({kolonlar})")
+    return True
@@ -0,0 +1,32 @@
+"""
+Migration komut satırı
+    python -m app.migrations          bekleyen migration'ları uygula
+    python -m app.migrations durum    mevcut ve hedef sürümü göster
+"""
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from app.db_connection import DatabaseConnection
+from app.migrations import hedef_surum, mevcut_surum, migrate
+
+
+def main() -> int:
+    load_dotenv()
+    db_conn = DatabaseConnection(database_url=os.getenv("DATABASE_URL"))
+    conn = db_conn.connect()
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == "durum":
+            cursor = conn.cursor()
+            print(f"Mevcut sürüm: {mevcut_surum(cursor)} / Hedef sürüm: {hedef_surum()}")
+            cursor.close()
+            return 0
+        migrate(conn)
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
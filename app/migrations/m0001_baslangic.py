@@ -0,0 +1,175 @@
+"""
+Başlangıç şeması: mevcut tüm tablolar ve sonradan eklenen kolonlar
+Eski init_database() ile oluşturulmuş veritabanlarında da güvenle çalışır (IF NOT EXISTS / kolon kontrolü).
+"""
+from app.migrations import kolon_ekle
+
+VERSIYON = 1
+AD = "baslangic_semasi"
+
+_TABLOLAR = [
+    """
+        CREATE TABLE IF NOT EXISTS stok (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            urun_kodu VARCHAR(255) UNIQUE,
+            urun_adi VARCHAR(255) NOT NULL,
+            marka VARCHAR(255),
+            birim VARCHAR(50) DEFAULT 'Adet',
+            stok_miktari DECIMAL(10, 2) DEFAULT 0,
+            birim_fiyat DECIMAL(10, 2) DEFAULT 0,
+            aciklama TEXT,
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            guncelleme_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS cari (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            cari_kodu VARCHAR(255) UNIQUE,
+            unvan VARCHAR(255) NOT NULL,
+            tip VARCHAR(50) NOT NULL CHECK(tip IN ('Müşteri', 'Tedarikçi')),
+            telefon VARCHAR(50),
+            email VARCHAR(255),
+            adres TEXT,
+            tc_kimlik_no VARCHAR(11) UNIQUE,
+            vergi_no VARCHAR(50),
+            vergi_dairesi VARCHAR(255),
+            bakiye DECIMAL(10, 2) DEFAULT 0,
+            aciklama TEXT,
+            firma_tipi VARCHAR(50) DEFAULT 'Şahıs',
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            guncelleme_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS is_evraki (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            is_emri_no INT NOT NULL,
+            tarih VARCHAR(50) NOT NULL,
+            musteri_unvan VARCHAR(255) NOT NULL,
+            telefon VARCHAR(50),
+            arac_plakasi VARCHAR(20),
+            cekici_dorse VARCHAR(50),
+            marka_model VARCHAR(255),
+            talep_edilen_isler TEXT,
+            musteri_sikayeti TEXT,
+            yapilan_is TEXT,
+            baslama_saati VARCHAR(10),
+            bitis_saati VARCHAR(10),
+            kullanilan_urunler TEXT,
+            toplam_tutar DECIMAL(10, 2) DEFAULT 0,
+            tc_kimlik_no VARCHAR(11),
+            odeme_durumu VARCHAR(20) DEFAULT 'odenmedi',
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS is_prosesi (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            proses_adi VARCHAR(255) NOT NULL,
+            proses_tipi VARCHAR(50) NULL,
+            aciklama TEXT,
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            guncelleme_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS is_prosesi_maddeleri (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            proses_id INT NOT NULL,
+            sira_no INT NOT NULL,
+            madde_adi VARCHAR(255) NOT NULL,
+            aciklama TEXT,
+            kullanilan_malzemeler TEXT,
+            tamamlandi BOOLEAN DEFAULT FALSE,
+            tamamlanma_tarihi TIMESTAMP NULL,
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (proses_id) REFERENCES is_prosesi(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(100) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            role VARCHAR(30) NOT NULL DEFAULT 'user',
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS arac (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            arac_plakasi VARCHAR(20) NOT NULL UNIQUE,
+            arac_tipi VARCHAR(20) NOT NULL DEFAULT 'diğer',
+            marka VARCHAR(100),
+            model VARCHAR(100),
+            model_yili INT,
+            sasi_no VARCHAR(17),
+            motor_no VARCHAR(100),
+            guncel_km DECIMAL(12, 2) DEFAULT 0,
+            alis_tarihi DATE,
+            alis_fiyati DECIMAL(12, 2),
+            durum VARCHAR(20) NOT NULL DEFAULT 'aktif',
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            guncelleme_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS arac_belge (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            arac_id INT NOT NULL,
+            belge_turu VARCHAR(50) NOT NULL,
+            duzenlenme_tarihi DATE,
+            bitis_tarihi DATE NOT NULL,
+            belge_dosya_path VARCHAR(500),
+            kayit_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (arac_id) REFERENCES arac(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS arac_bakim (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            arac_id INT NOT NULL,
+            bakim_turu VARCHAR(50) NOT NULL,
+            aciklama TEXT,
+            bakim_tarihi DATE NOT NULL,
+            bakim_km DECIMAL(12, 2),
+            maliyet DECIMAL(12, 2),
+            kayit_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (arac_id) REFERENCES arac(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS sofor (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            ad_soyad VARCHAR(255) NOT NULL,
+            tc_kimlik_no VARCHAR(11) NOT NULL UNIQUE,
+            telefon VARCHAR(50) NOT NULL,
+            email VARCHAR(255),
+            adres TEXT,
+            ise_baslama_tarihi DATE NOT NULL,
+            src_belge_no VARCHAR(100) NOT NULL,
+            src_bitis_tarihi DATE NOT NULL,
+            ehliyet_sinifi VARCHAR(30) NOT NULL,
+            ehliyet_bitis_tarihi DATE NOT NULL,
+            psikoteknik_bitis DATE NOT NULL,
+            acil_iletisim VARCHAR(255) NOT NULL,
+            iban VARCHAR(34),
+            durum VARCHAR(20) NOT NULL DEFAULT 'aktif',
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            guncelleme_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+
+def yukselt(cursor):
+    for ddl in _TABLOLAR:
+        cursor.execute(ddl)
+
+    # Sonradan eklenen kolonlar (eski kurulumlarda eksik olabilir)
+    kolon_ekle(cursor, "is_evraki", "odeme_durumu", "VARCHAR(20) DEFAULT 'odenmedi'")
+    kolon_ekle(cursor, "is_prosesi", "proses_tipi", "VARCHAR(50) NULL")
+    kolon_ekle(cursor, "is_prosesi_maddeleri", "kullanilan_malzemeler", "TEXT")
+    if kolon_ekle(cursor, "cari", "firma_tipi", "VARCHAR(50) DEFAULT 'Şahıs'"):
+        cursor.execute("UPDATE cari SET firma_tipi = 'Şahıs' WHERE firma_tipi IS NULL")
@@ -0,0 +1,53 @@
+"""
+Sık çalışan sorgular için ikincil index'ler ve aylık rapor dönemi kolonu
+is_evraki.tarih 'Gün-Ay-Yıl' metni olduğundan ay filtresi (LIKE '%-1-2025') index kullanamıyordu;
+tarih_donem ('YYYY-MM') kolonu eklenip mevcut kayıtlar doldurulur.
+"""
+from app.migrations import index_ekle, kolon_ekle
+
+VERSIYON = 2
+AD = "indexler_ve_tarih_donem"
+
+_INDEXLER = [
+    # (tablo, index, kolonlar)
+    ("is_evraki", "idx_is_evraki_tarih_donem", "tarih_donem, is_emri_no"),
+    ("is_evraki", "idx_is_evraki_olusturma", "olusturma_tarihi"),
+    ("is_evraki", "idx_is_evraki_is_emri_no", "is_emri_no"),
+    ("arac_belge", "idx_arac_belge_bitis", "bitis_tarihi"),
+    ("arac_belge", "idx_arac_belge_arac_bitis", "arac_id, bitis_tarihi"),
+    ("arac_bakim", "idx_arac_bakim_arac_tarih", "arac_id, bakim_tarihi"),
+    ("cari", "idx_cari_vergi_no", "vergi_no"),
+    ("cari", "idx_cari_unvan", "unvan"),
+    ("stok", "idx_stok_urun_adi", "urun_adi"),
+    ("sofor", "idx_sofor_ad_soyad", "ad_soyad"),
+    ("is_prosesi", "idx_is_prosesi_olusturma", "olusturma_tarihi"),
+    ("is_prosesi_maddeleri", "idx_is_prosesi_maddeleri_proses_sira", "proses_id, sira_no"),
+]
+
+
+def _donem(tarih):
+    """'Gün-Ay-Yıl' -> 'YYYY-MM' (app.db_is_evraki.tarih_donemi ile aynı kural; migration sabit kalsın diye kopya)"""
+    parcalar = (tarih or "").strip().replace(".", "-").replace("/", "-").split("-")
+    if len(parcalar) != 3:
+        return None
+    try:
+        ay, yil = int(parcalar[1]), int(parcalar[2])
+    except ValueError:
+        return None
+    if not (1 <= ay <= 12) or not (1900 <= yil <= 9999):
+        return None
+    return f"{yil:04d}-{ay:02d}"
+
+
+def yukselt(cursor):
+    kolon_ekle(cursor, "is_evraki", "tarih_donem", "CHAR(7) NULL")
+
+    cursor.execute("SELECT id, tarih FROM is_evraki WHERE tarih_donem IS NULL")
+    guncellemeler = [(d, row[0]) for row in cursor.fetchall() if (d := _donem(row[1]))]
+    for i in range(0, len(guncellemeler), 1000):
+        cursor.executemany(
+            "UPDATE is_evraki SET tarih_donem = %s WHERE id = %s", guncellemeler[i:i + 1000]
+        )
+
+    for tablo, index, kolonlar in _INDEXLER:
+        index_ekle(cursor, tablo, index, kolonlar)
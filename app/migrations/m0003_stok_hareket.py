@@ -0,0 +1,37 @@
+"""
+Stok hareket defteri (stok_hareket) - yalnızca eklenir, güncellenmez / silinmez
+Her giriş (+) ve çıkış (-) kaynağıyla kaydedilir; stok.stok_miktari hareketlerin toplamının önbelleğidir.
+Mevcut stok miktarları 'acilis' hareketi olarak yazılır, böylece defter toplamı baştan tutarlıdır.
+Ürün silinse de geçmiş kalır (stok_id NULL olur, urun_kodu anlık kopyadır).
+"""
+from app.migrations import index_ekle
+
+VERSIYON = 3
+AD = "stok_hareket"
+
+
+def yukselt(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stok_hareket (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            stok_id INT NULL,
+            urun_kodu VARCHAR(255),
+            miktar DECIMAL(10, 2) NOT NULL,
+            kaynak VARCHAR(30) NOT NULL,
+            kaynak_no VARCHAR(64),
+            aciklama VARCHAR(255),
+            tarih TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (stok_id) REFERENCES stok(id) ON DELETE SET NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # Ürün geçmişi (tarih aralığı) ve belgeye göre geri alma
+    index_ekle(cursor, "stok_hareket", "idx_stok_hareket_stok_tarih", "stok_id, tarih, id")
+    index_ekle(cursor, "stok_hareket", "idx_stok_hareket_kaynak", "kaynak_no, kaynak")
+
+    cursor.execute("SELECT COUNT(*) FROM stok_hareket")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            INSERT INTO stok_hareket (stok_id, urun_kodu, miktar, kaynak, aciklama)
+            SELECT id, urun_kodu, stok_miktari, 'acilis', 'Açılış bakiyesi'
+            FROM stok WHERE stok_miktari <> 0
+        """)
@@ -0,0 +1,26 @@
+"""
+Stok arama index'i (app/arama.py): stok.arama_metni (Türkçe katlanmış ürün kodu / adı / marka)
+ve stok_arama trigram tablosu. Mevcut ürünler için ikisi de doldurulur.
+trigram binary collation'dadır: katlanmış farklı parçalar MySQL'in aksan/harf duyarsız
+karşılaştırmasında çakışıp PK hatası vermesin, eşleşme app/arama.py'deki katlamayla birebir olsun.
+"""
+from app.arama import index_yenile
+from app.migrations import index_ekle, kolon_ekle
+
+VERSIYON = 4
+AD = "stok_arama"
+
+
+def yukselt(cursor):
+    kolon_ekle(cursor, "stok", "arama_metni", "TEXT")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stok_arama (
+            trigram VARCHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+            stok_id INT NOT NULL,
+            PRIMARY KEY (trigram, stok_id),
+            FOREIGN KEY (stok_id) REFERENCES stok(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # Ürün güncellenirken / silinirken eski trigramlar stok_id ile bulunur
+    index_ekle(cursor, "stok_arama", "idx_stok_arama_stok", "stok_id")
+    index_yenile(cursor)
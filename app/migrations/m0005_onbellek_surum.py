@@ -0,0 +1,19 @@
+"""
+Süreç içi önbellekler için sürüm sayaçları (app/katalog.py)
+Önbelleğe alınan tabloya yazan transaction ilgili satırın sürümünü artırır; diğer worker'lar
+sürümü okuyup değiştiyse önbelleklerini boşaltır.
+"""
+VERSIYON = 5
+AD = "onbellek_surum"
+
+
+def yukselt(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS onbellek_surum (
+            ad VARCHAR(64) PRIMARY KEY,
+            surum BIGINT NOT NULL DEFAULT 0
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cursor.execute("SELECT COUNT(*) FROM onbellek_surum WHERE ad = 'stok'")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("INSERT INTO onbellek_surum (ad, surum) VALUES ('stok', 0)")
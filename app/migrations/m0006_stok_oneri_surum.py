@@ -0,0 +1,13 @@
+"""
+Ürün önerisi index'inin (app/oneri.py) sürüm satırı
+'stok' sürümü her stok düşümünde artar; öneri index'i yalnızca kod / ad / marka değişince
+yeniden yüklensin diye ayrı sayaç kullanır.
+"""
+VERSIYON = 6
+AD = "stok_oneri_surum"
+
+
+def yukselt(cursor):
+    cursor.execute("SELECT COUNT(*) FROM onbellek_surum WHERE ad = 'stok_oneri'")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("INSERT INTO onbellek_surum (ad, surum) VALUES ('stok_oneri', 0)")
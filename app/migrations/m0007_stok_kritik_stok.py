@@ -0,0 +1,13 @@
+"""
+Ürün bazında yeniden sipariş eşiği (stok.kritik_stok)
+0: eşik yok. Düşük stok listesi (StokDB.stok_analiz) yalnızca eşiği olan ürünleri index ile tarar.
+"""
+from app.migrations import index_ekle, kolon_ekle
+
+VERSIYON = 7
+AD = "stok_kritik_stok"
+
+
+def yukselt(cursor):
+    kolon_ekle(cursor, "stok", "kritik_stok", "DECIMAL(10, 2) NOT NULL DEFAULT 0")
+    index_ekle(cursor, "stok", "idx_stok_kritik_stok", "kritik_stok")
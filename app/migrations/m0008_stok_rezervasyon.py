@@ -0,0 +1,29 @@
+"""
+Taslak iş evrakları için stok rezervasyonu (stok_rezervasyon) ve rezerve miktar sayacı (stok.rezerve_miktar)
+stok.rezerve_miktar, ürünün süresi dolmamış rezervasyonlarının toplamıdır; rezervasyonla aynı transaction'da
+güncellenir. Kullanılabilir miktar = stok_miktari - rezerve_miktar (satır okumasıyla, toplama sorgusu yok).
+Süresi dolan rezervasyonlar bitis index'i ile bulunup silinir (StokDB.stok_rezervasyon_temizle).
+"""
+from app.migrations import index_ekle, kolon_ekle
+
+VERSIYON = 8
+AD = "stok_rezervasyon"
+
+
+def yukselt(cursor):
+    kolon_ekle(cursor, "stok", "rezerve_miktar", "DECIMAL(10, 2) NOT NULL DEFAULT 0")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stok_rezervasyon (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            evrak_no VARCHAR(64) NOT NULL,
+            stok_id INT NOT NULL,
+            urun_kodu VARCHAR(255),
+            miktar DECIMAL(10, 2) NOT NULL,
+            bitis DATETIME NOT NULL,
+            olusturma_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (stok_id) REFERENCES stok(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    index_ekle(cursor, "stok_rezervasyon", "idx_stok_rezervasyon_evrak", "evrak_no")
+    index_ekle(cursor, "stok_rezervasyon", "idx_stok_rezervasyon_bitis", "bitis")
+    index_ekle(cursor, "stok_rezervasyon", "idx_stok_rezervasyon_stok", "stok_id")
@@ -0,0 +1,25 @@
+"""
+Talep tahmini sonuçları (stok_tahmin) - app/talep_tahmini.py, gece yenilenir (StokDB.stok_tahmin_yenile)
+Ürün başına bir satır (evraktaki ürün kodu); stok_id eşleşen stok kaydıdır (katlanmış kodla), yoksa NULL.
+Önerilen sipariş tabloda tutulmaz, okuma anında güncel kullanılabilir stokla hesaplanır.
+"""
+VERSIYON = 9
+AD = "stok_tahmin"
+
+
+def yukselt(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stok_tahmin (
+            urun_kodu VARCHAR(255) PRIMARY KEY,
+            stok_id INT NULL,
+            urun_adi VARCHAR(255),
+            ay_sayisi INT NOT NULL DEFAULT 0,
+            ortalama DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            mevsim_katsayisi DECIMAL(6, 3) NOT NULL DEFAULT 1,
+            tahmin DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            guvenlik_stogu DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            hedef_stok DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            hesaplama_tarihi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (stok_id) REFERENCES stok(id) ON DELETE SET NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
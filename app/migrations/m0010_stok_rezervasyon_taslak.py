@@ -0,0 +1,15 @@
+"""
+Stok rezervasyonları taslak anahtarıyla (stok_rezervasyon.taslak)
+İş emri no taslaklar arasında benzersiz değildir (is_emri_no_sonraki aynı numarayı önerir); rezervasyonlar
+sunucunun verdiği taslak anahtarıyla tutulur ve bırakılır, evrak_no yalnızca bilgi amaçlıdır.
+Eski (taslaksız) rezervasyonlar süreleri dolunca temizlenir.
+"""
+from app.migrations import index_ekle, kolon_ekle
+
+VERSIYON = 10
+AD = "stok_rezervasyon_taslak"
+
+
+def yukselt(cursor):
+    kolon_ekle(cursor, "stok_rezervasyon", "taslak", "VARCHAR(64) NULL")
+    index_ekle(cursor, "stok_rezervasyon", "idx_stok_rezervasyon_taslak", "taslak")
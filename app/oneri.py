@@ -0,0 +1,165 @@
+"""
+Ürün önerisi (typeahead) - bellek içi önek index'i
+Katlanmış (app/arama.py katla) ürün kodu, ürün adı, ürün adındaki kelimeler ve marka, her biri ayrı
+sıralı (anahtar, stok_id) dizisinde tutulur; önek araması bisect ile ilk eşleşmeye gider ve yalnızca
+k sonuç toplanana kadar ilerler (DB sorgusu yok, 50k üründe ~mikrosaniyeler).
+
+Sıra: ürün kodu öneki (tam kod ilk), ürün adı öneki, ad içindeki kelime öneki, marka öneki;
+her grupta alfabetik.
+
+Güncelleme: StokDB ürün ekleme / güncelleme / silmede aynı transaction'da onbellek_surum'daki
+'stok_oneri' sürümünü artırır; commit sonrası değişiklik index'e artımlı uygulanır. Başka bir
+worker'ın değişikliği (sürüm farkı, en fazla DB_KATALOG_SURUM_ARALIGI saniyede bir kontrol) veya
+unit of work içindeki değişiklik index'i yeniden yükletir; yükleme sürerken eski index'ten yanıt verilir.
+Stok düşümü önerilen alanları değiştirmediğinden index'e dokunmaz.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .arama import katla
+from .katalog import KATALOG_SURUM_ARALIGI, surum_artir, surum_oku
+
+_GRUPLAR = ("kod", "ad", "kelime", "marka")
+# Önerinin döndürdüğü alanlar (satır tuple sırası)
+ONERI_KOLONLARI = ("id", "urun_kodu", "urun_adi", "marka", "birim")
+
+
+def _anahtarlar(urun_kodu, urun_adi, marka) -> List[Tuple[str, str]]:
+    """Bir ürünün (grup, katlanmış anahtar) çiftleri"""
+    anahtarlar = []
+    kod, ad, mrk = katla(urun_kodu), katla(urun_adi), katla(marka)
+    if kod:
+        anahtarlar.append(("kod", kod))
+    if ad:
+        anahtarlar.append(("ad", ad))
+        # İlk kelime ad önekiyle zaten bulunur
+        anahtarlar.extend(("kelime", kelime) for kelime in dict.fromkeys(ad.split(" ")[1:]) if kelime)
+    if mrk:
+        anahtarlar.append(("marka", mrk))
+    return anahtarlar
+
+
+class OneriIndeksi:
+    """Ürün önerileri için sıralı önek dizileri (thread-safe)"""
+
+    def __init__(self, db_conn, ad: str = "stok_oneri", surum_araligi: float = KATALOG_SURUM_ARALIGI):
+        self.db = db_conn
+        self.ad = ad
+        self.surum_araligi = surum_araligi
+        self._kilit = threading.RLock()
+        self._yukleme_kilidi = threading.Lock()
+        self._diziler: Dict[str, List[Tuple[str, int]]] = {grup: [] for grup in _GRUPLAR}
+        self._urunler: Dict[int, tuple] = {}
+        self._surum: Optional[int] = None  # None: index yüklü değil / geçersiz
+        self._son_kontrol = float("-inf")
+        self._istatistik = {"yukleme": 0, "artimli": 0}
+
+    # ---------- okuma ----------
+
+    def oner(self, sorgu: str, limit: int = 10) -> List[Dict]:
+        """Katlanmış sorguyla başlayan ürünler, en fazla limit adet"""
+        onek = katla(sorgu)
+        if not onek or limit <= 0:
+            return []
+        self._guncel_tut()
+        secilen: Dict[int, None] = {}
+        with self._kilit:
+            for grup in _GRUPLAR:
+                dizi = self._diziler[grup]
+                i = bisect_left(dizi, (onek,))
+                while i < len(dizi) and len(secilen) < limit:
+                    anahtar, stok_id = dizi[i]
+                    if not anahtar.startswith(onek):
+                        break
+                    secilen.setdefault(stok_id)
+                    i += 1
+                if len(secilen) >= limit:
+                    break
+            return [dict(zip(ONERI_KOLONLARI, self._urunler[stok_id])) for stok_id in secilen]
+
+    def _guncel_tut(self) -> None:
+        """İlk kullanımda yükle; aralık dolduysa sürümü kontrol et, değişmişse yeniden yükle"""
+        simdi = time.monotonic()
+        if self._surum is not None and simdi - self._son_kontrol < self.surum_araligi:
+            return
+        hazir = self._surum is not None or bool(self._urunler)
+        # Yükleme sürerken index hazırsa beklemeden eski index'ten yanıt ver
+        if not self._yukleme_kilidi.acquire(blocking=not hazir):
+            return
+        try:
+            if self._surum is not None and time.monotonic() - self._son_kontrol < self.surum_araligi:
+                return
+            surum = surum_oku(self.db, self.ad)
+            self._son_kontrol = time.monotonic()
+            if surum != self._surum:
+                self._yukle(surum)
+        finally:
+            self._yukleme_kilidi.release()
+
+    def _yukle(self, surum: int) -> None:
+        """Tüm ürünleri oku, dizileri kilit dışında kurup tek seferde değiştir"""
+        with self.db.connection() as conn:
+            cursor = self.db._get_tuple_cursor(conn)
+            cursor.execute(f"SELECT {', '.join(ONERI_KOLONLARI)} FROM stok")
+            satirlar = cursor.fetchall()
+        diziler: Dict[str, List[Tuple[str, int]]] = {grup: [] for grup in _GRUPLAR}
+        urunler = {}
+        for satir in satirlar:
+            urunler[satir[0]] = tuple(satir)
+            for grup, anahtar in _anahtarlar(satir[1], satir[2], satir[3]):
+                diziler[grup].append((anahtar, satir[0]))
+        for dizi in diziler.values():
+            dizi.sort()
+        with self._kilit:
+            self._diziler, self._urunler, self._surum = diziler, urunler, surum
+            self._istatistik["yukleme"] += 1
+
+    # ---------- yazma (StokDB) ----------
+
+    def surum_artir(self, cursor) -> int:
+        """Yazma transaction'ı içinde sürümü artır; yeni sürümü döndür (uygula'ya verilir)"""
+        surum_artir(self.db, self.ad, cursor)
+        return surum_oku(self.db, self.ad, cursor)
+
+    def uygula(self, surum: int, urunler: Iterable[tuple] = (), silinen: Iterable[int] = ()) -> None:
+        """
+        Commit edilmiş değişikliği index'e uygula. urunler: ONERI_KOLONLARI sırasında satırlar (yeni / güncel),
+        silinen: stok_id'ler. surum: surum_artir'ın döndürdüğü değer; arada başka bir yazma olduysa
+        (sürüm atladıysa) veya unit of work henüz commit edilmediyse index yeniden yüklenmek üzere geçersiz sayılır.
+        """
+        with self._kilit:
+            if self._surum is None:
+                return
+            if self.db.oturum_acik_mi() or surum != self._surum + 1:
+                self._surum = None
+                return
+            for stok_id in list(silinen) + [urun[0] for urun in urunler]:
+                self._cikar(stok_id)
+            for urun in urunler:
+                urun = tuple(urun)
+                self._urunler[urun[0]] = urun
+                for grup, anahtar in _anahtarlar(urun[1], urun[2], urun[3]):
+                    insort(self._diziler[grup], (anahtar, urun[0]))
+            self._surum = surum
+            self._istatistik["artimli"] += 1
+
+    def _cikar(self, stok_id: int) -> None:
+        urun = self._urunler.pop(stok_id, None)
+        if urun is None:
+            return
+        for grup, anahtar in _anahtarlar(urun[1], urun[2], urun[3]):
+            dizi = self._diziler[grup]
+            i = bisect_left(dizi, (anahtar, stok_id))
+            if i < len(dizi) and dizi[i] == (anahtar, stok_id):
+                del dizi[i]
+
+    def istatistik(self) -> dict:
+        with self._kilit:
+            return {
+                **self._istatistik,
+                "urun": len(self._urunler),
+                "anahtar": sum(len(dizi) for dizi in self._diziler.values()),
+                "surum": self._surum,
+            }
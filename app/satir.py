@@ -0,0 +1,147 @@
+"""
+Kompakt satır temsili - büyük listeler ve raporlar için
+Satırlar sözlük yerine tuple olarak okunur; kolon adları ve kolon -> indeks eşlemesi aynı sorgu
+şeklindeki tüm satırlarca paylaşılan tek bir Sema nesnesindedir. Satır başına sözlük yerine
+yalnızca değer tuple'ı tutulur (10 kolonluk bir satırda ~4 kat daha az bellek).
+
+SatirListesi bir Sequence'tir; elemanları Satir görünümleridir ve sözlük gibi okunur:
+    satir["urun_adi"], satir.get("marka"), dict(satir), for k, v in satir.items()
+satirlari_json() satırları ara sözlük oluşturmadan doğrudan JSON nesnelerine yazar.
+FastAPI'nin jsonable_encoder'ı SatirListesi'ni tanımaz; router'dan doğrudan döndürmeyin
+(gerekirse [dict(s) for s in liste]).
+"""
+import json
+from collections.abc import Mapping, Sequence
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+_SEMA_ONBELLEK_SINIRI = 256
+
+
+def json_varsayilan(obj):
+    """MySQL'den gelen Decimal, tarih gibi JSON'a uyumsuz tipler (FastAPI jsonable_encoder ile aynı kural)"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(obj).__name__}")
+
+
+_kodla = json.JSONEncoder(ensure_ascii=False, default=json_varsayilan).encode
+
+
+class Sema:
+    """Bir sorgu şeklinin kolonları; aynı kolon listesi için tek nesne paylaşılır (Sema.al)"""
+
+    __slots__ = ("kolonlar", "indeks", "json_anahtarlari")
+
+    _onbellek: Dict[Tuple[str, ...], "Sema"] = {}
+
+    def __init__(self, kolonlar: Tuple[str, ...]):
+        self.kolonlar = kolonlar
+        self.indeks = {kolon: i for i, kolon in enumerate(kolonlar)}
+        # '"kolon": ' önekleri bir kez üretilir
+        self.json_anahtarlari = tuple(_kodla(kolon) + ": " for kolon in kolonlar)
+
+    @classmethod
+    def al(cls, kolonlar: Iterable[str]) -> "Sema":
+        kolonlar = tuple(kolonlar)
+        sema = cls._onbellek.get(kolonlar)
+        if sema is None:
+            if len(cls._onbellek) >= _SEMA_ONBELLEK_SINIRI:
+                cls._onbellek.clear()
+            sema = cls._onbellek[kolonlar] = cls(kolonlar)
+        return sema
+
+    @classmethod
+    def cursordan(cls, cursor) -> "Sema":
+        return cls.al(kolon[0] for kolon in (cursor.description or ()))
+
+
+class Satir(Mapping):
+    """Tek satırın salt okunur sözlük görünümü (değerler kopyalanmaz)"""
+
+    __slots__ = ("_sema", "_degerler")
+
+    def __init__(self, sema: Sema, degerler: tuple):
+        self._sema = sema
+        self._degerler = degerler
+
+    def __getitem__(self, kolon):
+        return self._degerler[self._sema.indeks[kolon]]
+
+    def get(self, kolon, varsayilan=None):
+        i = self._sema.indeks.get(kolon)
+        return varsayilan if i is None else self._degerler[i]
+
+    def __contains__(self, kolon) -> bool:
+        return kolon in self._sema.indeks
+
+    def __iter__(self):
+        return iter(self._sema.kolonlar)
+
+    def __len__(self) -> int:
+        return len(self._sema.kolonlar)
+
+    def keys(self):
+        return self._sema.kolonlar
+
+    def values(self):
+        return self._degerler
+
+    def items(self):
+        return zip(self._sema.kolonlar, self._degerler)
+
+    def __repr__(self) -> str:
+        return f"Satir({dict(self.items())!r})"
+
+
+class SatirListesi(Sequence):
+    """Ortak şemalı tuple satırlar; indeksleme / iterasyon Satir görünümü verir"""
+
+    __slots__ = ("sema", "degerler")
+
+    def __init__(self, sema: Sema, degerler: List[tuple]):
+        self.sema = sema
+        self.degerler = degerler
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SatirListesi(self.sema, self.degerler[i])
+        return Satir(self.sema, self.degerler[i])
+
+    def __iter__(self):
+        sema = self.sema
+        for degerler in self.degerler:
+            yield Satir(sema, degerler)
+
+    def __len__(self) -> int:
+        return len(self.degerler)
+
+    def __repr__(self) -> str:
+        return f"SatirListesi({len(self.degerler)} satır, kolonlar={self.sema.kolonlar!r})"
+
+
+def satir_listesi(cursor, satirlar=None) -> SatirListesi:
+    """Tuple cursor'ın (kalan) sonucunu SatirListesi olarak al; satirlar verilirse onlar sarılır"""
+    sema = Sema.cursordan(cursor)
+    if satirlar is None:
+        satirlar = cursor.fetchall()
+    return SatirListesi(sema, satirlar if isinstance(satirlar, list) else list(satirlar))
+
+
+def _nesne_json(anahtarlar: Tuple[str, ...], degerler: tuple) -> str:
+    return "{" + ", ".join(anahtar + _kodla(deger) for anahtar, deger in zip(anahtarlar, degerler)) + "}"
+
+
+def satirlari_json(satirlar) -> str:
+    """Satırları virgülle ayrılmış JSON nesneleri olarak yaz (dizi parantezleri hariç)"""
+    if isinstance(satirlar, SatirListesi):
+        anahtarlar = satirlar.sema.json_anahtarlari
+        return ", ".join(_nesne_json(anahtarlar, degerler) for degerler in satirlar.degerler)
+    return ", ".join(_kodla(satir) for satir in satirlar)
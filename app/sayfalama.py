@@ -0,0 +1,174 @@
+"""
+Liste sorguları için ortak sayfalama sözleşmesi (keyset / seek sayfalama)
+- sirala: izinli sıralama anahtarlarından biri; başında '-' varsa azalan (örn. '-olusturma_tarihi')
+- cursor: önceki sayfanın son satırından üretilen opak değer (sıralama kolonu + id)
+- limit: sayfa boyutu (en fazla MAX_LIMIT)
+- fields: döndürülecek kolonlar; 'ozet' (tablo görünümü), 'tumu' veya virgüllü kolon listesi
+OFFSET yerine WHERE (kolon, id) > (son_deger, son_id) kullanıldığından N. sayfa da 1. sayfa kadar ucuzdur.
+Sıralama her zaman id ile tamamlanır; böylece eşit değerli satırlar sayfalar arasında kaybolmaz / tekrarlanmaz.
+"""
+import base64
+import binascii
+import json
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+VARSAYILAN_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class SayfalamaHatasi(ValueError):
+    """Geçersiz sıralama anahtarı, alan veya cursor (istemci hatası, 400)"""
+
+
+def siralama_coz(sirala: Optional[str], izinli: Dict[str, str], varsayilan: str) -> Tuple[str, bool]:
+    """'-olusturma_tarihi' -> ('olusturma_tarihi', True). Anahtar izinli listede değilse SayfalamaHatasi."""
+    sirala = (sirala or varsayilan).strip()
+    azalan = sirala.startswith("-")
+    anahtar = sirala.lstrip("-+")
+    if anahtar not in izinli:
+        raise SayfalamaHatasi(
+            f"Geçersiz sıralama: {anahtar}. İzin verilenler: {', '.join(sorted(izinli))}"
+        )
+    return izinli[anahtar], azalan
+
+
+def kolonlar_coz(fields: Optional[str], tum_kolonlar: Sequence[str], ozet_kolonlar: Optional[Sequence[str]] = None) -> Union[str, List[str]]:
+    """
+    ?fields= değerini kolon listesine çevir.
+    None / 'ozet' -> ozet_kolonlar (tanımlı değilse tüm kolonlar), 'tumu' / '*' -> '*',
+    'a,b,c' -> yalnızca izinli (tum_kolonlar içindeki) kolonlar; bilinmeyen kolon SayfalamaHatasi.
+    """
+    fields = (fields or "ozet").strip()
+    if fields == "ozet":
+        return list(ozet_kolonlar) if ozet_kolonlar else "*"
+    if fields in ("tumu", "*"):
+        return "*"
+    secilen = [f.strip() for f in fields.split(",") if f.strip()]
+    bilinmeyen = [f for f in secilen if f not in tum_kolonlar]
+    if bilinmeyen or not secilen:
+        raise SayfalamaHatasi(
+            f"Geçersiz alan: {', '.join(bilinmeyen) or fields}. İzin verilenler: ozet, tumu, {', '.join(tum_kolonlar)}"
+        )
+    return secilen
+
+
+def _select_kolonlari(kolonlar: Union[str, Sequence[str]], siralama_kolonu: str) -> str:
+    """Kolon listesine keyset için gereken id ve sıralama kolonunu ekle"""
+    if isinstance(kolonlar, str):
+        return kolonlar
+    liste = list(dict.fromkeys(kolonlar))
+    for zorunlu in ("id", siralama_kolonu):
+        if zorunlu not in liste:
+            liste.append(zorunlu)
+    return ", ".join(liste)
+
+
+def cursor_olustur(deger, son_id: int) -> str:
+    """Sıralama değeri ve id'den opak cursor üret"""
+    ham = json.dumps([deger, son_id], default=str, ensure_ascii=False)
+    return base64.urlsafe_b64encode(ham.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def cursor_coz(cursor: str) -> Tuple[object, int]:
+    """cursor_olustur'un tersi: (deger, son_id)"""
+    try:
+        ham = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        deger, son_id = json.loads(ham.decode("utf-8"))
+        return deger, int(son_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise SayfalamaHatasi("Geçersiz cursor")
+
+
+def sorgu_olustur(
+    tablo: str,
+    kosullar: List[str],
+    params: list,
+    kolon: str,
+    azalan: bool,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    kolonlar: Union[str, Sequence[str]] = "*",
+) -> Tuple[str, tuple]:
+    """
+    SELECT sorgusu ve parametreleri (? yer tutucularıyla).
+    kosullar / params: filtreler (örn. ["tip = ?"], ["Müşteri"]).
+    kolonlar: '*' veya kolon listesi (kolonlar_coz); id ve sıralama kolonu her zaman seçilir.
+    limit verilirse bir fazla satır istenir; sonraki sayfanın olup olmadığı buradan anlaşılır.
+    """
+    kosullar = list(kosullar)
+    params = list(params)
+    if cursor:
+        deger, son_id = cursor_coz(cursor)
+        isaret = "<" if azalan else ">"
+        if kolon == "id":
+            kosullar.append(f"id {isaret} ?")
+            params.append(son_id)
+        elif deger is None:
+            # NULL'lar artan sıralamada başta, azalanda sonda gelir
+            if azalan:
+                kosullar.append(f"({kolon} IS NULL AND id < ?)")
+                params.append(son_id)
+            else:
+                kosullar.append(f"(({kolon} IS NULL AND id > ?) OR {kolon} IS NOT NULL)")
+                params.append(son_id)
+        else:
+            kosul = f"({kolon}, id) {isaret} (?, ?)"
+            if azalan:
+                kosul = f"({kosul} OR {kolon} IS NULL)"
+            kosullar.append(kosul)
+            params.extend([deger, son_id])
+
+    query = f"SELECT {_select_kolonlari(kolonlar, kolon)} FROM {tablo}"
+    if kosullar:
+        query += " WHERE " + " AND ".join(kosullar)
+    yon = "DESC" if azalan else "ASC"
+    query += f" ORDER BY {kolon} {yon}" + (f", id {yon}" if kolon != "id" else "")
+    if limit:
+        query += " LIMIT ?"
+        params.append(int(limit) + 1)
+    return query, tuple(params)
+
+
+def sayfa_getir(
+    db,
+    tablo: str,
+    kosullar: List[str],
+    params: list,
+    izinli: Dict[str, str],
+    varsayilan: str,
+    sirala: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = VARSAYILAN_LIMIT,
+    toplam: bool = False,
+    kolonlar: Union[str, Sequence[str]] = "*",
+) -> Dict:
+    """
+    Tek sayfa getir.
+    Dönüş: {"data": [...], "sonraki_cursor": str | None, "toplam": int (sadece toplam=True ise)}
+    """
+    limit = max(1, min(int(limit or VARSAYILAN_LIMIT), MAX_LIMIT))
+    kolon, azalan = siralama_coz(sirala, izinli, varsayilan)
+    query, query_params = sorgu_olustur(tablo, kosullar, params, kolon, azalan, cursor, limit, kolonlar)
+
+    with db.okuma() as conn:
+        c = db._get_cursor(conn)
+        c.execute(db._convert_placeholders(query), query_params)
+        rows = list(c.fetchall())
+        toplam_sayi = None
+        if toplam:
+            count_query = f"SELECT COUNT(*) AS sayi FROM {tablo}"
+            if kosullar:
+                count_query += " WHERE " + " AND ".join(kosullar)
+            c.execute(db._convert_placeholders(count_query), tuple(params))
+            toplam_sayi = int(c.fetchone()["sayi"])
+
+    sonraki = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        son = rows[-1]
+        sonraki = cursor_olustur(son[kolon], son["id"])
+
+    sonuc = {"data": rows, "sonraki_cursor": sonraki}
+    if toplam:
+        sonuc["toplam"] = toplam_sayi
+    return sonuc
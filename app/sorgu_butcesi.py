@@ -0,0 +1,80 @@
+"""
+İstek başına sorgu bütçesi ve N+1 tespiti
+Her HTTP isteğinin DB gidiş-dönüşleri (sorgu) ve havuzdan alınan bağlantılar sayılır (app/db_metrik.py).
+İstek bitince rota bütçesiyle karşılaştırılır; aşılırsa veya aynı sorgu ifadesi bir istekte
+DB_N1_ESIGI kadar tekrarlanırsa (döngü içinde kayıt başına sorgu) uyarı loglanır.
+
+Ayarlar:
+    DB_SORGU_BUTCESI       rota tanımı yoksa istek başına en fazla sorgu (varsayılan 25)
+    DB_BAGLANTI_BUTCESI    rota tanımı yoksa istek başına en fazla bağlantı alma (varsayılan 6)
+    DB_N1_ESIGI            aynı ifadenin bir istekteki en fazla tekrarı (varsayılan 5)
+    DB_SORGU_BUTCESI_KATI  1 / true ise ihlal SorguButcesiAsildi fırlatır (test modu; yanıt 500 olur)
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .db_metrik import IstekSayaci, sorgu_ozeti
+
+VARSAYILAN_SORGU_BUTCESI = int(os.getenv("DB_SORGU_BUTCESI", "25"))
+VARSAYILAN_BAGLANTI_BUTCESI = int(os.getenv("DB_BAGLANTI_BUTCESI", "6"))
+N1_ESIGI = int(os.getenv("DB_N1_ESIGI", "5"))
+KATI = str(os.getenv("DB_SORGU_BUTCESI_KATI", "")).lower() in ("1", "true", "yes")
+
+# "METOD /rota/{param}" -> (sorgu, bağlantı, N+1 eşiği); None: sınırsız / kontrol yok
+# Satır sayısı girdiye bağlı toplu işlemler burada; diğer rotalar varsayılanı kullanır.
+ROTA_BUTCELERI: Dict[str, Tuple[Optional[int], Optional[int], Optional[int]]] = {
+    "POST /api/stok/excel-import": (None, None, None),
+    "POST /api/stok/bulk-upsert": (None, None, None),
+}
+
+
+class SorguButcesiAsildi(RuntimeError):
+    """Katı modda sorgu / bağlantı bütçesi aşıldı veya N+1 tespit edildi"""
+
+
+_ihlaller: Dict[str, dict] = {}
+_kilit = threading.Lock()
+
+
+def rota_butcesi(rota: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    return ROTA_BUTCELERI.get(rota, (VARSAYILAN_SORGU_BUTCESI, VARSAYILAN_BAGLANTI_BUTCESI, N1_ESIGI))
+
+
+def butce_kontrol(rota: str, sayac: IstekSayaci) -> List[str]:
+    """
+    İstek bitince çağrılır; ihlal açıklamalarını döndürür (yoksa boş liste).
+    İhlaller loglanır ve rota bazında sayılır; KATI ise SorguButcesiAsildi fırlatılır.
+    """
+    sorgu_butcesi, baglanti_butcesi, n1_esigi = rota_butcesi(rota)
+    ihlaller = []
+    if sorgu_butcesi is not None and sayac.sorgu > sorgu_butcesi:
+        ihlaller.append(f"{sayac.sorgu} sorgu (bütçe {sorgu_butcesi})")
+    if baglanti_butcesi is not None and sayac.baglanti > baglanti_butcesi:
+        ihlaller.append(f"{sayac.baglanti} bağlantı (bütçe {baglanti_butcesi})")
+    en_cok = sayac.en_cok_tekrarlanan()
+    if n1_esigi is not None and en_cok and en_cok[1] >= n1_esigi:
+        ihlaller.append(f"N+1: '{sorgu_ozeti(en_cok[0], 120)}' x{en_cok[1]}")
+    if not ihlaller:
+        return ihlaller
+
+    mesaj = f"{rota}: " + "; ".join(ihlaller)
+    with _kilit:
+        kayit = _ihlaller.setdefault(rota, {"ihlal": 0, "son": ""})
+        kayit["ihlal"] += 1
+        kayit["son"] = mesaj
+    print(f"⚠️ Sorgu bütçesi aşıldı - {mesaj}")
+    if KATI:
+        raise SorguButcesiAsildi(mesaj)
+    return ihlaller
+
+
+def butce_ihlalleri() -> dict:
+    """Rota bazında ihlal sayısı ve son ihlal mesajı"""
+    with _kilit:
+        return {rota: dict(kayit) for rota, kayit in sorted(_ihlaller.items())}
+
+
+def butce_ihlallerini_sifirla() -> None:
+    with _kilit:
+        _ihlaller.clear()
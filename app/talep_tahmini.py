@@ -0,0 +1,143 @@
+"""
+Talep tahmini ve sipariş önerisi - iş evraklarındaki ürün tüketiminden
+is_evraki.kullanilan_urunler (JSON) tüm geçmiş boyunca okunur, ürün x ay tüketim matrisine çevrilir
+(pandas) ve model tüm ürünler için tek seferde NumPy ile hesaplanır:
+
+    ortalama   son STOK_TAHMIN_PENCERE tamamlanmış ayın ortalaması (hareketli ortalama)
+    mevsim     en az 24 ay geçmiş varsa: hedef takvim ayının ortalaması / tüm ayların ortalaması
+               (0.5 - 2.0 arasında sınırlı); yoksa 1
+    tahmin     ortalama * mevsim (hedef ay: içinde bulunulan ay)
+    güvenlik   STOK_TAHMIN_GUVENLIK * son 12 ayın standart sapması * sqrt(STOK_TAHMIN_UFUK)
+    hedef      tahmin * STOK_TAHMIN_UFUK + güvenlik
+
+Önerilen sipariş = hedef - kullanılabilir stok (stok_miktari - rezerve_miktar), negatifse 0; okuma anında
+güncel stokla hesaplanır (StokDB.stok_siparis_onerileri). Ürünler katlanmış ürün koduyla (app/arama.py katla)
+eşleşir; evrakta kodu olmayan ürünler atlanır. Sonuçlar stok_tahmin tablosunda tutulur ve gece yenilenir.
+
+Ayarlar:
+    STOK_TAHMIN_PENCERE    hareketli ortalama penceresi, ay (varsayılan 3)
+    STOK_TAHMIN_UFUK       sipariş ufku (tedarik süresi + sipariş aralığı), ay (varsayılan 1)
+    STOK_TAHMIN_GUVENLIK   güvenlik stoğu katsayısı (varsayılan 1.65, ~%95 servis düzeyi)
+"""
+import json
+import os
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from .arama import katla
+
+TAHMIN_PENCERE = int(os.getenv("STOK_TAHMIN_PENCERE", "3"))
+TAHMIN_UFUK = float(os.getenv("STOK_TAHMIN_UFUK", "1"))
+GUVENLIK_KATSAYISI = float(os.getenv("STOK_TAHMIN_GUVENLIK", "1.65"))
+
+_MEVSIM_EN_AZ_AY = 24
+_PARCA_BOYUTU = 100_000  # pandas'a bir seferde verilen kalem sayısı
+_MEVSIM_SINIRI = (0.5, 2.0)
+
+# tahmin_hesapla'nın döndürdüğü satırların kolonları (stok_tahmin tablosu, stok_id hariç)
+TAHMIN_KOLONLARI = (
+    "urun_kodu", "urun_adi", "ay_sayisi", "ortalama", "mevsim_katsayisi", "tahmin", "guvenlik_stogu", "hedef_stok",
+)
+
+
+def _urun_listesi(ham) -> list:
+    """kullanilan_urunler değeri -> ürün sözlükleri listesi (bozuk / boş ise boş liste)"""
+    try:
+        urunler = json.loads(ham) if isinstance(ham, str) else ham
+    except ValueError:
+        return []
+    return [u for u in urunler if isinstance(u, dict)] if isinstance(urunler, list) else []
+
+
+def tuketim_parcasi(kalemler: List[tuple]):
+    """
+    (donem, urun_kodu, urun_adi, adet) kalemlerini (urun_kodu, donem) bazında topla (son görülen ad ile).
+    Akış büyük parçalar halinde toplanır; parçalar tuketim_matrisi ile birleştirilir.
+    """
+    import pandas as pd
+
+    parca = pd.DataFrame(kalemler, columns=["donem", "urun_kodu", "urun_adi", "adet"])
+    parca["urun_kodu"] = parca["urun_kodu"].fillna("").astype(str).str.strip()
+    parca["adet"] = pd.to_numeric(parca["adet"], errors="coerce")
+    parca = parca[(parca["urun_kodu"] != "") & (parca["adet"] > 0)]
+    return parca.groupby(["urun_kodu", "donem"], sort=False).agg(adet=("adet", "sum"), urun_adi=("urun_adi", "last"))
+
+
+def tuketim_matrisi(parcalar: list, son_ay: int):
+    """
+    Parçaları birleştir: (ürünler: kod -> urun_kodu / urun_adi, matris: kod x ay numarası adet).
+    kod katlanmış ürün kodu, ay numarası yil * 12 + ay - 1. Aylar ilk tüketim ayından son_ay'a (dahil) kadar
+    boşluksuz; tüketim olmayan ay 0, son_ay sonrası (eksik ay) dışarıda kalır.
+    """
+    import pandas as pd
+
+    parcalar = [p for p in parcalar if not p.empty]
+    if not parcalar:
+        return None, None
+    tuketim = pd.concat(parcalar).groupby(level=["urun_kodu", "donem"], sort=False).agg(
+        adet=("adet", "sum"), urun_adi=("urun_adi", "last"),
+    ).reset_index()
+    # Katlama ve dönem çözümü yalnızca farklı değerler için (ürün / ay sayısı kadar)
+    tuketim["kod"] = tuketim["urun_kodu"].map({kod: katla(kod) for kod in tuketim["urun_kodu"].unique()})
+    tuketim["ay"] = tuketim["donem"].map({donem: _ay_no(donem) for donem in tuketim["donem"].unique()})
+    tuketim = tuketim[tuketim["ay"] <= son_ay].sort_values("ay", kind="stable")
+    if tuketim.empty:
+        return None, None
+    urunler = tuketim.groupby("kod").agg(urun_kodu=("urun_kodu", "last"), urun_adi=("urun_adi", "last"))
+    matris = tuketim.pivot_table(index="kod", columns="ay", values="adet", aggfunc="sum", fill_value=0)
+    matris = matris.reindex(index=urunler.index, columns=range(int(tuketim["ay"].min()), son_ay + 1), fill_value=0)
+    return urunler, matris
+
+
+def _ay_no(donem: str) -> int:
+    """'YYYY-MM' -> yil * 12 + ay - 1"""
+    return int(donem[:4]) * 12 + int(donem[5:7]) - 1
+
+
+def tahmin_hesapla(kayit_partileri: Iterable[Iterable[Tuple[str, str]]], bugun: Optional[date] = None,
+                   pencere: int = TAHMIN_PENCERE, ufuk: float = TAHMIN_UFUK,
+                   guvenlik_katsayisi: float = GUVENLIK_KATSAYISI) -> List[tuple]:
+    """
+    (tarih_donem, kullanilan_urunler) satır partilerinden (veritabanı akışı) ürün başına tahmin satırları
+    (TAHMIN_KOLONLARI sırasında). Tahmin edilen ay bugünün ayıdır; seri önceki aya (son tamamlanmış ay) kadar kullanılır.
+    """
+    import numpy as np
+
+    bugun = bugun or date.today()
+    # JSON çözümü satır başınadır; kalemler düz listeye açılıp büyük parçalar halinde pandas'a verilir
+    parcalar, kalemler = [], []
+    for parti in kayit_partileri:
+        for donem, ham in parti:
+            kalemler.extend(
+                (donem, u.get("urun_kodu"), u.get("urun_adi"), u.get("adet")) for u in _urun_listesi(ham)
+            )
+        if len(kalemler) >= _PARCA_BOYUTU:
+            parcalar.append(tuketim_parcasi(kalemler))
+            kalemler = []
+    if kalemler:
+        parcalar.append(tuketim_parcasi(kalemler))
+    urunler, matris = tuketim_matrisi(parcalar, bugun.year * 12 + bugun.month - 2)
+    if matris is None:
+        return []
+
+    x = matris.to_numpy(dtype=float)
+    ay_sayisi = x.shape[1]
+    ortalama = x[:, -min(pencere, ay_sayisi):].mean(axis=1)
+    mevsim = np.ones(len(x))
+    if ay_sayisi >= _MEVSIM_EN_AZ_AY:
+        genel = x.mean(axis=1)
+        ayni_ay = x[:, np.asarray(matris.columns) % 12 == bugun.month - 1].mean(axis=1)
+        np.divide(ayni_ay, genel, out=mevsim, where=genel > 0)
+        mevsim = np.clip(mevsim, *_MEVSIM_SINIRI)
+    tahmin = ortalama * mevsim
+    guvenlik = guvenlik_katsayisi * x[:, -min(12, ay_sayisi):].std(axis=1) * np.sqrt(ufuk)
+    hedef = tahmin * ufuk + guvenlik
+    kullanim_ayi = (x > 0).sum(axis=1)
+
+    return [
+        (kod, ad, int(ay), round(float(o), 2), round(float(m), 3), round(float(t), 2), round(float(g), 2),
+         round(float(h), 2))
+        for kod, ad, ay, o, m, t, g, h in zip(
+            urunler["urun_kodu"], urunler["urun_adi"], kullanim_ayi, ortalama, mevsim, tahmin, guvenlik, hedef
+        )
+    ]
@@ -0,0 +1,165 @@
+"""
+Sorgu planı kontrolü - DB sınıflarında kayıtlı (EXPLAIN_SORGULARI) her sorguyu EXPLAIN ile çalıştırır,
+büyük tabloda tam tarama (type=ALL) yapan sorgu varsa hata koduyla çıkar. Yalnızca MySQL.
+
+Kullanım (test veritabanında!):
+    DATABASE_URL=mysql://.../onmuhasebe_test python explain_kontrol.py --seed 50000
+    python explain_kontrol.py                 # mevcut veriyle sadece kontrol
+Seçenekler:
+    --seed N    Tablolar boşsa her ana tabloya N satır örnek veri ekler (ANALYZE TABLE ile istatistik günceller)
+    --esik N    type=ALL olup tahmini satır sayısı bu değerin üstündeyse hata (varsayılan 1000)
+    --zorla     Tablolar boş değilse de örnek veri ekle
+"""
+import argparse
+import os
+import random
+import sys
+
+from dotenv import load_dotenv
+from pymysql.cursors import DictCursor
+
+from app.arama import index_yenile
+from app.db_connection import DatabaseConnection
+from app.db_stok import StokDB
+from app.db_cari import CariDB
+from app.db_is_evraki import IsEvrakiDB, tarih_donemi
+from app.db_is_prosesi import IsProsesiDB
+from app.db_arac import AracDB
+from app.db_sofor import SoforDB
+from app.db_auth import AuthDB
+from app.migrations import migrate
+
+DB_SINIFLARI = [StokDB, CariDB, IsEvrakiDB, IsProsesiDB, AracDB, SoforDB, AuthDB]
+
+_PARTI = 1000
+
+
+def kayitli_sorgular():
+    """[(sinif.ad, sorgu, parametreler)]"""
+    liste = []
+    for sinif in DB_SINIFLARI:
+        for ad, sorgu, parametreler in getattr(sinif, "EXPLAIN_SORGULARI", []):
+            liste.append((f"{sinif.__name__}.{ad}", sorgu, parametreler))
+    return liste
+
+
+def _toplu_ekle(cursor, sorgu, satirlar):
+    for i in range(0, len(satirlar), _PARTI):
+        cursor.executemany(sorgu, satirlar[i:i + _PARTI])
+
+
+def ornek_veri_ekle(conn, n: int) -> None:
+    """Ana tablolara n (araç/proses için n/10) satır örnek veri ekle"""
+    cursor = conn.cursor()
+    rnd = random.Random(42)
+    arac_n = max(1, n // 10)
+    proses_n = max(1, n // 10)
+
+    print(f"🔄 Örnek veri ekleniyor: {n} satır/tablo...")
+    _toplu_ekle(cursor,
+        "INSERT INTO stok (urun_kodu, urun_adi, marka, stok_miktari, birim_fiyat) VALUES (%s, %s, %s, %s, %s)",
+        [(f"U{i:06d}", f"Ürün {i}", f"Marka {i % 50}", rnd.randint(0, 500), rnd.randint(1, 5000)) for i in range(1, n + 1)])
+    index_yenile(cursor)
+    _toplu_ekle(cursor,
+        "INSERT INTO cari (cari_kodu, unvan, tip, tc_kimlik_no, vergi_no, bakiye) VALUES (%s, %s, %s, %s, %s, %s)",
+        [(str(i), f"Müşteri {i}", "Müşteri", f"1{i:010d}", f"2{i:010d}", 0) for i in range(1, n + 1)])
+    evraklar = []
+    for i in range(1, n + 1):
+        tarih = f"{rnd.randint(1, 28)}-{rnd.randint(1, 12)}-{rnd.randint(2020, 2026)}"
+        evraklar.append((i, tarih, tarih_donemi(tarih), f"Müşteri {rnd.randint(1, n)}", "x" * 200, rnd.randint(100, 50000)))
+    _toplu_ekle(cursor,
+        "INSERT INTO is_evraki (is_emri_no, tarih, tarih_donem, musteri_unvan, yapilan_is, toplam_tutar) VALUES (%s, %s, %s, %s, %s, %s)",
+        evraklar)
+    _toplu_ekle(cursor,
+        "INSERT INTO arac (arac_plakasi, arac_tipi, marka, model) VALUES (%s, %s, %s, %s)",
+        [(f"34 T {i:06d}", "çekici", "Marka", "Model") for i in range(1, arac_n + 1)])
+    cursor.execute("SELECT MIN(id), MAX(id) FROM arac")
+    a_min, a_max = cursor.fetchone()
+    _toplu_ekle(cursor,
+        "INSERT INTO arac_belge (arac_id, belge_turu, bitis_tarihi) VALUES (%s, %s, DATE_ADD(CURDATE(), INTERVAL %s DAY))",
+        [(rnd.randint(a_min, a_max), "kasko", rnd.randint(-700, 700)) for _ in range(n)])
+    _toplu_ekle(cursor,
+        "INSERT INTO arac_bakim (arac_id, bakim_turu, bakim_tarihi) VALUES (%s, %s, DATE_SUB(CURDATE(), INTERVAL %s DAY))",
+        [(rnd.randint(a_min, a_max), "genel bakım", rnd.randint(0, 2000)) for _ in range(n)])
+    _toplu_ekle(cursor,
+        "INSERT INTO is_prosesi (proses_adi) VALUES (%s)",
+        [(f"Proses {i}",) for i in range(1, proses_n + 1)])
+    cursor.execute("SELECT MIN(id), MAX(id) FROM is_prosesi")
+    p_min, p_max = cursor.fetchone()
+    _toplu_ekle(cursor,
+        "INSERT INTO is_prosesi_maddeleri (proses_id, sira_no, madde_adi) VALUES (%s, %s, %s)",
+        [(rnd.randint(p_min, p_max), i % 20, f"Madde {i}") for i in range(1, n + 1)])
+    _toplu_ekle(cursor,
+        """INSERT INTO sofor (ad_soyad, tc_kimlik_no, telefon, ise_baslama_tarihi, src_belge_no, src_bitis_tarihi,
+                              ehliyet_sinifi, ehliyet_bitis_tarihi, psikoteknik_bitis, acil_iletisim)
+           VALUES (%s, %s, '0500', CURDATE(), 'SRC', CURDATE(), 'CE', CURDATE(), CURDATE(), '-')""",
+        [(f"Şoför {i}", f"3{i:010d}") for i in range(1, n + 1)])
+    conn.commit()
+
+    for tablo in ("stok", "stok_arama", "cari", "is_evraki", "arac", "arac_belge", "arac_bakim", "is_prosesi", "is_prosesi_maddeleri", "sofor"):
+        cursor.execute(f"ANALYZE TABLE {tablo}")
+        cursor.fetchall()
+    cursor.close()
+    print("✅ Örnek veri eklendi")
+
+
+def sorgulari_kontrol_et(conn, esik: int) -> int:
+    """Kayıtlı sorguları EXPLAIN et, tam tarama yapanların sayısını döndür"""
+    cursor = conn.cursor(DictCursor)
+    hatali = 0
+    for ad, sorgu, parametreler in kayitli_sorgular():
+        cursor.execute("EXPLAIN " + sorgu.replace("?", "%s"), parametreler)
+        plan = cursor.fetchall()
+        sorunlar = [
+            p for p in plan
+            if (p.get("type") or "").upper() == "ALL" and int(p.get("rows") or 0) >= esik
+        ]
+        ozet = ", ".join(
+            f"{p.get('table')}:{p.get('type')}/{p.get('key') or '-'}/{p.get('rows')}" for p in plan
+        )
+        if sorunlar:
+            hatali += 1
+            print(f"❌ {ad}: TAM TARAMA -> {ozet}")
+        else:
+            print(f"✅ {ad}: {ozet}")
+    cursor.close()
+    return hatali
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Kayıtlı sorguların EXPLAIN kontrolü")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--esik", type=int, default=1000)
+    parser.add_argument("--zorla", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db_conn = DatabaseConnection(database_url=os.getenv("DATABASE_URL"))
+    if db_conn.dialect.ad != "mysql":
+        print(f"❌ EXPLAIN kontrolü MySQL planlarını okur; DATABASE_URL {db_conn.dialect.ad} lehçesinde")
+        return 2
+    conn = db_conn.connect()
+    try:
+        migrate(conn)
+        if args.seed > 0:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM is_evraki")
+            mevcut = cursor.fetchone()[0]
+            cursor.close()
+            if mevcut and not args.zorla:
+                print(f"⚠️ is_evraki tablosunda {mevcut} kayıt var; örnek veri eklenmedi (--zorla ile eklenebilir)")
+            else:
+                ornek_veri_ekle(conn, args.seed)
+
+        hatali = sorgulari_kontrol_et(conn, args.esik)
+        if hatali:
+            print(f"❌ {hatali} sorgu tam tarama yapıyor")
+            return 1
+        print("✅ Tüm kayıtlı sorgular index kullanıyor")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
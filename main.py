@@ -5,10 +5,15 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
 import os
 import sys
 
 from db_instance import db
+from app.executor import executorleri_kapat
+from app.db_connection import istek_kapsami_ac, istek_kapsami_kapat
+from app.db_metrik import istek_sayaci_ac, istek_sayaci_kapat
+from app.sorgu_butcesi import butce_kontrol
 from api.auth import decode_token
 from routes import router as routes_router
 from api.auth import router as auth_router
@@ -20,6 +25,7 @@ from api.arac import router as arac_router
 from api.sofor import router as sofor_router
 from api.excel import router as excel_router
 from api.aylik_rapor import router as aylik_rapor_router
+from api.sistem import router as sistem_router
 
 app = FastAPI(
     title="Ön Muhasebe API",
@@ -29,9 +35,9 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event():
-    """Uygulama başlarken veritabanı tablolarını kontrol et"""
+    """Uygulama başlarken veritabanı şemasını güncel sürüme getir (migration)"""
     try:
-        print("🔄 Veritabanı tabloları kontrol ediliyor...")
+        print("🔄 Veritabanı şeması kontrol ediliyor...")
         db.db_conn.init_database()
         print("✅ Veritabanı hazır!")
         # Hiç kullanıcı yoksa varsayılan admin (admin / admin123) oluştur
@@ -48,26 +54,61 @@ async def startup_event():
     otomatik = str(os.getenv("AYLIK_RAPOR_OTOMATIK", "")).lower() in ("1", "true", "yes")
     if otomatik:
         try:
-            from apscheduler.schedulers.asyncio import AsyncIOScheduler
             from api.aylik_rapor import aylik_rapor_cron_job
-            s = AsyncIOScheduler()
-            s.add_job(aylik_rapor_cron_job, "cron", day=1, hour=9, minute=0, timezone="Europe/Istanbul", id="aylik_rapor")
-            s.start()
-            app.state.scheduler = s
+            _zamanlayici().add_job(aylik_rapor_cron_job, "cron", day=1, hour=9, minute=0, timezone="Europe/Istanbul", id="aylik_rapor")
             print("✅ Aylık rapor otomatik gönderim: her ayın 1'i 09:00 (İstanbul) olarak ayarlandı.")
         except Exception as e:
             print(f"⚠️ Aylık rapor otomatik gönderim başlatılamadı: {e}")
 
+    # Süresi dolan stok rezervasyonları: STOK_REZERVASYON_TEMIZLEME_ARALIGI saniyede bir (0: kapalı)
+    aralik = int(os.getenv("STOK_REZERVASYON_TEMIZLEME_ARALIGI", "60"))
+    if aralik > 0:
+        try:
+            _zamanlayici().add_job(db.stok_rezervasyon_temizle, "interval", seconds=aralik,
+                                   id="stok_rezervasyon_temizle", coalesce=True, max_instances=1)
+            print(f"✅ Stok rezervasyon temizliği: {aralik} saniyede bir.")
+        except Exception as e:
+            print(f"⚠️ Stok rezervasyon temizliği başlatılamadı: {e}")
+
+    # Talep tahmini / sipariş önerileri: her gece STOK_TAHMIN_SAATI'nde (İstanbul, -1: kapalı); açılışta
+    # tahmin yoksa veya eskiyse bir kez hesaplanır
+    saat = int(os.getenv("STOK_TAHMIN_SAATI", "3"))
+    if saat >= 0:
+        try:
+            s = _zamanlayici()
+            s.add_job(db.stok_tahmin_yenile, "cron", hour=saat, minute=0, timezone="Europe/Istanbul",
+                      id="stok_tahmin", coalesce=True, max_instances=1)
+            s.add_job(db.stok_tahmin_yenile, "date", id="stok_tahmin_acilis")
+            print(f"✅ Talep tahmini: her gece {saat:02d}:00 (İstanbul) yenilenecek.")
+        except Exception as e:
+            print(f"⚠️ Talep tahmini zamanlaması başlatılamadı: {e}")
+
+
+def _zamanlayici():
+    """Uygulamanın tek zamanlayıcısı (ilk görevde başlatılır)"""
+    s = getattr(app.state, "scheduler", None)
+    if s is None:
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        s = AsyncIOScheduler()
+        s.start()
+        app.state.scheduler = s
+    return s
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Kapanırken zamanlayıcıyı durdur"""
+    """Kapanırken zamanlayıcıyı durdur, DB thread havuzunu ve bağlantı havuzunu kapat"""
     s = getattr(app.state, "scheduler", None)
     if s is not None:
         try:
             s.shutdown(wait=False)
         except Exception:
             pass
+    try:
+        executorleri_kapat()
+        db.close()
+    except Exception:
+        pass
 
 # Şoför rolü: /docs ve /redoc erişemez (token varsa kontrol)
 @app.middleware("http")
@@ -82,6 +123,32 @@ async def block_sofor_docs(request, call_next):
                 return PlainTextResponse("Bu sayfaya erişim yetkiniz yok.", status_code=403)
     return await call_next(request)
 
+def _rota_adi(request) -> str:
+    """Bütçe anahtarı: 'GET /api/arac/{arac_id}' (eşleşen rota yoksa gerçek yol)"""
+    for route in request.app.router.routes:
+        eslesme, _ = route.matches(request.scope)
+        if eslesme == Match.FULL:
+            return f"{request.method} {getattr(route, 'path', request.url.path)}"
+    return f"{request.method} {request.url.path}"
+
+# İstek bazında DB kapsamı: yazma yapan istek kalan okumalarını birincilden yapar (DATABASE_READ_URL varken);
+# sorgu / bağlantı sayısı yanıt başlığına yazılır ve rota bütçesiyle karşılaştırılır (app/sorgu_butcesi.py).
+# Akış yanıtlarında yalnızca ilk partiye kadarki sorgular sayılır.
+@app.middleware("http")
+async def db_istek_kapsami(request, call_next):
+    token = istek_kapsami_ac()
+    sayac, sayac_token = istek_sayaci_ac()
+    try:
+        response = await call_next(request)
+        if sayac.sorgu or sayac.baglanti:
+            response.headers["X-DB-Sorgu"] = str(sayac.sorgu)
+            response.headers["X-DB-Baglanti"] = str(sayac.baglanti)
+            butce_kontrol(_rota_adi(request), sayac)
+        return response
+    finally:
+        istek_sayaci_kapat(sayac_token)
+        istek_kapsami_kapat(token)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -109,6 +176,7 @@ app.include_router(is_prosesi_router)
 app.include_router(arac_router)
 app.include_router(sofor_router)
 app.include_router(aylik_rapor_router)
+app.include_router(sistem_router)
 
 
 if __name__ == "__main__":
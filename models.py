@@ -13,6 +13,7 @@ class StokCreate(BaseModel):
     stok_miktari: Optional[float] = 0
     birim_fiyat: Optional[float] = 0
     aciklama: Optional[str] = ""
+    kritik_stok: Optional[float] = 0  # yeniden sipariş eşiği (0: yok)
 
 
 class StokUpdate(BaseModel):
@@ -23,6 +24,7 @@ class StokUpdate(BaseModel):
     stok_miktari: Optional[float] = 0
     birim_fiyat: Optional[float] = 0
     aciklama: Optional[str] = ""
+    kritik_stok: Optional[float] = 0  # yeniden sipariş eşiği (0: yok)
 
 
 class StokMiktarAzalt(BaseModel):
@@ -34,6 +36,28 @@ class StokMiktarAzaltBatch(BaseModel):
     urunler: List[Dict[str, Any]]
 
 
+class StokRezervasyon(BaseModel):
+    urunler: List[Dict[str, Any]]  # {"urun_kodu", "miktar", "urun_adi"}
+    evrak_no: Optional[str] = None  # taslağın iş emri no'su (bilgi; anahtar değil)
+    sure_dakika: Optional[int] = None  # varsayılan STOK_REZERVASYON_SURESI
+
+
+class StokUpsertSatir(BaseModel):
+    urun_kodu: str
+    urun_adi: Optional[str] = None
+    marka: Optional[str] = ""
+    birim: Optional[str] = "Adet"
+    stok_miktari: Optional[float] = None
+    birim_fiyat: Optional[float] = None
+    aciklama: Optional[str] = ""
+
+
+class StokBulkUpsert(BaseModel):
+    mod: str  # miktar_ayarla | miktar_ekle | fiyat
+    kaynak_no: Optional[str] = None  # irsaliye / teslimat no (stok hareketlerine yazılır)
+    urunler: List[StokUpsertSatir]
+
+
 class CariCreate(BaseModel):
     cari_kodu: Optional[str] = None
     unvan: str
@@ -109,6 +133,7 @@ class IsEvrakiCreateWithEmail(BaseModel):
     vergi_dairesi: Optional[str] = ""
     firma_tipi: Optional[str] = "Şahıs"
     send_email: Optional[bool] = True
+    rezervasyon_taslak: Optional[str] = None  # POST /api/stok/rezervasyon'un verdiği taslak anahtarı
 
 
 class IsEvrakiUpdate(BaseModel):
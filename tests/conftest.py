@@ -0,0 +1,19 @@
+"""
+Testler bellek içi SQLite veritabanıyla çalışır (MySQL sunucusu gerekmez).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """Migration'ları uygulanmış boş bellek içi veritabanı"""
+    veritabani = Database(database_url="sqlite://:memory:")
+    veritabani.db_conn.init_database()
+    return veritabani
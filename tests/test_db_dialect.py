@@ -0,0 +1,76 @@
+"""
+SQLite lehçesinin MySQL davranışını taklit ettiği noktalar
+"""
+from app.db_dialect import MySQLDialect, _sqlite_sql
+
+
+def test_metin_kolonlari_harf_duyarsiz_cevrilir():
+    sql = _sqlite_sql(
+        "CREATE TABLE t (id INT AUTO_INCREMENT PRIMARY KEY, kod VARCHAR(20) UNIQUE, aciklama TEXT, "
+        "trigram VARCHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+    )
+    assert "kod VARCHAR(20) COLLATE TR_CI UNIQUE" in sql
+    assert "aciklama TEXT COLLATE TR_CI" in sql
+    assert "trigram VARCHAR(3) COLLATE BINARY NOT NULL" in sql
+
+
+def test_urun_kodu_harf_duyarsiz_eslesir(db):
+    assert db.stok_ekle("KPI-9", "Kapı", stok_miktari=5)
+
+    # İş evrakı kodları Türkçe başlık biçimine getirir: "KPI-9" -> "Kpı-9"
+    assert db.stok_urun_kodu_ile_ara("Kpı-9")["urun_kodu"] == "KPI-9"
+    basarili, hatalar = db.stok_miktar_azalt_batch([{"urun_kodu": "Kpı-9", "urun_adi": "Kapı", "miktar": 2}])
+    assert hatalar == []
+    assert db.stok_urun_kodu_ile_ara("KPI-9")["stok_miktari"] == 3
+
+    # MySQL _ci benzersiz index'i gibi: yalnızca harf farkı olan kod ikinci ürün olarak eklenmez
+    assert not db.stok_ekle("kpi-9", "Kapı")
+
+
+def test_toplu_ekle_satir_idleri(db):
+    sonuclar = db.db_conn.toplu_ekle(
+        "stok", ("urun_kodu", "urun_adi"), [("A-1", "Bir"), ("A-1", "Tekrar"), ("B-2", "İki")], id_dondur=True,
+    )
+    assert [ok for ok, _, _ in sonuclar] == [True, False, True]
+    for (_, _, stok_id), kod in ((sonuclar[0], "A-1"), (sonuclar[2], "B-2")):
+        assert db.stok_getir(stok_id)["urun_kodu"] == kod
+
+
+def test_mysql_idleri_auto_increment_increment_aralikli():
+    class Cursor:
+        lastrowid = 11
+
+        def execute(self, sql):
+            assert sql == "SELECT @@auto_increment_increment"
+
+        def fetchone(self):
+            return (10,)
+
+        def close(self):
+            pass
+
+    class Baglanti:
+        sorgu = 0
+
+        def cursor(self, _tur):
+            self.sorgu += 1
+            return Cursor()
+
+    conn = Baglanti()
+    # Galera: auto_increment_increment = düğüm sayısı (ör. 10), offset düğüme göre
+    assert MySQLDialect().eklenen_idler(conn, Cursor(), 3) == [11, 21, 31]
+    assert MySQLDialect().eklenen_idler(conn, Cursor(), 1) == [11]
+    assert conn.sorgu == 1
+
+
+def test_toplu_guncelleme_hareketi_kayitli_kodla_yazilir(db):
+    assert db.stok_ekle("KPI-9", "Kapı", stok_miktari=5)
+    sonuclar = db.stok_upsert_bulk([{"urun_kodu": "kpi-9", "stok_miktari": 3},
+                                    {"urun_kodu": "yeni-1", "urun_adi": "Yeni", "stok_miktari": 2},
+                                    {"urun_kodu": "YENI-1", "stok_miktari": 1}], "miktar_ekle", "IRS-1")
+    assert sonuclar == [("guncellendi", 8), ("eklendi", 2), ("guncellendi", 3)]
+
+    kapi, yeni = db.stok_urun_kodu_ile_ara("KPI-9"), db.stok_urun_kodu_ile_ara("yeni-1")
+    assert [h["urun_kodu"] for h in db.stok_hareket_listele(kapi["id"])] == ["KPI-9", "KPI-9"]
+    assert [h["urun_kodu"] for h in db.stok_hareket_listele(yeni["id"])] == ["yeni-1", "yeni-1"]
+    assert db.stok_bakiye_dogrula() == []
@@ -0,0 +1,56 @@
+"""
+Katalog önbelleğinin yazma transaction'ı ile etkileşimi
+"""
+from app.katalog import KatalogOnbellegi, surum_oku
+
+
+def test_commit_oncesi_okunan_satir_onbellekte_kalmaz(db):
+    katalog = KatalogOnbellegi(db.db_conn, "stok", surum_araligi=3600)
+    katalog.getir("id", 1, lambda: {"ad": "bir"})
+
+    with db.db_conn.transaction():
+        katalog.surum_artir()
+        # Yazma commit edilmeden önce önbelleği ıskalayan okuyucu hâlâ eski satırı görür
+        assert katalog.getir("id", 2, lambda: {"ad": "eski"}) == {"ad": "eski"}
+
+    assert katalog.getir("id", 2, lambda: {"ad": "yeni"}) == {"ad": "yeni"}
+
+
+def test_geri_alinan_yazma_onbellegi_bosaltmaz(db):
+    katalog = KatalogOnbellegi(db.db_conn, "stok", surum_araligi=3600)
+    katalog.getir("id", 1, lambda: {"ad": "eski"})
+    try:
+        with db.db_conn.unit_of_work():
+            with db.db_conn.transaction():
+                katalog.surum_artir()
+            raise RuntimeError("geri al")
+    except RuntimeError:
+        pass
+    assert katalog.getir("id", 1, lambda: {"ad": "yeni"}) == {"ad": "eski"}
+    assert surum_oku(db.db_conn, "stok") == 0
+
+
+def test_surum_yazma_transactioninda_kilitlenmez(db):
+    with db.db_conn.unit_of_work():
+        db.stok_ekle("A-1", "Ürün", stok_miktari=5)
+        # Sürüm satırına commit'e kadar dokunulmaz (tüm stok yazmalarını sıraya sokardı)
+        assert surum_oku(db.db_conn, "stok") == 0
+    assert surum_oku(db.db_conn, "stok") == 1
+
+
+def test_miktar_degisikligi_yalnizca_urunun_satirlarini_dusurur(db):
+    db.stok_ekle("A-1", "Bir", stok_miktari=5)
+    db.stok_ekle("B-2", "İki", stok_miktari=5)
+    katalog = db.stok.katalog
+    katalog.surum_araligi = 3600
+    a, b = db.stok_urun_kodu_ile_ara("A-1"), db.stok_urun_kodu_ile_ara("B-2")
+    db.stok_getir(a["id"])
+    surum = surum_oku(db.db_conn, "stok")
+
+    assert db.stok_miktar_azalt("a-1", 2)[0]
+
+    assert surum_oku(db.db_conn, "stok") == surum
+    kayitlar = {anahtar for anahtar in katalog._kayitlar}
+    assert kayitlar == {("kod", "B-2")}
+    assert db.stok_urun_kodu_ile_ara("A-1")["stok_miktari"] == 3
+    assert db.stok_urun_kodu_ile_ara("B-2") == b
@@ -0,0 +1,35 @@
+"""
+Ürün ekleme / güncelleme hatalarının sınıflandırılması
+"""
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+
+from app.database import Database
+from app.db_pool import ConnectionPool, HavuzZamanAsimi
+
+
+def test_tekrar_eden_kod_false_doner(db):
+    assert db.stok_ekle("A-1", "Bir")
+    assert db.stok_ekle("B-2", "İki")
+    assert not db.stok_ekle("A-1", "Bir")
+    b = db.stok_urun_kodu_ile_ara("B-2")
+    assert not db.stok_guncelle(b["id"], "a-1", "İki", "", "Adet", 0, 0, "")
+
+
+def test_diger_hatalar_tekrar_eden_kod_sayilmaz():
+    # Açılamayan veritabanı "ürün kodu zaten kullanılıyor" (400) değil, hata olarak yukarı çıkar
+    veritabani = Database(database_url="sqlite:////olmayan/dizin/stok.db")
+    with pytest.raises(sqlite3.OperationalError):
+        veritabani.stok_ekle("A-1", "Bir")
+
+
+def test_havuz_zaman_asimi_503():
+    havuz = ConnectionPool(lambda: object(), pool_size=1, max_overflow=0, timeout=0.01)
+    havuz.acquire()
+    with pytest.raises(HavuzZamanAsimi) as hata:
+        havuz.acquire()
+    assert isinstance(hata.value, HTTPException)
+    assert hata.value.status_code == 503
+    assert hata.value.headers["Retry-After"] == "1"
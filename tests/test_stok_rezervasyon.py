@@ -0,0 +1,39 @@
+"""
+Taslak iş evrakı stok rezervasyonları
+"""
+
+
+def _kaydet(db, taslak, urunler):
+    """kaydet-ve-gonder'in stok kısmı: taslağın rezervasyonu bırakılıp aynı transaction'da düşülür"""
+    with db.db_conn.unit_of_work():
+        db.stok_rezervasyon_birak(taslak)
+        return db.stok_miktar_azalt_batch(urunler, kaynak="is_evraki", kaynak_no="7")
+
+
+def test_ayni_is_emri_no_ile_iki_taslak(db):
+    assert db.stok_ekle("KPI-9", "Kapı", stok_miktari=1)
+    urunler = [{"urun_kodu": "KPI-9", "urun_adi": "Kapı", "miktar": 1}]
+
+    # İki kullanıcıya aynı iş emri no önerildi; her taslak kendi anahtarını alır
+    taslak_a, basarili, hatalar = db.stok_rezerve_et(None, urunler, evrak_no="7")
+    assert basarili and not hatalar
+    taslak_b, basarili, hatalar = db.stok_rezerve_et(None, urunler, evrak_no="7")
+    assert taslak_a != taslak_b
+    assert not basarili and "Yetersiz stok" in hatalar[0]
+    assert [r["taslak"] for r in db.stok_rezervasyon_listele(taslak_a)] == [taslak_a]
+    assert db.stok_rezervasyon_listele(taslak_b) == []
+
+    # B'nin güncellemesi / bırakması A'nın rezervasyonuna dokunmaz
+    db.stok_rezerve_et(taslak_b, urunler, evrak_no="7")
+    assert db.stok_rezervasyon_birak(taslak_b) == 0
+    assert db.stok_urun_kodu_ile_ara("KPI-9")["rezerve_miktar"] == 1
+
+    # B kaydederken A'nın rezerve ettiği stok düşülemez; A'nın kaydı rezervasyonunu düşüme çevirir
+    basarili, hatalar = _kaydet(db, taslak_b, urunler)
+    assert not basarili and "Yetersiz stok" in hatalar[0]
+    basarili, hatalar = _kaydet(db, taslak_a, urunler)
+    assert basarili and not hatalar
+
+    urun = db.stok_urun_kodu_ile_ara("KPI-9")
+    assert (urun["stok_miktari"], urun["rezerve_miktar"]) == (0, 0)
+    assert db.stok_bakiye_dogrula() == []